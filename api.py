@@ -0,0 +1,348 @@
+"""API HTTP/JSON de consulta sin Streamlit
+
+Capa de servicio importable (WEOService) y un servidor HTTP liviano
+para dashboards y notebooks. Los datos se cargan una vez por proceso y
+se comparten entre todos los hilos del servidor; con WEO_DATA_DIR las
+ediciones nuevas se cargan en caliente (DataRegistry) y cada solicitud
+responde con la versión vigente al empezar.
+
+Uso:
+    python api.py --host 127.0.0.1 --port 8000 [--metrics]
+
+Rutas:
+    GET  /health
+    GET  /indicators
+    GET  /series/<código>?start=1995&end=2024
+    GET  /stats/<código>?start=1995&end=2024
+    GET  /revisions/<código>?year=2025&last=4   (pronóstico de un año en las últimas ediciones)
+    GET  /compare/<código>?groups=andean,dollarized&start=2015&end=2024   (posición frente a pares)
+    GET  /export?codes=LUR,PCPIPCH&format=csv&start=2000&end=2024&countries=ECU,PER
+    GET  /metrics               (formato Prometheus; ?format=jsonl para JSON lines)
+    POST /ask  {"query": "...", "indicator": "PCPIPCH", "conversation": "id opcional"}
+    POST /reload                (recargar WEO_DATA_DIR sin esperar la revisión periódica)
+"""
+
+import argparse
+import io
+import json
+import math
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+from ecuador_assistant import metrics
+from ecuador_assistant.caching import RenderCache
+from ecuador_assistant.conversation import ConversationMemory
+from ecuador_assistant.export import EXPORT_FORMATS, export_indicators
+from ecuador_assistant.registry import DataRegistry
+
+# Conversaciones de /ask retenidas (las menos usadas se descartan)
+MAX_CONVERSATIONS = 256
+_conversations_lock = threading.Lock()
+
+
+def to_json_bytes(payload: Any) -> bytes:
+    """JSON compacto (NaN como null)"""
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode('utf-8')
+
+
+class WEOService:
+    """Consultas de series, estadísticas, exportación y asistente sobre los datos cargados"""
+    
+    def __init__(self, assistant, weo_processor, cache_entries: int = 4096,
+                 registry: DataRegistry = None, response_cache: RenderCache = None,
+                 conversations: OrderedDict = None):
+        self.assistant = assistant
+        self.weo_processor = weo_processor
+        self.registry = registry
+        self._view = None
+        # Respuestas JSON ya serializadas por (ruta, código, rango, edición)
+        self.response_cache = response_cache or RenderCache(
+            max_entries=cache_entries, max_bytes=128 * 1024 * 1024, name='api')
+        # Memoria de cada conversación de /ask (compartida con las vistas por edición)
+        self.conversations = conversations if conversations is not None else OrderedDict()
+    
+    @classmethod
+    def load(cls):
+        registry = DataRegistry()
+        snapshot = registry.current()
+        return cls(snapshot.assistant, snapshot.weo_processor, registry=registry)
+    
+    def current(self) -> 'WEOService':
+        """Servicio ligado a la versión de datos vigente (usarlo durante toda la solicitud)"""
+        if self.registry is None:
+            return self
+        snapshot = self.registry.current()
+        view = self._view
+        if view is None or view.weo_processor is not snapshot.weo_processor:
+            # La caché de respuestas se comparte: sus claves incluyen la edición
+            view = WEOService(snapshot.assistant, snapshot.weo_processor, response_cache=self.response_cache,
+                              conversations=self.conversations)
+            self._view = view
+            self.assistant, self.weo_processor = snapshot.assistant, snapshot.weo_processor
+        return view
+    
+    def reload(self) -> Dict[str, Any]:
+        if self.registry is None:
+            raise ValueError('Recarga no disponible: el servicio no tiene registro de datos')
+        return self.registry.reload().describe()
+    
+    def _key(self, kind: str, *parts) -> tuple:
+        return (kind, self.weo_processor.data_hash, *parts)
+    
+    def indicators(self) -> List[Dict[str, Any]]:
+        return [
+            {'code': code, 'name': info['name'], 'units': info['units'], 'scale': info['scale']}
+            for code, info in self.weo_processor.indicators_info.items()
+        ]
+    
+    def series(self, indicator_code: str, start_year: int = None, end_year: int = None):
+        """Serie de un indicador como arreglos paralelos de años y valores (None si falta)"""
+        data = self.weo_processor.get_indicator_data(indicator_code, start_year, end_year)
+        if data is None:
+            return None
+        view = data['data']
+        return {
+            'code': indicator_code,
+            'name': data['info']['name'],
+            'units': data['info']['units'],
+            'years': view.years.tolist(),
+            'values': [None if math.isnan(value) else value for value in view.array.tolist()],
+            'estimates_start': data['info'].get('estimates_start'),
+            'estimate': data['estimate_mask'].tolist()
+        }
+    
+    def stats(self, indicator_code: str, start_year: int = None, end_year: int = None):
+        if indicator_code not in self.weo_processor.processed_data:
+            return None
+        return {
+            'code': indicator_code,
+            'start': start_year,
+            'end': end_year,
+            'stats': self.weo_processor.get_range_stats(indicator_code, start_year, end_year)
+        }
+    
+    def revisions(self, indicator_code: str, year: int, last: int = None):
+        history = self.weo_processor.get_revisions([indicator_code], year, last)
+        return {
+            'code': indicator_code,
+            'year': year,
+            'vintages': [
+                {'vintage': label, 'value': None if math.isnan(value) else value}
+                for label, value in history.get(indicator_code, [])
+            ]
+        }
+    
+    def compare(self, indicator_code: str, start_year: int = None, end_year: int = None,
+                groups: List[str] = None):
+        engine = self.weo_processor.comparison
+        if engine is None:
+            raise ValueError('Comparación regional no disponible')
+        unknown = [group for group in groups or () if group not in engine.groups]
+        if unknown:
+            raise ValueError(f"Grupos desconocidos: {', '.join(unknown)} (disponibles: {', '.join(engine.groups)})")
+        
+        def as_list(array):
+            return [None if math.isnan(value) else value for value in array.tolist()]
+        
+        result = engine.compare(indicator_code, start_year, end_year, groups)
+        return {
+            'code': indicator_code,
+            'country': self.weo_processor.country,
+            'groups': [
+                {
+                    'group': peers['group'],
+                    'name': peers['name'],
+                    'members': peers['members'],
+                    'years': peers['years'],
+                    'value': as_list(peers['value']),
+                    'median': as_list(peers['median']),
+                    'p25': as_list(peers['p25']),
+                    'p75': as_list(peers['p75']),
+                    'count': peers['count'].tolist(),
+                    'rank': peers['rank'].tolist(),
+                    'percentile': as_list(peers['percentile']),
+                    'period': {key: None if isinstance(value, float) and math.isnan(value) else value
+                               for key, value in peers['period'].items()}
+                }
+                for peers in result.values()
+            ]
+        }
+    
+    def export(self, indicator_codes: List[str] = None, fmt: str = 'csv', start_year: int = None,
+               end_year: int = None, countries: List[str] = None) -> bytes:
+        output = io.BytesIO()
+        export_indicators(self.weo_processor, output, fmt, indicator_codes, countries,
+                          start_year, end_year)
+        return output.getvalue()
+    
+    def ask(self, query: str, indicator_code: str = None, conversation: str = None) -> Dict[str, Any]:
+        """Respuesta del asistente; con `conversation` la pregunta puede seguir a las anteriores"""
+        if not conversation:
+            return {'query': query, 'answer': self.assistant.generate_response(query, indicator_code)}
+        memory = self.conversation(str(conversation))
+        with memory.lock:
+            answer = self.assistant.generate_response(query, indicator_code, memory=memory)
+        return {'query': query, 'answer': answer, 'conversation': conversation}
+    
+    def conversation(self, conversation_id: str) -> ConversationMemory:
+        with _conversations_lock:
+            memory = self.conversations.get(conversation_id)
+            if memory is None:
+                memory = ConversationMemory()
+                self.conversations[conversation_id] = memory
+                while len(self.conversations) > MAX_CONVERSATIONS:
+                    self.conversations.popitem(last=False)
+            self.conversations.move_to_end(conversation_id)
+            return memory
+    
+    def cached_json(self, kind: str, builder, *parts) -> bytes:
+        """Respuesta JSON serializada una sola vez por clave"""
+        return self.response_cache.get_or_create(self._key(kind, *parts), lambda: to_json_bytes(builder()))
+
+
+def _int_param(params: Dict[str, List[str]], name: str):
+    values = params.get(name)
+    return int(values[0]) if values and values[0] else None
+
+
+def _list_param(params: Dict[str, List[str]], name: str):
+    values = params.get(name)
+    if not values or not values[0]:
+        return None
+    return [value.strip() for value in values[0].split(',') if value.strip()]
+
+
+def make_handler(root_service: WEOService):
+    """Clase de handler HTTP ligada a un servicio"""
+    
+    class WEORequestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def log_message(self, format, *args):
+            pass
+        
+        def _send(self, status: int, body: bytes, content_type: str = 'application/json'):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def _error(self, status: int, message: str):
+            self._send(status, to_json_bytes({'error': message}))
+        
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            parts = [part for part in url.path.split('/') if part]
+            service = root_service.current()
+            try:
+                start, end = _int_param(params, 'start'), _int_param(params, 'end')
+                
+                if parts == ['health']:
+                    self._send(200, to_json_bytes({'status': 'ok', 'vintage': service.weo_processor.vintage}))
+                elif parts == ['indicators']:
+                    self._send(200, service.cached_json('indicators', service.indicators))
+                elif len(parts) == 2 and parts[0] in ('series', 'stats'):
+                    code = parts[1]
+                    if code not in service.weo_processor.processed_data:
+                        return self._error(404, f"Indicador no encontrado: {code}")
+                    builder = service.series if parts[0] == 'series' else service.stats
+                    self._send(200, service.cached_json(parts[0], lambda: builder(code, start, end), code, start, end))
+                elif len(parts) == 2 and parts[0] == 'revisions':
+                    code, year, last = parts[1], _int_param(params, 'year'), _int_param(params, 'last')
+                    if code not in service.weo_processor.processed_data:
+                        return self._error(404, f"Indicador no encontrado: {code}")
+                    if year is None:
+                        return self._error(400, "Falta 'year'")
+                    self._send(200, service.cached_json('revisions', lambda: service.revisions(code, year, last),
+                                                        code, year, last))
+                elif len(parts) == 2 and parts[0] == 'compare':
+                    code, groups = parts[1], _list_param(params, 'groups')
+                    if code not in service.weo_processor.processed_data:
+                        return self._error(404, f"Indicador no encontrado: {code}")
+                    self._send(200, service.cached_json(
+                        'compare', lambda: service.compare(code, start, end, groups),
+                        code, start, end, tuple(groups or ())))
+                elif parts == ['export']:
+                    fmt = (params.get('format') or ['csv'])[0]
+                    if fmt not in EXPORT_FORMATS:
+                        return self._error(400, f"Formato no soportado: {fmt}")
+                    body = service.export(_list_param(params, 'codes'), fmt, start, end,
+                                          _list_param(params, 'countries'))
+                    self._send(200, body, EXPORT_FORMATS[fmt][1])
+                elif parts == ['metrics']:
+                    registry = metrics.get_metrics()
+                    if not registry.enabled:
+                        return self._error(404, 'Métricas desactivadas (METRICS_ENABLED=1 o --metrics)')
+                    if (params.get('format') or [''])[0] == 'jsonl':
+                        self._send(200, registry.json_lines().encode('utf-8'), 'application/x-ndjson')
+                    else:
+                        self._send(200, registry.prometheus_text().encode('utf-8'),
+                                   'text/plain; version=0.0.4; charset=utf-8')
+                else:
+                    self._error(404, 'Ruta no encontrada')
+            except ValueError as e:
+                self._error(400, str(e))
+        
+        def do_POST(self):
+            path = urlparse(self.path).path.strip('/')
+            if path == 'reload':
+                try:
+                    return self._send(200, to_json_bytes(root_service.reload()))
+                except ValueError as e:
+                    return self._error(400, str(e))
+            if path != 'ask':
+                return self._error(404, 'Ruta no encontrada')
+            service = root_service.current()
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(payload, dict):
+                    return self._error(400, 'El cuerpo debe ser un objeto JSON')
+                query = payload.get('query', '')
+                if not isinstance(query, str) or not query.strip():
+                    return self._error(400, "Falta 'query' (texto)")
+                for field in ('indicator', 'conversation'):
+                    if payload.get(field) is not None and not isinstance(payload[field], str):
+                        return self._error(400, f"'{field}' debe ser texto")
+                self._send(200, to_json_bytes(service.ask(query.strip(), payload.get('indicator'),
+                                                          payload.get('conversation'))))
+            except ValueError as e:
+                self._error(400, str(e))
+    
+    return WEORequestHandler
+
+
+def serve(host: str = '127.0.0.1', port: int = 8000, service: WEOService = None) -> ThreadingHTTPServer:
+    """Crear el servidor HTTP (un hilo por conexión, datos compartidos)"""
+    service = service or WEOService.load()
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API HTTP/JSON de Ecuador Economic Data Assistant')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--metrics', action='store_true', help='activar la instrumentación y /metrics')
+    args = parser.parse_args()
+    
+    if args.metrics:
+        metrics.enable()
+    server = serve(args.host, args.port)
+    print(f"Sirviendo en http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
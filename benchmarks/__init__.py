@@ -0,0 +1,4 @@
+"""Benchmarks de las rutas críticas (parseo, consultas, contexto y render)
+
+    python -m benchmarks.run --output resultados.json
+"""
@@ -0,0 +1,110 @@
+"""Exportaciones WEO sintéticas de tamaño configurable
+
+Se generan con el mismo formato que los archivos del FMI (tabulaciones,
+separador de miles, marcadores n/a) a partir del extracto de Ecuador:
+los 15 indicadores reales se replican para cada país con otra escala y
+ruido, y los sujetos adicionales son paseos aleatorios con notas de texto
+para que el índice de recuperación tenga volumen realista.
+"""
+
+import itertools
+import string
+from typing import List
+
+import numpy as np
+
+from ecuador_assistant.weo_data import load_weo_data
+
+WEO_HEADER = ['WEO Country Code', 'ISO', 'WEO Subject Code', 'Country', 'Subject Descriptor',
+              'Subject Notes', 'Units', 'Scale', 'Country/Series-specific Notes']
+FIRST_YEAR, LAST_YEAR = 1980, 2030
+
+NOTE_WORDS = ('balance', 'deuda', 'inversión', 'consumo', 'precios', 'exportaciones', 'salarios',
+              'crédito', 'reservas', 'petróleo', 'remesas', 'empleo', 'tributación', 'subsidios',
+              'productividad', 'ahorro', 'tipo de cambio', 'importaciones', 'turismo', 'minería')
+
+
+def country_codes(n_countries: int) -> List[str]:
+    """ECU más códigos ISO sintéticos deterministas (AAA, AAB, ...)"""
+    codes = ['ECU']
+    for letters in itertools.product(string.ascii_uppercase, repeat=3):
+        if len(codes) >= n_countries:
+            break
+        iso = ''.join(letters)
+        if iso != 'ECU':
+            codes.append(iso)
+    return codes[:n_countries]
+
+
+def format_row(values: np.ndarray) -> List[str]:
+    cells = []
+    for value in values.tolist():
+        if value != value:
+            cells.append('n/a')
+        elif abs(value) >= 1000:
+            cells.append(f'{value:,.2f}')
+        else:
+            cells.append(f'{value:.3f}')
+    return cells
+
+
+def make_weo_text(n_countries: int = 1, n_subjects: int = 15, seed: int = 0) -> str:
+    """Texto WEO sintético con n_countries x n_subjects series (1980-2030)"""
+    import pandas as pd
+    
+    rng = np.random.default_rng(seed)
+    years = [str(year) for year in range(FIRST_YEAR, LAST_YEAR + 1)]
+    isos = country_codes(n_countries)
+    names = ['Ecuador' if iso == 'ECU' else f'Country {iso}' for iso in isos]
+    
+    # Plantillas reales de Ecuador (metadata y valores)
+    lines = load_weo_data().split('\n')
+    header = lines[0].split('\t')
+    year_cols = [header.index(year) for year in years]
+    templates = []
+    for line in lines[1:]:
+        cells = line.split('\t')
+        values = np.array([float(cells[i].replace(',', '')) if cells[i] != 'n/a' else np.nan
+                           for i in year_cols])
+        templates.append((cells[:9], values))
+    
+    # Indicadores reales: una copia por país con otra escala y ruido (con
+    # separador de miles, como en los archivos del FMI)
+    rows = ['\t'.join(WEO_HEADER + years + ['Estimates Start After'])]
+    for c, (iso, country) in enumerate(zip(isos, names)):
+        factor = 1.0 if iso == 'ECU' else float(rng.uniform(0.3, 3.0))
+        for meta, base in templates[:n_subjects]:
+            noise = 0 if iso == 'ECU' else rng.normal(0, 0.02, len(years)) * np.abs(base)
+            meta = [str(100 + c), iso, meta[2], country] + meta[4:]
+            rows.append('\t'.join(meta + format_row(base * factor + noise) + ['2024']))
+    
+    # Sujetos sintéticos: paseos aleatorios con huecos iniciales, en bloque
+    subjects = list(range(len(templates), n_subjects))
+    if subjects:
+        n_rows = len(isos) * len(subjects)
+        values = np.cumsum(rng.normal(0, 1, (n_rows, len(years))), axis=1)
+        values = np.round(values + rng.uniform(-50, 500, (n_rows, 1)), 3)
+        gaps = rng.integers(0, 15, n_rows)
+        values[np.arange(len(years)) < gaps[:, None]] = np.nan
+        words = np.array(NOTE_WORDS)[rng.integers(0, len(NOTE_WORDS), (n_rows, 6))]
+        notes = [' '.join(row) for row in words.tolist()]
+        
+        row_iso = np.repeat(np.arange(len(isos)), len(subjects))
+        row_subject = np.tile(subjects, len(isos))
+        frame = pd.DataFrame({
+            'WEO Country Code': (100 + row_iso).astype(str),
+            'ISO': np.array(isos)[row_iso],
+            'WEO Subject Code': [f'SYN{s:04d}' for s in row_subject],
+            'Country': np.array(names)[row_iso],
+            'Subject Descriptor': [f'Synthetic subject {s}' for s in row_subject],
+            'Subject Notes': [f'Serie sintética de {note}.' for note in notes],
+            'Units': 'Percent change',
+            'Scale': 'Units',
+            'Country/Series-specific Notes': [f'Source: synthetic fixture. Notes: {note}' for note in notes],
+        })
+        frame = pd.concat([frame, pd.DataFrame(values, columns=years)], axis=1)
+        frame['Estimates Start After'] = '2024'
+        rows.append(frame.to_csv(sep='\t', header=False, index=False,
+                                 na_rep='n/a', lineterminator='\n').rstrip('\n'))
+    
+    return '\n'.join(rows)
@@ -0,0 +1,291 @@
+"""Medir latencia y memoria de las rutas críticas sobre datos WEO sintéticos
+
+Cada escenario genera una exportación de N países x M sujetos y mide:
+process_data, get_indicator_data con rangos aleatorios,
+find_relevant_indicators, el armado del contexto en
+generate_claude_response_full (con un cliente LLM de prueba),
+create_enhanced_visualization y create_excel_download. El contexto se
+mide con los bloques de indicador ya memoizados y en frío.
+
+    python -m benchmarks.run                          # escenarios por defecto
+    python -m benchmarks.run --scenario 50x500 --output actual.json
+    python -m benchmarks.run --output actual.json --baseline base.json
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import types
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.fixtures import make_weo_text
+
+DEFAULT_SCENARIOS = ['1x15', '20x150', '60x500']
+
+QUERIES = [
+    '¿Cómo evolucionó la inflación después de la dolarización?',
+    'crecimiento del PIB real en la última década',
+    'tasa de desempleo en 2020',
+    'deuda pública como porcentaje del PIB',
+    'balance de cuenta corriente y exportaciones',
+    'población de Ecuador',
+    'inversión y ahorro',
+    'precios del petróleo y remesas',
+]
+
+
+class StubMessages:
+    """messages.create sin red: devuelve una respuesta fija"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def create(self, **request):
+        self.calls += 1
+        text = types.SimpleNamespace(text='Respuesta de prueba')
+        usage = types.SimpleNamespace(input_tokens=0, output_tokens=0)
+        return types.SimpleNamespace(content=[text], usage=usage)
+
+
+class StubClient:
+    def __init__(self):
+        self.messages = StubMessages()
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Percentiles en milisegundos"""
+    ms = np.asarray(samples) * 1000
+    return {
+        'n': int(len(ms)),
+        'mean_ms': float(ms.mean()),
+        'min_ms': float(ms.min()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p90_ms': float(np.percentile(ms, 90)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+    }
+
+
+def measure(func: Callable[[int], Any], iterations: int, warmup: int = 1) -> Dict[str, float]:
+    """Latencia de func(i) en `iterations` llamadas y pico de memoria de una llamada extra"""
+    for i in range(warmup):
+        func(i)
+    
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    
+    # El pico se mide aparte: tracemalloc enlentece las asignaciones
+    gc.collect()
+    tracemalloc.start()
+    func(iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    result = summarize(samples)
+    result['peak_kb'] = peak / 1024
+    return result
+
+
+def max_rss_mb():
+    """Memoria residente máxima del proceso hasta el momento (None fuera de Unix)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def run_scenario(n_countries: int, n_subjects: int, iterations: int, seed: int) -> Dict[str, Any]:
+    from ecuador_assistant.assistant import EcuadorAdvancedAssistant
+    from ecuador_assistant.charts import create_enhanced_visualization
+    from ecuador_assistant.export import create_excel_download
+    from ecuador_assistant.processing import EcuadorWEOProcessor
+    
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    text = make_weo_text(n_countries, n_subjects, seed=seed)
+    fixture_seconds = time.perf_counter() - start
+    
+    # process_data corre en el constructor; se libera el procesador anterior
+    # antes de cada corrida para no medir dos almacenes a la vez
+    holder = [None]
+    
+    def process(i):
+        holder[0] = None
+        holder[0] = EcuadorWEOProcessor(text)
+    
+    # El procesamiento completo es caro en los escenarios grandes
+    process_iterations = max(3, iterations // 10)
+    results = {'process_data': measure(process, process_iterations)}
+    processor = holder[0]
+    codes = list(processor.processed_data)
+    first, last = int(processor.years[0]), int(processor.years[-1])
+    
+    def random_range(i):
+        lo, hi = sorted(rng.integers(first, last + 1, size=2))
+        return codes[i % len(codes)], int(lo), int(hi)
+    
+    def indicator_data(i):
+        code, lo, hi = random_range(i)
+        processor.get_indicator_data(code, lo, hi)
+    
+    results['get_indicator_data'] = measure(indicator_data, iterations * 10)
+    
+    start = time.perf_counter()
+    assistant = EcuadorAdvancedAssistant(processor)
+    index_seconds = time.perf_counter() - start
+    assistant.claude_client = StubClient()
+    
+    def relevant(i):
+        assistant.find_relevant_indicators(QUERIES[i % len(QUERIES)])
+    
+    results['find_relevant_indicators'] = measure(relevant, iterations)
+    
+    contexts = [assistant.resolve_context(query) for query in QUERIES]
+    
+    def context_build(i):
+        assistant.generate_claude_response_full(QUERIES[i % len(QUERIES)], contexts[i % len(contexts)])
+    
+    results['context_build'] = measure(context_build, iterations)
+    
+    # Sin los bloques memoizados del constructor de prompt (primera pregunta)
+    def context_build_cold(i):
+        assistant.context_builder._blocks.clear()
+        context_build(i)
+    
+    results['context_build_cold'] = measure(context_build_cold, iterations)
+    
+    def visualization(i):
+        code, lo, hi = random_range(i)
+        create_enhanced_visualization(code, processor, lo, hi)
+    
+    results['create_enhanced_visualization'] = measure(visualization, iterations)
+    
+    def excel(i):
+        code, lo, hi = random_range(i)
+        create_excel_download(code, processor, lo, hi)
+    
+    results['create_excel_download'] = measure(excel, max(3, iterations // 2))
+    
+    return {
+        'countries': n_countries,
+        'subjects': n_subjects,
+        'series': int(processor.values.shape[0]),
+        'fixture_mb': len(text.encode('utf-8')) / 1e6,
+        'fixture_seconds': fixture_seconds,
+        'index_build_seconds': index_seconds,
+        'max_rss_mb': max_rss_mb(),
+        'benchmarks': results,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    import pandas as pd
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'embedder': os.getenv('RETRIEVAL_EMBEDDER', 'hashing'),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            min_delta_ms: float = 1.0) -> List[str]:
+    """Benchmarks cuyo p50 empeoró más que `tolerance` (1.2 = 20 %) respecto de la base
+
+    Las diferencias menores a min_delta_ms no cuentan (ruido en rutas de microsegundos).
+    """
+    previous = {(s['countries'], s['subjects']): s['benchmarks'] for s in baseline['scenarios']}
+    regressions = []
+    for scenario in current['scenarios']:
+        base = previous.get((scenario['countries'], scenario['subjects']))
+        if not base:
+            continue
+        for name, result in scenario['benchmarks'].items():
+            if name not in base or base[name]['p50_ms'] <= 0:
+                continue
+            ratio = result['p50_ms'] / base[name]['p50_ms']
+            regressed = ratio > tolerance and result['p50_ms'] - base[name]['p50_ms'] > min_delta_ms
+            flag = '  <-- regresión' if regressed else ''
+            print(f"{scenario['countries']}x{scenario['subjects']:<6} {name:<30} "
+                  f"{base[name]['p50_ms']:9.2f} -> {result['p50_ms']:9.2f} ms  x{ratio:.2f}{flag}")
+            if regressed:
+                regressions.append(f"{scenario['countries']}x{scenario['subjects']} {name}")
+    return regressions
+
+
+def print_report(report: Dict[str, Any]):
+    for scenario in report['scenarios']:
+        print(f"\n{scenario['countries']} países x {scenario['subjects']} sujetos "
+              f"({scenario['series']} series, {scenario['fixture_mb']:.1f} MB, "
+              f"índice {scenario['index_build_seconds']:.2f} s)")
+        print(f"  {'benchmark':<30} {'p50':>9} {'p90':>9} {'p99':>9} {'pico KB':>10}")
+        for name, result in scenario['benchmarks'].items():
+            print(f"  {name:<30} {result['p50_ms']:9.2f} {result['p90_ms']:9.2f} "
+                  f"{result['p99_ms']:9.2f} {result['peak_kb']:10.0f}")
+
+
+def parse_scenario(value: str) -> tuple:
+    countries, subjects = value.lower().split('x')
+    return int(countries), int(subjects)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks de Ecuador Economic Data Assistant')
+    parser.add_argument('--scenario', action='append',
+                        help='países x sujetos, p. ej. 200x1500 (repetible; por defecto 1x15, 20x150, 60x500)')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='guardar los resultados en JSON')
+    parser.add_argument('--baseline', help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--tolerance', type=float, default=1.2,
+                        help='razón p50 actual/base a partir de la cual se reporta regresión')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                        help='diferencia mínima de p50 para reportar regresión')
+    args = parser.parse_args(argv)
+    
+    # Sin disco ni red: el índice y las respuestas se calculan en cada corrida
+    # y el LLM es siempre StubClient
+    for name in ('WEO_CACHE_DIR', 'RESPONSE_CACHE_DB', 'ANTHROPIC_API_KEY'):
+        os.environ.pop(name, None)
+    logging.getLogger('ecuador_assistant').setLevel(logging.ERROR)
+    
+    report = {'environment': environment(), 'iterations': args.iterations, 'seed': args.seed,
+              'scenarios': []}
+    for value in args.scenario or DEFAULT_SCENARIOS:
+        n_countries, n_subjects = parse_scenario(value)
+        print(f"Escenario {n_countries}x{n_subjects}...", file=sys.stderr)
+        report['scenarios'].append(run_scenario(n_countries, n_subjects, args.iterations, args.seed))
+    
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print()
+        if compare(report, baseline, args.tolerance, args.min_delta_ms):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
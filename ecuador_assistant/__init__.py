@@ -0,0 +1,63 @@
+"""Núcleo de datos y asistente económico de Ecuador, sin interfaz
+
+Importar el paquete no carga Streamlit, plotly ni anthropic: cada
+nombre público se resuelve desde su módulo la primera vez que se usa.
+
+    from ecuador_assistant import build_system
+    assistant, weo_processor = build_system()
+"""
+
+import importlib
+
+_EXPORTS = {
+    'load_weo_data': 'weo_data',
+    'parse_weo_table': 'processing',
+    'discover_weo_vintages': 'processing',
+    'load_weo_vintages': 'processing',
+    'EcuadorWEOProcessor': 'processing',
+    'SeriesView': 'processing',
+    'RangeStatsIndex': 'processing',
+    'RevisionStore': 'revisions',
+    'HISTORICAL_PERIODS': 'processing',
+    'MACRO_INDICATORS': 'indicators',
+    'DERIVED_INDICATORS': 'indicators',
+    'DerivedIndicatorEngine': 'derived',
+    'PeerComparisonEngine': 'comparison',
+    'PEER_GROUPS': 'comparison',
+    'IndicatorRetriever': 'retrieval',
+    'create_embedder': 'retrieval',
+    'PromptContextBuilder': 'prompting',
+    'ResponseCache': 'caching',
+    'RenderCache': 'caching',
+    'LLMGateway': 'llm',
+    'get_llm_gateway': 'llm',
+    'EcuadorAdvancedAssistant': 'assistant',
+    'OfflineAnswerEngine': 'answering',
+    'QueryRouter': 'answering',
+    'ConversationMemory': 'conversation',
+    'build_system': 'system',
+    'BatchRunner': 'batch',
+    'DataRegistry': 'registry',
+    'DataSnapshot': 'registry',
+    'create_enhanced_visualization': 'charts',
+    'create_excel_download': 'export',
+    'export_indicators': 'export',
+    'EXPORT_FORMATS': 'export',
+    'LoggingNotifier': 'notify',
+    'get_notifier': 'notify',
+    'set_notifier': 'notify',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
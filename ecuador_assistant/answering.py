@@ -0,0 +1,449 @@
+"""Respuestas analíticas locales, sin LLM
+
+Una gramática de patrones compilados reconoce la intención de la
+pregunta (valor de un año, cambio entre años, máximo/mínimo, tendencia,
+comparación de períodos, correlación) y sus años o rangos; la respuesta
+se calcula sobre la matriz de series con operaciones vectorizadas para
+todos los indicadores de la consulta a la vez. Es determinista: la
+misma pregunta sobre los mismos datos produce el mismo texto.
+
+    engine = OfflineAnswerEngine(weo_processor)
+    engine.answer('¿En qué año fue máxima la inflación?', ['PCPIPCH'])
+"""
+
+import os
+import re
+import threading
+from typing import Any, Dict, List
+
+import numpy as np
+
+from . import metrics
+from .indicators import DERIVED_INDICATORS
+from .processing import ANALYTICS_PERIODS, HISTORICAL_PERIODS, EcuadorWEOProcessor
+from .retrieval import normalize_text
+
+
+YEAR_PATTERN = re.compile(r'\b(19[5-9]\d|20\d\d)\b')
+RANGE_PATTERN = re.compile(r'\b(19[5-9]\d|20\d\d)\s*(?:-|–|a|al|hasta|y)\s*(19[5-9]\d|20\d\d)\b')
+
+# Intenciones en orden de prioridad: (nombre, patrón sobre el texto normalizado)
+INTENT_PATTERNS = [
+    ('correlation', re.compile(r'\bcorrelacion|\bcorrelacionad|\brelacion(?:a|an)?\s+(?:entre|con)\b'
+                               r'|\bse relaciona|\basociacion entre|\bcomovimiento')),
+    ('compare', re.compile(r'\bcompar|\bversus\b|\bvs\.?\s|\bfrente a\b|\bcontra\b'
+                           r'|\bantes y despues\b|\bpre\s*(?:y|vs)\s*post\b')),
+    ('change', re.compile(r'\bcambi|\bvariacion|\bvario\b|\bdiferencia|\bcrecio|\bcayo|\baument'
+                          r'|\bdisminu|\bsubio|\bbajo\b|\bpaso de\b')),
+    ('max', re.compile(r'\bmaxim|\bmas alt|\bmayor\b|\bpico\b|\brecord\b|\bmas elevad')),
+    ('min', re.compile(r'\bminim|\bmas baj|\bmenor\b|\bpiso\b|\bmas reducid')),
+    ('trend', re.compile(r'\btendencia|\bevolucion|\bevoluciono|\btrayectoria|\bdinamica'
+                         r'|\bcomo (?:ha|se ha) (?:ido|comportado|movido)|\bcrecimiento promedio')),
+]
+
+# Períodos con nombre que se reconocen en la pregunta (HISTORICAL_PERIODS)
+PERIOD_PATTERNS = [
+    (re.compile(r'\bpre[- ]?dolarizacion|\bantes de (?:la )?dolarizacion'), HISTORICAL_PERIODS[0]),
+    (re.compile(r'\bpost[- ]?dolarizacion|\bdespues de (?:la )?dolarizacion'), HISTORICAL_PERIODS[1]),
+    (re.compile(r'\bboom\b'), HISTORICAL_PERIODS[2]),
+    (re.compile(r'\bcrisis\b|\bajuste\b'), HISTORICAL_PERIODS[3]),
+    (re.compile(r'\brecuperacion\b'), HISTORICAL_PERIODS[4]),
+]
+DOLLARIZATION_PATTERN = re.compile(r'\bdolarizacion')
+
+# Confianza de la interpretación: intención explícita con sus años, valor
+# de un año o agregado sobre los años observados, intención a la que le
+# faltan años (cambio, comparación), resumen general
+CONFIDENCE_EXPLICIT = 0.9
+CONFIDENCE_LOOKUP = 0.8
+CONFIDENCE_DEFAULTS = 0.6
+CONFIDENCE_SUMMARY = 0.3
+
+MIN_TREND_POINTS = 3
+MIN_CORRELATION_POINTS = 5
+
+# Preguntas que piden interpretación: siempre van al LLM
+OPEN_ENDED_PATTERN = re.compile(r'\bpor ?que\b|\bexplic|\banaliz|\banalisis\b|\bcausa|\bimpacto|\befecto'
+                                r'|\bimplica|\bperspectiva|\brecomend|\bdeberia|\bopina|\binterpret'
+                                r'|\bcontexto\b|\bpolitica|\bconsecuencia|\bpronostica|\bescenario'
+                                r'|\bafect|\binflu|\bincid')
+
+# Temas que una pregunta puede nombrar y los indicadores WEO que los responden;
+# los derivados solo cuando la pregunta los nombra (su 'topic' en indicators.py)
+TOPIC_INDICATORS = [
+    (re.compile(r'\binflacion|\bprecios?\b|\bipc\b'), {'PCPIPCH'}),
+    (re.compile(r'\bpib\b|\bproducto\b|\bcrecimiento\b(?! (?:de la )?poblac)|\bactividad\b'),
+     {'NGDP_RPCH', 'NGDP_R', 'NGDP', 'NGDPD'}),
+    (re.compile(r'\bper ?capita\b|\bpor habitante\b'), {'NGDPRPC', 'NGDPDPC'}),
+    (re.compile(r'\bdesempleo|\bempleo\b|\blaboral'), {'LUR'}),
+    (re.compile(r'\bdeuda\b'), {'GGXWDG_NGDP'}),
+    (re.compile(r'\bdeficit\b|\bsuperavit\b|\bfiscal\b'), {'GGXCNL_NGDP'}),
+    (re.compile(r'\bcuenta corriente\b|\bbalanza\b|\bsector externo\b'), {'BCA_NGDPD'}),
+    (re.compile(r'\bexportacion'), {'TX_RPCH'}),
+    (re.compile(r'\bimportacion'), {'TM_RPCH'}),
+    (re.compile(r'\bcomercio\b'), {'TX_RPCH', 'TM_RPCH', 'BCA_NGDPD'}),
+    (re.compile(r'\bpoblacion\b|\bhabitantes\b|\bdemograf'), {'LP'}),
+] + [(re.compile(definition['topic']), {code}) for code, definition in DERIVED_INDICATORS.items()]
+
+# Rutas de una pregunta: valor puntual, agregado calculado, LLM, o local por falta de LLM
+ROUTE_LOOKUP = 'lookup'
+ROUTE_AGGREGATE = 'aggregate'
+ROUTE_LLM = 'llm'
+ROUTE_OFFLINE = 'offline'
+ROUTES = (ROUTE_LOOKUP, ROUTE_AGGREGATE, ROUTE_LLM, ROUTE_OFFLINE)
+
+
+def names_topic(text: str) -> bool:
+    """El texto (normalizado) nombra algún tema de TOPIC_INDICATORS"""
+    return any(pattern.search(text) for pattern, _ in TOPIC_INDICATORS)
+
+
+def parse_intent(query: str, topic: bool = False) -> Dict[str, Any]:
+    """Intención, años, rangos y confianza de una pregunta
+
+    Un año suelto es un valor puntual solo si se sabe de qué indicador:
+    la pregunta nombra un tema o `topic` (indicador fijado o heredado
+    de un seguimiento); si no ("¿qué pasó en 1999?") queda bajo el umbral.
+    """
+    text = normalize_text(query)
+    ranges = [(int(a), int(b)) if int(a) <= int(b) else (int(b), int(a))
+              for a, b in RANGE_PATTERN.findall(text)]
+    years = sorted({int(year) for year in YEAR_PATTERN.findall(text)})
+    periods = [period for pattern, period in PERIOD_PATTERNS if pattern.search(text)]
+    intent = next((name for name, pattern in INTENT_PATTERNS if pattern.search(text)), None)
+    defaulted = False
+    
+    if intent == 'compare':
+        if len(ranges) + len(periods) < 2 and DOLLARIZATION_PATTERN.search(text):
+            periods = list(HISTORICAL_PERIODS[:2])
+        explicit = len(ranges) + len(periods) >= 2
+    elif intent == 'change':
+        explicit = len(years) >= 2
+    elif intent in ('max', 'min', 'trend', 'correlation'):
+        # Sin rango se calculan sobre los años observados: bien definidos
+        explicit = bool(ranges or periods)
+        defaulted = not explicit
+    elif ranges:
+        intent, explicit = 'trend', True
+    elif years:
+        intent, explicit = 'value', True
+    else:
+        intent, explicit = 'summary', False
+    
+    if intent == 'summary':
+        confidence = CONFIDENCE_SUMMARY
+    elif intent == 'value':
+        confidence = CONFIDENCE_LOOKUP if topic or names_topic(text) else CONFIDENCE_DEFAULTS
+    elif defaulted:
+        confidence = CONFIDENCE_LOOKUP
+    else:
+        confidence = CONFIDENCE_EXPLICIT if explicit else CONFIDENCE_DEFAULTS
+    
+    return {
+        'intent': intent,
+        'years': years,
+        'ranges': ranges,
+        'periods': periods,
+        'confidence': confidence
+    }
+
+
+class QueryRouter:
+    """Decide si una pregunta se responde localmente o va al LLM
+
+    Los valores puntuales (lookup) y los agregados calculables (cambio,
+    máximo/mínimo, tendencia, comparación, correlación) se responden con
+    OfflineAnswerEngine cuando la confianza de la interpretación alcanza
+    el umbral (ROUTER_CONFIDENCE, 0.75 por defecto); las preguntas
+    abiertas o ambiguas van al LLM. `counts` acumula las rutas tomadas.
+    """
+    
+    def __init__(self, threshold: float = None):
+        if threshold is None:
+            threshold = float(os.getenv('ROUTER_CONFIDENCE', '0.75'))
+        self.threshold = threshold
+        self.counts = dict.fromkeys(ROUTES, 0)
+        self._lock = threading.Lock()
+    
+    def classify(self, query: str, intent: Dict[str, Any] = None, llm_available: bool = True) -> tuple:
+        """(ruta, intención) sin contar la pregunta; `intent` evita reinterpretarla"""
+        intent = intent or parse_intent(query)
+        if (intent['intent'] == 'summary' or intent['confidence'] < self.threshold
+                or OPEN_ENDED_PATTERN.search(normalize_text(query))):
+            return (ROUTE_LLM if llm_available else ROUTE_OFFLINE), intent
+        return (ROUTE_LOOKUP if intent['intent'] == 'value' else ROUTE_AGGREGATE), intent
+    
+    def record(self, route: str, intent: Dict[str, Any], count: int = 1):
+        """Registrar la ruta final de `count` preguntas en los contadores"""
+        with self._lock:
+            self.counts[route] += count
+        metrics.increment('query_routes', value=count, route=route, intent=intent['intent'])
+    
+    def route(self, query: str, llm_available: bool = True, intent: Dict[str, Any] = None) -> tuple:
+        """(ruta, intención) de una pregunta, registrando la ruta en los contadores"""
+        route, intent = self.classify(query, intent, llm_available)
+        self.record(route, intent)
+        return route, intent
+
+
+class OfflineAnswerEngine:
+    """Responde preguntas factuales con cálculos sobre el almacén de series
+
+    Sin rango explícito los cálculos usan solo los años observados de
+    cada indicador; con rango se incluyen las previsiones y se marcan.
+    """
+    
+    def __init__(self, weo_processor: EcuadorWEOProcessor):
+        self.weo_processor = weo_processor
+    
+    def gather(self, indicator_codes: List[str]) -> tuple:
+        """Códigos presentes, matriz indicadores x años y máscara de previsiones"""
+        processor = self.weo_processor
+        codes = [code for code in dict.fromkeys(indicator_codes) if code in processor.code_index]
+        rows = [processor.code_index[code] for code in codes]
+        return codes, processor.values[rows], processor.estimate_mask[rows]
+    
+    def window(self, values: np.ndarray, estimate: np.ndarray, start: int = None, end: int = None) -> np.ndarray:
+        """Máscara de celdas válidas en [start, end], o de los años observados si no hay rango"""
+        valid = ~np.isnan(values)
+        if start is None and end is None:
+            return valid & ~estimate
+        years = self.weo_processor.years
+        return valid & (years >= (start or years[0])) & (years <= (end or years[-1]))
+    
+    def topical_codes(self, query: str, indicator_codes: List[str], llm_available: bool = True):
+        """Indicadores de la consulta que corresponden a los temas que nombra la pregunta
+
+        Si la pregunta no nombra ningún tema se devuelven todos. None si
+        ninguno corresponde: la búsqueda falló y la pregunta debe ir al
+        LLM; sin LLM se usan los indicadores del tema.
+        """
+        text = normalize_text(query)
+        expected = set()
+        for pattern, codes in TOPIC_INDICATORS:
+            if pattern.search(text):
+                expected |= codes
+        if not expected:
+            return list(indicator_codes)
+        topical = [code for code in indicator_codes if code in expected]
+        if topical:
+            return topical
+        if llm_available:
+            return None
+        fallback = sorted(code for code in expected if code in self.weo_processor.code_index)
+        return fallback or list(indicator_codes)
+    
+    def answer(self, query: str, indicator_codes: List[str], intent: Dict[str, Any] = None) -> str:
+        """Respuesta en Markdown para todos los indicadores de la consulta"""
+        intent = intent or parse_intent(query)
+        codes, values, estimate = self.gather(indicator_codes)
+        if not codes:
+            return ''
+        renderer = getattr(self, f"answer_{intent['intent']}")
+        body = renderer(intent, codes, values, estimate)
+        processor = self.weo_processor
+        return f"""{body}
+
+*Fuente: FMI World Economic Outlook ({processor.vintage}); {processor.estimates_note()} | Respuesta calculada localmente*"""
+    
+    def label(self, code: str) -> str:
+        info = self.weo_processor.indicators_info[code]
+        return f"**{info['name']}** ({info['units']})"
+    
+    def answer_value(self, intent, codes, values, estimate) -> str:
+        years = [year for year in intent['years'] if self.column(year) is not None]
+        if not years:
+            return self.answer_summary(intent, codes, values, estimate)
+        columns = [self.column(year) for year in years]
+        cells = values[:, columns]
+        flags = estimate[:, columns]
+        lines = [f"📊 **Datos de {', '.join(map(str, years))}**", ""]
+        for i, code in enumerate(codes):
+            parts = [f"{year}: {cells[i, j]:.2f}{' (previsión)' if flags[i, j] else ''}"
+                     if not np.isnan(cells[i, j]) else f"{year}: sin dato"
+                     for j, year in enumerate(years)]
+            lines.append(f"- {self.label(code)}: {'; '.join(parts)}")
+        return '\n'.join(lines)
+    
+    def answer_change(self, intent, codes, values, estimate) -> str:
+        years = [year for year in intent['years'] if self.column(year) is not None]
+        if len(years) < 2:
+            return self.answer_trend(intent, codes, values, estimate)
+        first, last = years[0], years[-1]
+        start, end = values[:, self.column(first)], values[:, self.column(last)]
+        flags = estimate[:, [self.column(first), self.column(last)]].any(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = end - start
+            percent = np.where(start != 0, (end / start - 1) * 100, np.nan)
+            cagr = np.where((start > 0) & (end > 0), ((end / start) ** (1 / (last - first)) - 1) * 100, np.nan)
+        
+        lines = [f"📊 **Cambio entre {first} y {last}**", ""]
+        for i, code in enumerate(codes):
+            if np.isnan(change[i]):
+                lines.append(f"- {self.label(code)}: sin datos en ambos años")
+                continue
+            line = f"- {self.label(code)}: {start[i]:.2f} → {end[i]:.2f} ({change[i]:+.2f}"
+            units = self.weo_processor.indicators_info[code]['units']
+            if 'Percent' not in units and np.isfinite(percent[i]):
+                line += f", {percent[i]:+.1f}%"
+                if np.isfinite(cagr[i]):
+                    line += f"; {cagr[i]:+.2f}% anual"
+            line += ')'
+            if flags[i]:
+                line += ' · incluye previsiones'
+            lines.append(line)
+        return '\n'.join(lines)
+    
+    def answer_max(self, intent, codes, values, estimate) -> str:
+        return self.extreme(intent, codes, values, estimate, highest=True)
+    
+    def answer_min(self, intent, codes, values, estimate) -> str:
+        return self.extreme(intent, codes, values, estimate, highest=False)
+    
+    def extreme(self, intent, codes, values, estimate, highest: bool) -> str:
+        start, end, label = self.span(intent)
+        window = self.window(values, estimate, start, end)
+        filled = np.where(window, values, -np.inf if highest else np.inf)
+        columns = filled.argmax(axis=1) if highest else filled.argmin(axis=1)
+        found = window.any(axis=1)
+        years = self.weo_processor.years
+        
+        word = 'Máximo' if highest else 'Mínimo'
+        lines = [f"📊 **{word} {label}**", ""]
+        for i, code in enumerate(codes):
+            if not found[i]:
+                lines.append(f"- {self.label(code)}: sin datos en el período")
+                continue
+            column = columns[i]
+            note = ' (previsión)' if estimate[i, column] else ''
+            lines.append(f"- {self.label(code)}: {values[i, column]:.2f} en {years[column]}{note}")
+        return '\n'.join(lines)
+    
+    def answer_trend(self, intent, codes, values, estimate) -> str:
+        start, end, label = self.span(intent)
+        window = self.window(values, estimate, start, end)
+        years = self.weo_processor.years.astype(np.float64)
+        
+        # Mínimos cuadrados por fila con la máscara como pesos 0/1
+        weights = window.astype(np.float64)
+        filled = np.where(window, values, 0.0)
+        n = weights.sum(axis=1)
+        sx, sxx = weights @ years, weights @ years ** 2
+        sy, syy, sxy = filled.sum(axis=1), (filled ** 2).sum(axis=1), filled @ years
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = (n * sxy - sx * sy) / (n * sxx - sx ** 2)
+            mean = sy / n
+            std = np.sqrt(np.maximum(syy / n - mean ** 2, 0))
+        first = window.argmax(axis=1)
+        last = window.shape[1] - 1 - window[:, ::-1].argmax(axis=1)
+        
+        lines = [f"📊 **Tendencia {label}**", ""]
+        for i, code in enumerate(codes):
+            if n[i] < MIN_TREND_POINTS:
+                lines.append(f"- {self.label(code)}: datos insuficientes en el período")
+                continue
+            span = years[last[i]] - years[first[i]]
+            if abs(slope[i]) * span < 0.1 * std[i] or std[i] == 0:
+                direction = 'estable'
+            else:
+                direction = 'creciente' if slope[i] > 0 else 'decreciente'
+            lines.append(
+                f"- {self.label(code)}: tendencia {direction} ({slope[i]:+.3f} por año); "
+                f"{values[i, first[i]]:.2f} en {int(years[first[i]])} → {values[i, last[i]]:.2f} en "
+                f"{int(years[last[i]])}; promedio {mean[i]:.2f}"
+            )
+        return '\n'.join(lines)
+    
+    def answer_compare(self, intent, codes, values, estimate) -> str:
+        periods = [(f"{a}-{b}", a, b) for a, b in intent['ranges']] + list(intent['periods'])
+        if len(periods) < 2:
+            periods = list(HISTORICAL_PERIODS)
+        years = self.weo_processor.years
+        
+        # Promedio de cada indicador en cada período: (indicadores x años) @ (años x períodos)
+        masks = np.array([(years >= a) & (years <= b) for _, a, b in periods], dtype=np.float64)
+        valid = ~np.isnan(values)
+        counts = valid.astype(np.float64) @ masks.T
+        sums = np.where(valid, values, 0.0) @ masks.T
+        means = np.divide(sums, counts, out=np.full(counts.shape, np.nan), where=counts > 0)
+        
+        lines = ["📊 **Comparación de períodos**", ""]
+        for i, code in enumerate(codes):
+            parts = [f"{name}: {means[i, j]:.2f}" if counts[i, j] else f"{name}: sin datos"
+                     for j, (name, _, _) in enumerate(periods)]
+            line = f"- {self.label(code)}: " + '; '.join(parts)
+            if len(periods) == 2 and counts[i].all():
+                line += f" (diferencia {means[i, 1] - means[i, 0]:+.2f})"
+            lines.append(line)
+        return '\n'.join(lines)
+    
+    def answer_correlation(self, intent, codes, values, estimate) -> str:
+        if len(codes) < 2:
+            return (f"📊 **Correlación**\n\nSolo se identificó un indicador ({self.label(codes[0])}); "
+                    f"mencione los dos indicadores a relacionar.")
+        start, end, label = self.span(intent)
+        window = self.window(values, estimate, start, end)
+        
+        # Pearson por pares con los años que ambos indicadores tienen (productos matriciales)
+        weights = window.astype(np.float64)
+        filled = np.where(window, values, 0.0)
+        n = weights @ weights.T
+        sx = filled @ weights.T
+        sxx = (filled ** 2) @ weights.T
+        sxy = filled @ filled.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = (n * sxy - sx * sx.T) / np.sqrt((n * sxx - sx ** 2) * (n * sxx.T - sx.T ** 2))
+        
+        lines = [f"📊 **Correlación {label}**", ""]
+        for i in range(len(codes)):
+            for j in range(i + 1, len(codes)):
+                names = f"{self.label(codes[i])} y {self.label(codes[j])}"
+                if n[i, j] < MIN_CORRELATION_POINTS or not np.isfinite(r[i, j]):
+                    lines.append(f"- {names}: datos comunes insuficientes")
+                    continue
+                strength = 'fuerte' if abs(r[i, j]) >= 0.7 else 'moderada' if abs(r[i, j]) >= 0.4 else 'débil'
+                sign = 'positiva' if r[i, j] > 0 else 'negativa'
+                lines.append(f"- {names}: r = {r[i, j]:+.2f}, correlación {strength} {sign} "
+                             f"({int(n[i, j])} años en común)")
+        return '\n'.join(lines)
+    
+    def answer_summary(self, intent, codes, values, estimate) -> str:
+        """Resumen de cada indicador: último dato, previsión y promedios por período"""
+        processor = self.weo_processor
+        sections = []
+        for code in codes:
+            indicator = processor.processed_data[code]
+            info, stats, periods = indicator['info'], indicator['stats'], indicator['analytics']['periods']
+            lines = [f"📊 **{info['name']}** ({info['units']})", ""]
+            if stats.get('latest_actual_value') is not None:
+                lines.append(f"- Último dato observado ({stats['latest_actual_year']}): {stats['latest_actual_value']:.2f}")
+            if stats.get('latest_actual_year') != stats['last_year']:
+                lines.append(f"- Previsión FMI ({stats['last_year']}): {stats['latest_value']:.2f}")
+            lines += [f"- {period}: {periods[period]:.2f} promedio"
+                      for period, _, _ in ANALYTICS_PERIODS if period in periods]
+            lines.append(f"- Período completo {stats['first_year']}-{stats['last_year']}: promedio "
+                         f"{stats['mean_value']:.2f}, máximo {stats['max_value']:.2f}, mínimo {stats['min_value']:.2f}")
+            sections.append('\n'.join(lines))
+        return '\n\n'.join(sections)
+    
+    def column(self, year: int):
+        """Columna de un año en la matriz, None si está fuera del eje"""
+        years = self.weo_processor.years
+        column = int(year) - int(years[0]) if len(years) else -1
+        return column if 0 <= column < len(years) else None
+    
+    @staticmethod
+    def span(intent: Dict[str, Any]) -> tuple:
+        """Rango de la pregunta (rango explícito, período con nombre o años) y su etiqueta"""
+        if intent['ranges']:
+            start, end = intent['ranges'][0]
+        elif intent['periods']:
+            name, start, end = intent['periods'][0]
+            return start, end, f"en {name}"
+        elif len(intent['years']) >= 2:
+            start, end = intent['years'][0], intent['years'][-1]
+        elif intent['years']:
+            return intent['years'][0], None, f"desde {intent['years'][0]}"
+        else:
+            return None, None, '(datos observados)'
+        return start, end, f"en {start}-{end}"
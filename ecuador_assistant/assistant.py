@@ -0,0 +1,284 @@
+"""Asistente económico: recuperación, prompt, caché y llamada a Claude"""
+
+import os
+import time
+from typing import Any, Dict, Iterator, List
+
+from . import metrics
+from .answering import ROUTE_LLM, OfflineAnswerEngine, QueryRouter, parse_intent
+from .caching import create_response_cache
+from .conversation import ConversationMemory
+from .llm import get_llm_gateway
+from .notify import get_notifier
+from .processing import EcuadorWEOProcessor
+from .prompting import CLAUDE_MODEL, PromptContextBuilder
+from .retrieval import IndicatorRetriever
+
+
+class EcuadorAdvancedAssistant:
+    """Asistente avanzado para datos económicos de Ecuador"""
+    
+    def __init__(self, weo_processor: EcuadorWEOProcessor, api_key: str = None,
+                 previous: 'EcuadorAdvancedAssistant' = None):
+        self.weo_processor = weo_processor
+        self.api_key = api_key
+        self.claude_client = None
+        # Con el asistente de la versión de datos anterior se reutilizan sus
+        # vectores de recuperación y su caché de respuestas (indexada por edición)
+        self.retriever = IndicatorRetriever(weo_processor, previous=previous.retriever if previous else None)
+        self.context_builder = PromptContextBuilder(weo_processor)
+        self.answer_engine = OfflineAnswerEngine(weo_processor)
+        self.router = previous.router if previous else QueryRouter()
+        self.response_cache = previous.response_cache if previous else create_response_cache()
+        self.setup_claude()
+    
+    def setup_claude(self):
+        """Configurar Claude AI"""
+        try:
+            api_key = self.api_key or os.getenv('ANTHROPIC_API_KEY')
+            if api_key:
+                # Cliente compartido por todas las sesiones del proceso
+                self.claude_client = get_llm_gateway(api_key)
+            else:
+                get_notifier().warning("⚠️ Claude API key no encontrada. Funcionará con respuestas básicas.")
+        except Exception as e:
+            get_notifier().error(f"Error configurando Claude: {e}")
+    
+    def generate_response(self, query: str, selected_indicator: str = None,
+                          memory: ConversationMemory = None) -> str:
+        """Generar respuesta usando Claude con TODOS los datos históricos
+
+        Los valores puntuales y los agregados calculables se responden
+        localmente (QueryRouter); solo las preguntas abiertas van a Claude.
+        Con `memory` la pregunta se resuelve contra los turnos previos y el
+        turno queda registrado en la conversación.
+        """
+        turn = self.prepare_turn(query, selected_indicator, memory)
+        answer = self.answer_turn(turn)
+        if memory is not None:
+            memory.record(turn['query'], answer, turn['codes'], turn['intent'])
+        return answer
+    
+    def generate_response_stream(self, query: str, selected_indicator: str = None,
+                                 memory: ConversationMemory = None) -> Iterator[str]:
+        """Variante en streaming de generate_response: produce el texto a medida que llega
+
+        Al terminar el stream la respuesta completa se guarda en la caché
+        (y en `memory`, si se pasa).
+        """
+        turn = self.prepare_turn(query, selected_indicator, memory)
+        chunks = []
+        for text in self.stream_turn(turn):
+            chunks.append(text)
+            yield text
+        if memory is not None:
+            memory.record(turn['query'], ''.join(chunks), turn['codes'], turn['intent'])
+    
+    def prepare_turn(self, query: str, selected_indicator: str = None,
+                     memory: ConversationMemory = None) -> Dict[str, Any]:
+        """Pregunta, indicadores, intención e historial de un turno
+
+        Con memoria, un seguimiento ("¿y en la década siguiente?") se
+        reescribe con el período explícito y reutiliza los indicadores del
+        turno anterior sin volver a buscarlos.
+        """
+        # Con un indicador fijado la pregunta ya tiene tema ("¿y en 2005?")
+        pinned = bool(selected_indicator)
+        if memory is None:
+            context_data = self.resolve_context(query, selected_indicator)
+            intent, history, conversation = parse_intent(query, topic=pinned), [], ''
+        else:
+            follow_up = memory.is_follow_up(query)
+            intent = memory.intent(query, topic=pinned)
+            query = memory.rewrite(query)
+            context_data = self.resolve_context(query, selected_indicator, memory)
+            history = memory.messages()
+            conversation = memory.digest() if follow_up else ''
+        return {
+            'query': query,
+            'context': context_data,
+            'codes': [data['info']['code'] for data in context_data],
+            'intent': intent,
+            'history': history,
+            'conversation': conversation
+        }
+    
+    def answer_turn(self, turn: Dict[str, Any]) -> str:
+        """Respuesta de un turno preparado: local, cacheada, Claude o de respaldo"""
+        query, context_data = turn['query'], turn['context']
+        local = self.local_answer(query, context_data, turn['intent'])
+        if local is not None:
+            self.narrow_turn(turn)
+            return local
+        
+        if self.claude_client and context_data:
+            # Preguntas repetidas: respuesta cacheada sin llamar a Claude
+            cached = self.response_cache.get(self.cache_key(query, context_data, turn['conversation']))
+            if cached is not None:
+                return cached
+            return self.generate_claude_response_full(query, context_data, turn['history'], turn['conversation'])
+        else:
+            return self.generate_fallback_response(query, context_data)
+    
+    def stream_turn(self, turn: Dict[str, Any]) -> Iterator[str]:
+        """Como answer_turn, en streaming"""
+        query, context_data = turn['query'], turn['context']
+        local = self.local_answer(query, context_data, turn['intent'])
+        if local is not None:
+            self.narrow_turn(turn)
+            yield local
+            return
+        
+        if not (self.claude_client and context_data):
+            yield self.generate_fallback_response(query, context_data)
+            return
+        
+        key = self.cache_key(query, context_data, turn['conversation'])
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        request = self.claude_request(query, context_data, turn['history'])
+        try:
+            with metrics.span('llm_request', mode='stream'), self.claude_client.messages.stream(**request) as stream:
+                started = time.perf_counter()
+                for text in stream.text_stream:
+                    if not chunks:
+                        metrics.observe('llm_first_token', time.perf_counter() - started)
+                    chunks.append(text)
+                    yield text
+                metrics.record_usage(stream.get_final_message())
+        except Exception as e:
+            metrics.increment('llm_failures', mode='stream')
+            get_notifier().warning(f"Error con Claude API: {e}")
+            if not chunks:
+                yield self.generate_fallback_response(query, context_data)
+            else:
+                yield "\n\n⚠️ *Respuesta interrumpida.*"
+            return
+        
+        self.response_cache.set(key, ''.join(chunks))
+    
+    def local_answer(self, query: str, context_data: List[Dict], intent: Dict[str, Any] = None):
+        """Respuesta calculada si la pregunta no necesita a Claude (None si debe ir al LLM)"""
+        if not context_data:
+            return None
+        llm_available = self.claude_client is not None
+        route, intent = self.router.classify(query, intent, llm_available)
+        if route == ROUTE_LLM:
+            self.router.record(route, intent)
+            return None
+        # Solo con indicadores del tema de la pregunta: si la búsqueda no
+        # encontró ninguno, un cálculo local respondería con otros datos
+        codes = self.answer_engine.topical_codes(query, [data['info']['code'] for data in context_data],
+                                                 llm_available=llm_available)
+        if codes is None:
+            metrics.increment('local_answer_off_topic')
+            self.router.record(ROUTE_LLM, intent)
+            return None
+        self.router.record(route, intent)
+        return self.answer_engine.answer(query, codes, intent)
+    
+    def narrow_turn(self, turn: Dict[str, Any]):
+        """Dejar en el turno solo los indicadores de la respuesta local (los que hereda un seguimiento)"""
+        turn['codes'] = self.answer_engine.topical_codes(turn['query'], turn['codes'], llm_available=False)
+    
+    def resolve_context(self, query: str, selected_indicator: str = None,
+                        memory: ConversationMemory = None) -> List[Dict]:
+        """Determinar los indicadores de la consulta y obtener sus datos COMPLETOS"""
+        if selected_indicator:
+            indicators_to_analyze = [selected_indicator]
+        elif memory is not None:
+            indicators_to_analyze = memory.indicators_for(query, self.find_relevant_indicators)
+        else:
+            indicators_to_analyze = self.find_relevant_indicators(query)
+        
+        context_data = []
+        for indicator_code in indicators_to_analyze:
+            full_data = self.weo_processor.get_all_years_data(indicator_code)
+            if full_data:
+                context_data.append(full_data)
+        
+        return context_data
+    
+    def cache_key(self, query: str, context_data: List[Dict], conversation: str = '') -> str:
+        """Clave de la caché de respuestas: pregunta, indicadores y edición de datos
+
+        En un seguimiento `conversation` (huella de la memoria) distingue
+        la misma pregunta en conversaciones distintas.
+        """
+        codes = [data['info']['code'] for data in context_data]
+        vintage = self.weo_processor.data_hash or self.weo_processor.vintage
+        if conversation:
+            query = f"{query}|{conversation}"
+        return self.response_cache.make_key(query, codes, vintage)
+    
+    @metrics.timed('find_relevant_indicators')
+    def find_relevant_indicators(self, query: str, k: int = 3) -> List[str]:
+        """Encontrar indicadores relevantes para la consulta (búsqueda vectorial)"""
+        return self.find_relevant_indicators_many([query], k)[0]
+    
+    def find_relevant_indicators_many(self, queries: List[str], k: int = 3) -> List[List[str]]:
+        """Indicadores relevantes de un lote de consultas en una sola búsqueda matricial"""
+        relevant = []
+        for results in self.retriever.search(queries, k=k, iso=self.weo_processor.country):
+            relevant_codes = [code for code, score in results
+                              if score > 0 and code in self.weo_processor.processed_data]
+            
+            # Solo si el índice no encuentra nada, usar indicadores principales
+            if not relevant_codes:
+                relevant_codes = ['NGDP_RPCH', 'PCPIPCH', 'LUR']
+            
+            relevant.append(relevant_codes[:k])
+        return relevant
+    
+    @metrics.timed('context_build')
+    def claude_request(self, query: str, context_data: List[Dict],
+                       history: List[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Parámetros de la llamada a Claude (contexto con presupuesto y prefijo cacheable)"""
+        prompt = self.context_builder.build(query, [data['info']['code'] for data in context_data], history)
+        return {
+            'model': CLAUDE_MODEL,
+            'max_tokens': 1500,
+            'temperature': 0.3,
+            'system': prompt['system'],
+            'messages': prompt['messages']
+        }
+    
+    def generate_claude_response_full(self, query: str, context_data: List[Dict],
+                                      history: List[Dict[str, str]] = None, conversation: str = '') -> str:
+        """Generar respuesta usando Claude con datos históricos COMPLETOS"""
+        try:
+            request = self.claude_request(query, context_data, history)
+            with metrics.span('llm_request', mode='create'):
+                response = self.claude_client.messages.create(**request)
+            metrics.record_usage(response)
+            
+            answer = response.content[0].text
+            self.response_cache.set(self.cache_key(query, context_data, conversation), answer)
+            return answer
+            
+        except Exception as e:
+            metrics.increment('llm_failures', mode='create')
+            get_notifier().warning(f"Error con Claude API: {e}")
+            return self.generate_fallback_response(query, context_data)
+    
+    def generate_fallback_response(self, query: str, context_data: List[Dict]) -> str:
+        """Respuesta sin Claude: cálculo determinista según la intención de la pregunta"""
+        processor = self.weo_processor
+        if not context_data:
+            return f"""📊 **Información no encontrada**
+
+Para obtener análisis específicos, puedes preguntar sobre:
+- **PIB y crecimiento económico** (incluye análisis pre/post dolarización)
+- **Inflación y estabilidad de precios** 
+- **Mercado laboral y desempleo**
+- **Finanzas públicas y deuda**
+- **Sector externo y balanza comercial**
+
+*Datos disponibles: {processor.period_label()}, {processor.estimates_note()} | Fuente: FMI World Economic Outlook*"""
+        
+        # Respuesta calculada localmente para todos los indicadores de la consulta
+        return self.answer_engine.answer(query, [data['info']['code'] for data in context_data])
@@ -0,0 +1,311 @@
+"""Respuestas en lote para reportes: archivo de preguntas -> JSONL y Markdown
+
+Los indicadores de todas las preguntas se resuelven con una sola
+búsqueda matricial y los contextos se arman antes de llamar a Claude
+(los bloques de indicador se renderizan una vez y se comparten entre
+preguntas). Las llamadas salen en paralelo a través del gateway con un
+límite de solicitudes por minuto, y cada respuesta se agrega al JSONL
+apenas llega: si la corrida se interrumpe, la siguiente retoma desde
+las preguntas que faltan.
+
+    python -m ecuador_assistant.batch preguntas.txt --output respuestas.jsonl --markdown reporte.md
+
+El archivo de preguntas es texto (una por línea; '#' comenta) o JSONL
+con {"query": "...", "indicator": "PCPIPCH", "id": "q1"} por línea.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, List
+
+from . import metrics
+from .answering import ROUTE_AGGREGATE, ROUTE_LLM, ROUTE_LOOKUP, ROUTE_OFFLINE, parse_intent
+from .notify import get_notifier
+
+# Estados de una respuesta en el checkpoint; 'error' se reintenta al retomar
+# y las respuestas sin LLM ('offline', 'fallback') también si ahora hay cliente
+DONE_STATUSES = ('claude', 'cache', ROUTE_LOOKUP, ROUTE_AGGREGATE, ROUTE_OFFLINE, 'fallback')
+WITHOUT_LLM_STATUSES = (ROUTE_OFFLINE, 'fallback')
+
+
+def question_id(query: str, indicator: str = None) -> str:
+    """Identificador estable de una pregunta (para retomar aunque cambie el orden del archivo)"""
+    raw = f"{indicator or ''}|{' '.join(query.split())}"
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=6).hexdigest()
+
+
+def load_questions(path: str) -> List[Dict[str, Any]]:
+    """Leer preguntas de un archivo de texto o JSONL"""
+    questions = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if path.endswith('.jsonl'):
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{number}: JSON inválido ({e.msg})")
+                if not str(item.get('query', '')).strip():
+                    raise ValueError(f"{path}:{number}: falta 'query'")
+                query, indicator = item['query'].strip(), item.get('indicator') or None
+                qid = str(item.get('id') or question_id(query, indicator))
+            else:
+                query, indicator = line, None
+                qid = question_id(query)
+            questions.append({'id': qid, 'query': query, 'indicator': indicator})
+    return questions
+
+
+def load_checkpoint(path: str) -> Dict[str, Dict[str, Any]]:
+    """Última respuesta registrada de cada pregunta en un JSONL de salida"""
+    records = {}
+    if not path or not os.path.exists(path):
+        return records
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Línea truncada por una corrida interrumpida
+                continue
+            records[record['id']] = record
+    return records
+
+
+class RateLimiter:
+    """Espaciar las solicitudes para no superar `per_minute` (0 = sin límite)"""
+    
+    def __init__(self, per_minute: float = 0):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+    
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class BatchRunner:
+    """Responder un lote de preguntas con el asistente y guardar un checkpoint JSONL
+
+    Preguntas con la misma clave de caché (pregunta normalizada e
+    indicadores) comparten una sola llamada. Sin cliente de Claude las
+    respuestas son las de fallback.
+    """
+    
+    def __init__(self, assistant, concurrency: int = None, rate_limit: float = None):
+        self.assistant = assistant
+        self.concurrency = concurrency or int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+        if rate_limit is None:
+            rate_limit = float(os.getenv('BATCH_RATE_LIMIT', '50'))
+        self.limiter = RateLimiter(rate_limit)
+    
+    def resolve(self, questions: List[Dict[str, Any]]) -> List[List[Dict]]:
+        """Datos de contexto de cada pregunta (una búsqueda para todas las que no fijan indicador)"""
+        assistant = self.assistant
+        open_questions = [q['query'] for q in questions if not q.get('indicator')]
+        found = iter(assistant.find_relevant_indicators_many(open_questions))
+        contexts = []
+        for question in questions:
+            codes = [question['indicator']] if question.get('indicator') else next(found)
+            context = [assistant.weo_processor.get_all_years_data(code) for code in codes]
+            contexts.append([data for data in context if data])
+        return contexts
+    
+    def answer(self, query: str, context_data: List[Dict], request: Dict[str, Any] = None,
+               route: tuple = (ROUTE_LLM, None)) -> tuple:
+        """(respuesta, estado, error) de una pregunta
+
+        Las preguntas que el router resuelve localmente no llaman a Claude;
+        su estado es la ruta (lookup, aggregate u offline).
+        """
+        assistant = self.assistant
+        if context_data and route[0] != ROUTE_LLM:
+            codes = assistant.answer_engine.topical_codes(query, [data['info']['code'] for data in context_data],
+                                                          llm_available=False)
+            return assistant.answer_engine.answer(query, codes, route[1]), route[0], None
+        if not (assistant.claude_client and context_data):
+            return assistant.generate_fallback_response(query, context_data), 'fallback', None
+        key = assistant.cache_key(query, context_data)
+        cached = assistant.response_cache.get(key)
+        if cached is not None:
+            return cached, 'cache', None
+        
+        self.limiter.wait()
+        try:
+            with metrics.span('llm_request', mode='batch'):
+                response = assistant.claude_client.messages.create(**request)
+            metrics.record_usage(response)
+        except Exception as e:
+            metrics.increment('llm_failures', mode='batch')
+            return assistant.generate_fallback_response(query, context_data), 'error', str(e)
+        answer = response.content[0].text
+        assistant.response_cache.set(key, answer)
+        return answer, 'claude', None
+    
+    def run(self, questions: List[Dict[str, Any]], output_path: str = None,
+            resume: bool = True) -> List[Dict[str, Any]]:
+        """Responder las preguntas pendientes y devolver un registro por pregunta (en orden)
+
+        Con output_path cada respuesta se agrega al JSONL al llegar; con
+        resume se omiten las preguntas ya respondidas sobre la misma
+        edición de datos.
+        """
+        processor = self.assistant.weo_processor
+        data_hash = processor.data_hash or processor.vintage
+        has_client = self.assistant.claude_client is not None
+        done = {}
+        if resume:
+            for qid, record in load_checkpoint(output_path).items():
+                status = record.get('status')
+                complete = status in DONE_STATUSES and (status not in WITHOUT_LLM_STATUSES or not has_client)
+                if complete and record.get('data_hash') == data_hash:
+                    done[qid] = record
+        pending = [q for q in questions if q['id'] not in done]
+        get_notifier().info(f"Lote: {len(questions)} preguntas, {len(done)} ya respondidas, {len(pending)} pendientes")
+        
+        # Contextos de todas las pendientes antes de llamar a Claude; las
+        # preguntas con la misma clave comparten una sola llamada
+        contexts = self.resolve(pending)
+        groups = {}
+        for question, context_data in zip(pending, contexts):
+            key = self.assistant.cache_key(question['query'], context_data)
+            groups.setdefault(key, []).append((question, context_data))
+        # Mismos indicadores juntos: el prefijo del prompt se repite y la caché del proveedor lo reutiliza
+        ordered = sorted(groups.values(), key=lambda group: [data['info']['code'] for data in group[0][1]])
+        # Ruta de cada pregunta: solo las que van al LLM necesitan armar el prompt
+        router, engine = self.assistant.router, self.assistant.answer_engine
+        routes = []
+        for group in ordered:
+            query, context_data = group[0][0]['query'], group[0][1]
+            if not context_data:
+                routes.append((ROUTE_LLM, None))
+                continue
+            intent = parse_intent(query, topic=bool(group[0][0].get('indicator')))
+            route = router.classify(query, intent, llm_available=has_client)
+            # Una local cuyos indicadores no son del tema de la pregunta también va al LLM
+            codes = [data['info']['code'] for data in context_data]
+            if route[0] != ROUTE_LLM and engine.topical_codes(query, codes, llm_available=has_client) is None:
+                route = (ROUTE_LLM, route[1])
+            # La ruta final se cuenta una vez por pregunta del grupo
+            router.record(route[0], route[1], count=len(group))
+            routes.append(route)
+        requests = [
+            self.assistant.claude_request(group[0][0]['query'], group[0][1])
+            if has_client and group[0][1] and route[0] == ROUTE_LLM else None
+            for group, route in zip(ordered, routes)
+        ]
+        
+        writer = None
+        if output_path:
+            # Cerrar la última línea si la corrida anterior se cortó a mitad
+            truncated = False
+            if os.path.exists(output_path) and os.path.getsize(output_path):
+                with open(output_path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    truncated = f.read(1) != b'\n'
+            writer = open(output_path, 'a', encoding='utf-8')
+            if truncated:
+                writer.write('\n')
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                futures = {
+                    pool.submit(self._timed_answer, group[0][0]['query'], group[0][1], request, route): group
+                    for group, request, route in zip(ordered, requests, routes)
+                }
+                for future in as_completed(futures):
+                    (answer, status, error), seconds = future.result()
+                    metrics.increment('batch_questions', value=len(futures[future]), result=status)
+                    for question, context_data in futures[future]:
+                        record = {
+                            'id': question['id'],
+                            'query': question['query'],
+                            'indicators': [data['info']['code'] for data in context_data],
+                            'answer': answer,
+                            'status': status,
+                            'error': error,
+                            'vintage': processor.vintage,
+                            'data_hash': data_hash,
+                            'seconds': round(seconds, 3)
+                        }
+                        done[question['id']] = record
+                        if writer is not None:
+                            writer.write(json.dumps(record, ensure_ascii=False) + '\n')
+                            writer.flush()
+        finally:
+            if writer is not None:
+                writer.close()
+        
+        return [done[q['id']] for q in questions if q['id'] in done]
+    
+    def _timed_answer(self, query: str, context_data: List[Dict], request: Dict[str, Any], route: tuple):
+        start = time.perf_counter()
+        result = self.answer(query, context_data, request, route)
+        return result, time.perf_counter() - start
+
+
+def write_markdown(records: List[Dict[str, Any]], path: str, weo_processor=None):
+    """Reporte Markdown con las respuestas en el orden del archivo de preguntas"""
+    errors = sum(record['status'] == 'error' for record in records)
+    lines = ["# Respuestas del asistente económico de Ecuador", ""]
+    if weo_processor is not None:
+        lines.append(f"_Datos: FMI {weo_processor.vintage} ({weo_processor.period_label()}) · "
+                     f"{len(records)} preguntas · generado {datetime.now():%Y-%m-%d %H:%M}_")
+        lines.append("")
+    if errors:
+        lines += [f"> ⚠️ {errors} preguntas con error de Claude (respuesta básica); vuelva a correr el lote para reintentarlas.", ""]
+    for number, record in enumerate(records, 1):
+        lines.append(f"## {number}. {record['query']}")
+        lines.append("")
+        if record['indicators']:
+            lines.append(f"**Indicadores:** {', '.join(record['indicators'])}")
+            lines.append("")
+        lines.append(record['answer'].strip())
+        lines.append("")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Responder un archivo de preguntas en lote')
+    parser.add_argument('questions', help='archivo de preguntas (.txt una por línea, o .jsonl)')
+    parser.add_argument('--output', default='respuestas.jsonl', help='JSONL de respuestas (checkpoint)')
+    parser.add_argument('--markdown', help='escribir además un reporte Markdown')
+    parser.add_argument('--concurrency', type=int, help='llamadas simultáneas (por defecto LLM_MAX_CONCURRENCY)')
+    parser.add_argument('--rate-limit', type=float,
+                        help='solicitudes por minuto a Claude (por defecto BATCH_RATE_LIMIT o 50; 0 sin límite)')
+    parser.add_argument('--fresh', action='store_true', help='ignorar las respuestas ya guardadas en --output')
+    parser.add_argument('--data-dir', help='directorio WEO (por defecto WEO_DATA_DIR)')
+    args = parser.parse_args(argv)
+    
+    from .system import build_system
+    
+    questions = load_questions(args.questions)
+    assistant, weo_processor = build_system(data_dir=args.data_dir)
+    runner = BatchRunner(assistant, args.concurrency, args.rate_limit)
+    records = runner.run(questions, args.output, resume=not args.fresh)
+    if args.markdown:
+        write_markdown(records, args.markdown, weo_processor)
+    
+    errors = sum(record['status'] == 'error' for record in records)
+    print(f"{len(records)} respuestas en {args.output}" + (f" ({errors} con error)" if errors else ''))
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
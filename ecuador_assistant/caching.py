@@ -0,0 +1,246 @@
+"""Cachés de respuestas del asistente y de render (figuras, archivos)"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from . import metrics
+from .processing import EcuadorWEOProcessor
+from .retrieval import normalize_text
+
+
+class ResponseCache:
+    """Caché acotada de respuestas del asistente (LRU + TTL)
+
+    La clave combina la pregunta normalizada (sin tildes, minúsculas y
+    espacios colapsados), el conjunto de indicadores y la edición de
+    datos. Con sqlite_path las respuestas también se guardan en SQLite,
+    sobreviven reinicios y se comparten entre procesos.
+    """
+    
+    TOUCH_BATCH = 256
+    
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 86400,
+                 sqlite_path: str = None, max_disk_entries: int = 20000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        # Lecturas pendientes de registrar en accessed_at (se escriben por lotes)
+        self._touched = {}
+        self._sqlite_path = sqlite_path
+        self._local = threading.local()
+        if sqlite_path:
+            db = self._connection()
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'expires_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            db.commit()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Conexión SQLite propia del hilo (WAL: lectores y escritor no se bloquean)"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self._sqlite_path, timeout=5)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+    
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Pregunta sin tildes, en minúsculas, sin signos al borde y con espacios colapsados"""
+        return ' '.join(normalize_text(query).split()).strip('¿?¡!.,;: ')
+    
+    def make_key(self, query: str, indicator_codes: List[str], vintage: str) -> str:
+        raw = f"{vintage}|{','.join(sorted(set(indicator_codes)))}|{self.normalize_query(query)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str):
+        """Respuesta cacheada o None (cuenta aciertos y fallos)"""
+        now = time.time()
+        value = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    value, touched = entry[0], self._touch(key, now)
+                else:
+                    del self._entries[key]
+            if value is None and self._sqlite_path is None:
+                self.misses += 1
+                metrics.increment('cache_requests', cache='response', result='miss')
+                return None
+        if value is not None:
+            metrics.increment('cache_requests', cache='response', result='hit')
+            self._write_touched(touched)
+            return value
+        
+        # SQLite fuera del candado: las consultas de otros hilos no esperan al disco
+        row = self._connection().execute(
+            'SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?',
+            (key, now)
+        ).fetchone()
+        with self._lock:
+            if not row:
+                self.misses += 1
+                metrics.increment('cache_requests', cache='response', result='miss')
+                return None
+            self._store(key, row[0], row[1])
+            self.hits += 1
+            touched = self._touch(key, now)
+        metrics.increment('cache_requests', cache='response', result='hit_disk')
+        self._write_touched(touched)
+        return row[0]
+    
+    def set(self, key: str, value: str):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._store(key, value, expires_at)
+            if self._sqlite_path is None:
+                return
+            self._writes += 1
+            prune = self._writes % 100 == 0
+            touched, self._touched = self._touched, {}
+        
+        db = self._connection()
+        with db:
+            db.execute(
+                'INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, value, expires_at, now)
+            )
+            self._update_accessed(db, touched)
+            if prune:
+                self._prune_disk(db, now)
+    
+    def _touch(self, key: str, now: float) -> Dict[str, float]:
+        """Registrar la lectura; devuelve el lote a escribir cuando se llena (con el candado tomado)"""
+        if self._sqlite_path is None:
+            return {}
+        self._touched[key] = now
+        if len(self._touched) < self.TOUCH_BATCH:
+            return {}
+        touched, self._touched = self._touched, {}
+        return touched
+    
+    def _write_touched(self, touched: Dict[str, float]):
+        if touched:
+            db = self._connection()
+            with db:
+                self._update_accessed(db, touched)
+    
+    @staticmethod
+    def _update_accessed(db: sqlite3.Connection, touched: Dict[str, float]):
+        db.executemany('UPDATE responses SET accessed_at = ? WHERE key = ?',
+                       [(accessed_at, key) for key, accessed_at in touched.items()])
+    
+    def _store(self, key: str, value: str, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _prune_disk(self, db: sqlite3.Connection, now: float):
+        """Eliminar vencidos y recortar la tabla a max_disk_entries (los menos usados)"""
+        db.execute('DELETE FROM responses WHERE expires_at <= ?', (now,))
+        db.execute(
+            'DELETE FROM responses WHERE key IN ('
+            'SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_disk_entries,)
+        )
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._touched.clear()
+        if self._sqlite_path is not None:
+            db = self._connection()
+            with db:
+                db.execute('DELETE FROM responses')
+    
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._entries)
+        }
+
+
+def create_response_cache() -> ResponseCache:
+    """Caché de respuestas configurada por variables de entorno"""
+    return ResponseCache(
+        max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', '512')),
+        ttl_seconds=float(os.getenv('RESPONSE_CACHE_TTL', '86400')),
+        sqlite_path=os.getenv('RESPONSE_CACHE_DB')
+    )
+
+
+class RenderCache:
+    """Caché LRU acotada para figuras y archivos generados por (indicador, rango, edición)
+
+    Se limita por número de entradas y por bytes (solo cuentan los
+    valores bytes, como los Excel).
+    """
+    
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024, name: str = 'render'):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _sizeof(value) -> int:
+        return len(value) if isinstance(value, (bytes, bytearray)) else 0
+    
+    def get_or_create(self, key: tuple, factory):
+        """Valor cacheado o el resultado de factory() (None no se cachea)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.increment('cache_requests', cache=self.name, result='hit')
+                return self._entries[key]
+            self.misses += 1
+        metrics.increment('cache_requests', cache=self.name, result='miss')
+        
+        value = factory()
+        if value is None:
+            return None
+        
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = value
+                self._bytes += self._sizeof(value)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._sizeof(evicted)
+        return value
+    
+    def stats(self) -> Dict[str, Any]:
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._entries), 'bytes': self._bytes}
+
+
+def render_key(kind: str, indicator_code: str, weo_processor: EcuadorWEOProcessor,
+               start_year: int, end_year: int) -> tuple:
+    """Clave de render: tipo, indicador, rango y edición de datos"""
+    return (kind, indicator_code, start_year, end_year, weo_processor.data_hash,
+            weo_processor.indicator_versions.get(indicator_code, 0))
@@ -0,0 +1,165 @@
+"""Gráficos de indicadores (plotly se importa al construir la primera figura)"""
+
+import numpy as np
+
+from . import metrics
+from .caching import RenderCache, render_key
+from .notify import get_notifier
+from .processing import EcuadorWEOProcessor
+from .revisions import REVISION_VINTAGES
+
+# Colores de las ediciones anteriores en el gráfico
+REVISION_COLORS = ['#e07b39', '#8e6bbf', '#7f8c8d']
+# Banda p25-p75 y mediana del grupo de pares
+PEER_BAND_COLOR = 'rgba(42, 82, 152, 0.12)'
+PEER_MEDIAN_COLOR = '#5d8fd6'
+
+
+def create_enhanced_visualization(indicator_code: str, weo_processor: EcuadorWEOProcessor, start_year: int = 1980, end_year: int = 2030,
+                                  render_cache: RenderCache = None, peer_group: str = None):
+    """Crear visualización mejorada estilo CEPALSTAT (reutilizada desde la caché si se pasa)
+
+    Con `peer_group` (clave de PEER_GROUPS) se superpone la banda p25-p75
+    y la mediana de los pares.
+    """
+    if render_cache is not None:
+        key = render_key('figure', indicator_code, weo_processor, start_year, end_year) + (peer_group,)
+        result = render_cache.get_or_create(
+            key, lambda: build_enhanced_figure(indicator_code, weo_processor, start_year, end_year, peer_group)
+        )
+    else:
+        result = build_enhanced_figure(indicator_code, weo_processor, start_year, end_year, peer_group)
+    
+    return result if result is not None else (None, None)
+
+@metrics.timed('figure_build')
+def build_enhanced_figure(indicator_code: str, weo_processor: EcuadorWEOProcessor, start_year: int, end_year: int,
+                          peer_group: str = None):
+    """Construir la figura Plotly y devolver (figura, datos), o None si no hay datos"""
+    import plotly.graph_objects as go
+    
+    try:
+        data = weo_processor.get_indicator_data(indicator_code, start_year, end_year)
+        if not data or not data['data']:
+            return None
+        
+        view = data['data']
+        valid = ~np.isnan(view.array)
+        years = view.years[valid].tolist()
+        values = view.array[valid].tolist()
+        estimate = data['estimate_mask'][valid]
+        
+        # Crear gráfico principal
+        fig = go.Figure()
+        
+        # Banda de pares (debajo de la serie): p25-p75 y mediana por año
+        peers = None
+        if peer_group and weo_processor.comparison is not None:
+            peers = weo_processor.comparison.compare(indicator_code, start_year, end_year, [peer_group]).get(peer_group)
+        if peers is not None:
+            band = ~np.isnan(peers['median'])
+            band_years = np.asarray(peers['years'])[band].tolist()
+            label = f"{peers['name']} ({len(peers['members'])} países)"
+            fig.add_trace(go.Scatter(
+                x=band_years, y=peers['p75'][band].tolist(),
+                mode='lines', line=dict(width=0), hoverinfo='skip', showlegend=False
+            ))
+            fig.add_trace(go.Scatter(
+                x=band_years, y=peers['p25'][band].tolist(),
+                mode='lines', line=dict(width=0), fill='tonexty', fillcolor=PEER_BAND_COLOR,
+                name=f"{label}: p25-p75", hoverinfo='skip'
+            ))
+            fig.add_trace(go.Scatter(
+                x=band_years, y=peers['median'][band].tolist(),
+                mode='lines', line=dict(color=PEER_MEDIAN_COLOR, width=1.5, dash='dash'),
+                name=f"{label}: mediana",
+                hovertemplate='<b>%{x}</b><br>Mediana de pares: %{y:.2f}<extra></extra>'
+            ))
+        
+        # Línea principal: datos observados continuos y previsiones punteadas
+        # desde el último dato observado
+        observed = np.flatnonzero(~estimate)
+        forecast_start = observed[-1] if len(observed) else 0
+        segments = [(~estimate, 'solid', 'Observado', '')]
+        if estimate.any():
+            segments.append((np.arange(len(years)) >= forecast_start, 'dash', 'Previsión', ' (previsión)'))
+        for mask, dash, label, suffix in segments:
+            if not mask.any():
+                continue
+            fig.add_trace(go.Scatter(
+                x=[year for year, keep in zip(years, mask) if keep],
+                y=[value for value, keep in zip(values, mask) if keep],
+                mode='lines+markers',
+                line=dict(color='#2a5298', width=3, dash=dash),
+                marker=dict(size=6, color='#2a5298', symbol='circle' if dash == 'solid' else 'circle-open'),
+                name=f"{label} ({weo_processor.vintage})",
+                hovertemplate=f'<b>%{{x}}</b><br>%{{y:.2f}}{suffix}<br><extra></extra>'
+            ))
+        
+        # Pronósticos de ediciones anteriores, desde el primer año en que
+        # difieren de la edición vigente
+        history = weo_processor.get_series_by_vintage(indicator_code, start_year, end_year,
+                                                      last=REVISION_VINTAGES)
+        revised = False
+        if history is not None and len(history[0]) > 1:
+            labels, history_years, matrix = history
+            latest = matrix[-1]
+            for label, row, color in zip(labels[-2::-1], matrix[-2::-1], REVISION_COLORS):
+                differs = np.flatnonzero(~((row == latest) | (np.isnan(row) & np.isnan(latest))))
+                if not len(differs):
+                    continue
+                start = max(differs[0] - 1, 0)
+                fig.add_trace(go.Scatter(
+                    x=history_years[start:].tolist(),
+                    y=row[start:].tolist(),
+                    mode='lines',
+                    line=dict(color=color, width=1.5, dash='dot'),
+                    name=label,
+                    hovertemplate=f'<b>%{{x}}</b><br>%{{y:.2f}}<br>{label}<extra></extra>'
+                ))
+                revised = True
+        
+        # Marcar evento de dolarización si está en el período
+        if 2000 in years:
+            fig.add_vline(
+                x=2000, 
+                line_dash="dash", 
+                line_color="red",
+                annotation_text="Dolarización",
+                annotation_position="top"
+            )
+        
+        # Marcar crisis 2020 si está en el período
+        if 2020 in years:
+            fig.add_vline(
+                x=2020, 
+                line_dash="dash", 
+                line_color="orange",
+                annotation_text="COVID-19",
+                annotation_position="top"
+            )
+        
+        # Configuración del gráfico
+        fig.update_layout(
+            title={
+                'text': f"{data['info']['name']}",
+                'x': 0.02,
+                'font': {'size': 16, 'color': '#2a5298'}
+            },
+            xaxis_title='Año',
+            yaxis_title=f"{data['info']['units']}",
+            template='plotly_white',
+            height=500,
+            showlegend=revised or peers is not None,
+            margin=dict(l=10, r=10, t=50, b=10)
+        )
+        
+        # Mejorar grid
+        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+        
+        return fig, data
+        
+    except Exception as e:
+        get_notifier().error(f"Error creando visualización: {e}")
+        return None
@@ -0,0 +1,174 @@
+"""Comparación regional: posición del país frente a grupos de pares
+
+Las series de un indicador para todos los países de los grupos se
+reúnen en una matriz (países x años) a partir del índice (país, código)
+del procesador, y el puesto, el percentil, la mediana y la dispersión de
+los pares se calculan con reducciones sobre la matriz completa, para
+todos los grupos y años a la vez.
+
+    engine = PeerComparisonEngine(weo_processor)
+    engine.compare('PCPIPCH', 2015, 2024)['dollarized']['period']['rank']
+"""
+
+import warnings
+from typing import Any, Dict, List
+
+import numpy as np
+
+from .processing import EcuadorWEOProcessor
+
+
+# Grupos de pares (códigos ISO del WEO); el país de análisis se excluye
+# de la mediana y la dispersión de su propio grupo
+PEER_GROUPS = {
+    'andean': {
+        'name': 'Países andinos',
+        'members': ['BOL', 'CHL', 'COL', 'ECU', 'PER', 'VEN']
+    },
+    'latam': {
+        'name': 'América Latina',
+        'members': ['ARG', 'BOL', 'BRA', 'CHL', 'COL', 'CRI', 'DOM', 'ECU', 'GTM',
+                    'HND', 'MEX', 'NIC', 'PAN', 'PER', 'PRY', 'SLV', 'URY', 'VEN']
+    },
+    'dollarized': {
+        'name': 'Economías dolarizadas',
+        'members': ['ECU', 'PAN', 'SLV']
+    },
+}
+
+
+def sorted_quantiles(ordered: np.ndarray, counts: np.ndarray, quantiles) -> List[np.ndarray]:
+    """Cuantiles (interpolación lineal) sobre el eje 1 de una matriz ya ordenada
+
+    `ordered` tiene los NaN al final de cada columna (np.sort) y `counts`
+    los valores válidos; una sola ordenación sirve para todos los cuantiles.
+    """
+    last = np.maximum(counts - 1, 0)
+    results = []
+    for q in quantiles:
+        position = last * q
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        low = np.take_along_axis(ordered, lower[:, None, :], axis=1)[:, 0, :]
+        high = np.take_along_axis(ordered, upper[:, None, :], axis=1)[:, 0, :]
+        value = low + (high - low) * (position - lower)
+        results.append(np.where(counts > 0, value, np.nan))
+    return results
+
+
+class PeerComparisonEngine:
+    """Puesto, percentil, mediana y dispersión del país frente a sus pares
+
+    El puesto cuenta desde el valor más alto (1 = mayor valor del grupo,
+    incluido el país) y el percentil es el porcentaje de pares con un
+    valor menor. Los países sin dato en un año no cuentan en ese año.
+    """
+    
+    def __init__(self, weo_processor: EcuadorWEOProcessor, groups: Dict[str, Dict[str, Any]] = None):
+        self.weo_processor = weo_processor
+        self.groups = dict(groups or PEER_GROUPS)
+        self.refresh_axes()
+    
+    def refresh_axes(self):
+        """Recalcular el eje de países y las filas después de cambiar el almacén"""
+        processor = self.weo_processor
+        country = processor.country
+        self.isos = sorted({iso for group in self.groups.values() for iso in group['members']} | {country})
+        self.focus = self.isos.index(country)
+        # Pertenencia grupos x países (sin el país de análisis)
+        self.membership = np.array([[iso in group['members'] and iso != country for iso in self.isos]
+                                    for group in self.groups.values()], dtype=bool).reshape(len(self.groups), -1)
+        self._series_index = processor.series_index
+        self._rows = {}
+    
+    def member_rows(self, code: str) -> np.ndarray:
+        """Fila de cada país (orden de self.isos) para un código, -1 si no la tiene"""
+        if self.weo_processor.series_index is not self._series_index:
+            self.refresh_axes()
+        rows = self._rows.get(code)
+        if rows is None:
+            series_index = self.weo_processor.series_index
+            rows = np.array([series_index.get((iso, code), -1) for iso in self.isos], dtype=np.int64)
+            # Sin ISO en el archivo las filas son del país de análisis
+            if rows[self.focus] < 0:
+                rows[self.focus] = self.weo_processor.code_index.get(code, -1)
+            self._rows[code] = rows
+        return rows
+    
+    def available_groups(self, code: str) -> List[str]:
+        """Grupos con al menos un par que tiene la serie"""
+        present = self.member_rows(code) >= 0
+        return [key for key, members in zip(self.groups, self.membership) if (members & present).any()]
+    
+    def compare(self, code: str, start_year: int = None, end_year: int = None,
+                groups: List[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Comparación del país con cada grupo en [start_year, end_year]
+
+        Por grupo: arreglos por año (valor del país, mediana, p25, p75,
+        pares con dato, puesto y percentil) y el resumen 'period' sobre el
+        promedio de cada país en la ventana. Se omiten los grupos sin
+        pares con datos.
+        """
+        keys = [key for key in (groups or self.groups) if key in self.groups]
+        processor = self.weo_processor
+        rows = self.member_rows(code)
+        columns = processor.year_slice(start_year, end_year)
+        years = processor.years[columns]
+        if not keys or not len(years):
+            return {}
+        
+        # Países x (años + promedio de la ventana): el resumen del período se
+        # calcula con las mismas reducciones como una columna más
+        present = rows >= 0
+        matrix = np.full((len(rows), len(years) + 1), np.nan)
+        matrix[present, :-1] = processor.values[rows[present], columns]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            matrix[:, -1] = np.nanmean(matrix[:, :-1], axis=1)
+        
+        membership = self.membership[[list(self.groups).index(key) for key in keys]]
+        peers = np.where(membership[:, :, None], matrix[None, :, :], np.nan)
+        focus = matrix[self.focus]
+        
+        valid = ~np.isnan(peers)
+        counts = valid.sum(axis=1)
+        above = (peers > focus).sum(axis=1)
+        below = (peers < focus).sum(axis=1)
+        ranked = (counts > 0) & ~np.isnan(focus)
+        low, median, high = sorted_quantiles(np.sort(peers, axis=1), counts, (0.25, 0.5, 0.75))
+        rank = np.where(ranked, above + 1, 0)
+        percentile = np.divide(below * 100.0, counts, out=np.full(counts.shape, np.nan), where=ranked)
+        
+        year_list = years.tolist()
+        result = {}
+        for g, key in enumerate(keys):
+            if not counts[g].any():
+                continue
+            members = [iso for iso, member, has_data in zip(self.isos, membership[g], valid[g].any(axis=1))
+                       if member and has_data]
+            result[key] = {
+                'group': key,
+                'name': self.groups[key]['name'],
+                'members': members,
+                'years': year_list,
+                'value': focus[:-1],
+                'median': median[g, :-1],
+                'p25': low[g, :-1],
+                'p75': high[g, :-1],
+                'count': counts[g, :-1],
+                'rank': rank[g, :-1],
+                'percentile': percentile[g, :-1],
+                'period': {
+                    'start': year_list[0],
+                    'end': year_list[-1],
+                    'value': float(focus[-1]),
+                    'median': float(median[g, -1]),
+                    'p25': float(low[g, -1]),
+                    'p75': float(high[g, -1]),
+                    'spread': float(high[g, -1] - low[g, -1]),
+                    'count': int(counts[g, -1]),
+                    'rank': int(rank[g, -1]),
+                    'percentile': float(percentile[g, -1])
+                }
+            }
+        return result
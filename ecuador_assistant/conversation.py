@@ -0,0 +1,193 @@
+"""Memoria de conversación acotada: ventana de turnos + resumen compacto
+
+Los últimos turnos se envían completos (respuestas recortadas) y los
+anteriores se pliegan en un resumen de una línea por turno, también
+acotado; así el tamaño del historial que va al modelo, y la memoria de
+la sesión, no crecen con la cantidad de turnos. La memoria recuerda los
+indicadores y el período de los turnos previos para resolver
+preguntas de seguimiento como "¿y en la década siguiente?".
+
+    memory = ConversationMemory()
+    assistant.generate_response('inflación en 2000-2009', memory=memory)
+    assistant.generate_response('¿y en la década siguiente?', memory=memory)
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List
+
+from .answering import INTENT_PATTERNS, OPEN_ENDED_PATTERN, parse_intent
+from .retrieval import normalize_text
+
+
+# Pregunta que continúa la anterior (sobre el texto normalizado)
+FOLLOW_UP_PATTERN = re.compile(
+    r'^[¿\s]*(?:y|e|tambien|ahora|entonces|pero|que tal|y si)\b'
+    r'|\b(?:eso|esa|ese|esos|esas|lo mismo|la misma|el mismo|mismo indicador|mismo periodo)\b'
+    r'|\b(?:decada|ano|periodo) (?:siguiente|anterior|previo|previa|proximo|proxima)\b'
+    r'|\b(?:siguiente|anterior|proxima|proximo) (?:decada|ano|periodo)\b'
+)
+SHIFT_PATTERNS = [
+    (re.compile(r'\bdecada (?:siguiente|proxima)\b|\b(?:siguiente|proxima) decada\b'), 'decade', 1),
+    (re.compile(r'\bdecada (?:anterior|previa)\b|\b(?:anterior|previa) decada\b'), 'decade', -1),
+    (re.compile(r'\bano (?:siguiente|proximo)\b|\b(?:siguiente|proximo) ano\b'), 'year', 1),
+    (re.compile(r'\bano (?:anterior|previo)\b|\b(?:anterior|previo) ano\b'), 'year', -1),
+]
+# Un seguimiento que nombra un tema busca sus propios indicadores
+TOPIC_PATTERN = re.compile(
+    r'\b(?:pib|producto|crecimiento|inflacion|precios|deflactor|desempleo|empleo|laboral'
+    r'|deuda|fiscal|ingresos?|gastos?|cuenta corriente|balanza|exportacion\w*|importacion\w*'
+    r'|poblacion|ahorro|inversion|per capita)\b'
+)
+# Intenciones sin palabra clave propia: un seguimiento las hereda del turno anterior
+INHERITABLE_INTENTS = ('value', 'trend', 'summary')
+
+# Indicadores recordados para el resumen (los menos recientes se descartan)
+TRACKED_INDICATORS = 8
+
+
+class ConversationMemory:
+    """Estado de una conversación con tamaño acotado
+
+    window: turnos completos que se envían al modelo (CONVERSATION_WINDOW, 3).
+    answer_chars: largo máximo de cada respuesta en la ventana.
+    summary_turns: líneas del resumen de turnos anteriores a la ventana.
+    """
+    
+    def __init__(self, window: int = None, answer_chars: int = 1200, summary_turns: int = 8):
+        self.window = max(1, window or int(os.getenv('CONVERSATION_WINDOW', '3')))
+        self.answer_chars = answer_chars
+        self.turns = deque()
+        self.summary = deque(maxlen=summary_turns)
+        self.folded = 0
+        self.indicators = OrderedDict()
+        self.last_indicators = []
+        self.last_intent = None
+        self.period = None
+        self.turn_count = 0
+        # Para serializar los turnos si la memoria se comparte entre hilos (API)
+        self.lock = threading.Lock()
+    
+    def is_follow_up(self, query: str) -> bool:
+        """La pregunta continúa la anterior (solo si hay un turno previo)"""
+        return bool(self.turns) and bool(FOLLOW_UP_PATTERN.search(normalize_text(query)))
+    
+    def rewrite(self, query: str) -> str:
+        """Pregunta con el período explícito si se refiere al del turno anterior
+
+        "¿y en la década siguiente?" después de 2000-2009 queda como
+        "¿y en la década siguiente? (2010-2019)".
+        """
+        if self.period is None or not self.is_follow_up(query):
+            return query
+        text = normalize_text(query)
+        if parse_intent(query)['years']:
+            return query
+        start, end = self.period
+        for pattern, unit, step in SHIFT_PATTERNS:
+            if pattern.search(text):
+                if unit == 'decade':
+                    start = (start // 10 + step) * 10
+                    return f"{query} ({start}-{start + 9})"
+                year = (end if step > 0 else start) + step
+                return f"{query} ({year})"
+        if 'mismo periodo' in text or start != end:
+            return f"{query} ({start}-{end})"
+        return f"{query} ({start})"
+    
+    def intent(self, query: str, topic: bool = False) -> Dict[str, Any]:
+        """Intención de la pregunta reescrita; un seguimiento sin intención propia hereda la anterior
+
+        Un seguimiento también hereda el tema (los indicadores del turno anterior).
+        """
+        question = self.rewrite(query)
+        intent = parse_intent(question, topic=topic or (bool(self.last_indicators) and self.is_follow_up(query)))
+        text = normalize_text(query)
+        own = any(pattern.search(text) for _, pattern in INTENT_PATTERNS)
+        if (self.is_follow_up(query) and not own and self.last_intent
+                and intent['intent'] in INHERITABLE_INTENTS and self.last_intent not in INHERITABLE_INTENTS):
+            intent = dict(intent, intent=self.last_intent)
+        return intent
+    
+    def indicators_for(self, query: str, resolve: Callable[[str], List[str]]) -> List[str]:
+        """Indicadores de la pregunta: los del turno anterior en un seguimiento, si no los de `resolve`"""
+        if (self.last_indicators and self.is_follow_up(query)
+                and not TOPIC_PATTERN.search(normalize_text(query))):
+            return list(self.last_indicators)
+        return resolve(query)
+    
+    def record(self, query: str, answer: str, indicator_codes: List[str], intent: Dict[str, Any] = None):
+        """Agregar un turno; los que salen de la ventana pasan al resumen"""
+        intent = intent or parse_intent(query)
+        self.turn_count += 1
+        self.turns.append({'query': query, 'answer': answer, 'indicators': list(indicator_codes),
+                           'intent': intent['intent']})
+        while len(self.turns) > self.window:
+            self.fold(self.turns.popleft())
+        
+        if indicator_codes:
+            self.last_indicators = list(indicator_codes)
+        for code in indicator_codes:
+            self.indicators[code] = self.turn_count
+            self.indicators.move_to_end(code)
+        while len(self.indicators) > TRACKED_INDICATORS:
+            self.indicators.popitem(last=False)
+        # Una pregunta abierta no deja intención para heredar
+        self.last_intent = None if OPEN_ENDED_PATTERN.search(normalize_text(query)) else intent['intent']
+        
+        if intent['ranges']:
+            self.period = intent['ranges'][-1]
+        elif intent['periods']:
+            self.period = tuple(intent['periods'][-1][1:])
+        elif intent['years']:
+            self.period = (intent['years'][0], intent['years'][-1])
+    
+    def fold(self, turn: Dict[str, Any]):
+        """Resumen de una línea de un turno que sale de la ventana"""
+        if len(self.summary) == self.summary.maxlen:
+            self.folded += 1
+        first_line = next((line.strip(' #*📊') for line in turn['answer'].splitlines() if line.strip()), '')
+        indicators = ', '.join(turn['indicators']) or 'sin indicadores'
+        self.summary.append(f"- {turn['query'][:150]} [{indicators}] → {first_line[:150]}")
+    
+    def summary_text(self) -> str:
+        if not self.summary:
+            return ''
+        older = f"(y {self.folded} turnos anteriores)\n" if self.folded else ''
+        period = f"; último período: {self.period[0]}-{self.period[1]}" if self.period else ''
+        return (f"RESUMEN DE LA CONVERSACIÓN PREVIA (indicadores: {', '.join(self.indicators)}{period}):\n"
+                f"{older}{chr(10).join(self.summary)}")
+    
+    def messages(self) -> List[Dict[str, str]]:
+        """Historial para el modelo (alternando usuario/asistente), de tamaño acotado
+
+        El resumen va al inicio del primer mensaje del usuario para no
+        alterar el system prompt, que se cachea.
+        """
+        messages = []
+        summary = self.summary_text()
+        for turn in self.turns:
+            content = turn['query']
+            if summary and not messages:
+                content = f"{summary}\n\n{content}"
+            answer = turn['answer']
+            if len(answer) > self.answer_chars:
+                answer = answer[:self.answer_chars].rsplit(' ', 1)[0] + ' […]'
+            messages.append({'role': 'user', 'content': content})
+            messages.append({'role': 'assistant', 'content': answer})
+        return messages
+    
+    def digest(self) -> str:
+        """Huella del estado (para la clave de caché de preguntas de seguimiento)"""
+        raw = '\n'.join([self.summary_text()] + [turn['query'] for turn in self.turns])
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=8).hexdigest()
+    
+    def clear(self):
+        self.turns.clear()
+        self.summary.clear()
+        self.indicators.clear()
+        self.folded = self.turn_count = 0
+        self.last_indicators, self.last_intent, self.period = [], None, None
@@ -0,0 +1,322 @@
+"""Indicadores derivados: expresiones vectorizadas sobre la matriz de series
+
+Una expresión combina códigos WEO con aritmética y transformaciones
+temporales, por ejemplo ``NGDP / NGDP_R * 100``, ``yoy(LP)`` o
+``rolling(PCPIPCH, 5)``. Cada código se evalúa como una matriz
+(países x años), así que una expresión se calcula para todos los países
+con operaciones de arreglo completo, sin recorrer diccionarios.
+"""
+
+import ast
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+import numpy as np
+
+from . import metrics
+from .notify import get_notifier
+from .processing import NO_ESTIMATES, EcuadorWEOProcessor
+
+
+def lag(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Desplazar cada fila `periods` años hacia adelante (NaN al inicio)"""
+    periods = int(periods)
+    result = np.full(x.shape, np.nan)
+    if periods < x.shape[1]:
+        result[:, periods:] = x[:, :x.shape[1] - periods]
+    return result
+
+
+def diff(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    return x - lag(x, periods)
+
+
+def yoy(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Variación porcentual respecto de `periods` años antes"""
+    return (x / lag(x, periods) - 1) * 100
+
+
+def log(x: np.ndarray) -> np.ndarray:
+    return np.log(np.where(x > 0, x, np.nan))
+
+
+def logdiff(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Diferencia logarítmica (x100), aproximación de la variación porcentual"""
+    return (log(x) - log(lag(x, periods))) * 100
+
+
+def rolling(x: np.ndarray, window: int) -> np.ndarray:
+    """Media móvil de `window` años; NaN si la ventana no está completa"""
+    window = int(window)
+    if window < 1:
+        raise ValueError("La ventana debe ser de al menos 1 año")
+    valid = ~np.isnan(x)
+    counts = np.zeros((x.shape[0], x.shape[1] + 1))
+    sums = np.zeros((x.shape[0], x.shape[1] + 1))
+    counts[:, 1:] = np.cumsum(valid, axis=1)
+    sums[:, 1:] = np.cumsum(np.where(valid, x, 0.0), axis=1)
+    
+    result = np.full(x.shape, np.nan)
+    if window <= x.shape[1]:
+        n = counts[:, window:] - counts[:, :-window]
+        total = sums[:, window:] - sums[:, :-window]
+        result[:, window - 1:] = np.where(n == window, total / window, np.nan)
+    return result
+
+
+def cagr(x: np.ndarray, periods: int) -> np.ndarray:
+    """Tasa de crecimiento anual compuesta de los últimos `periods` años (%)"""
+    periods = int(periods)
+    if periods < 1:
+        raise ValueError("El período de la CAGR debe ser de al menos 1 año")
+    ratio = x / lag(x, periods)
+    return (np.power(np.where(ratio > 0, ratio, np.nan), 1 / periods) - 1) * 100
+
+
+DERIVED_FUNCTIONS = {
+    'lag': lag,
+    'diff': diff,
+    'yoy': yoy,
+    'log': log,
+    'logdiff': logdiff,
+    'rolling': rolling,
+    'cagr': cagr,
+    'abs': np.abs,
+}
+
+BINARY_OPERATORS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+    ast.Pow: np.power,
+}
+
+
+class DerivedIndicatorEngine:
+    """Evalúa expresiones sobre el almacén y las registra como indicadores
+
+    Los resultados se cachean por expresión normalizada y por la versión
+    de los indicadores que usa, así que una misma fórmula no se recalcula
+    mientras sus datos no cambien. Los indicadores registrados se agregan
+    al procesador para todos los países y se consultan igual que un
+    código WEO (gráfico, estadísticas, exportación y asistente).
+    """
+    
+    def __init__(self, weo_processor: EcuadorWEOProcessor, max_cached: int = 256):
+        self.weo_processor = weo_processor
+        self.max_cached = max_cached
+        self.definitions = {}
+        self._results = OrderedDict()
+        self._operand_rows = {}
+        self._pending = {}
+        self._pending_boundaries = {}
+        self.hits = 0
+        self.misses = 0
+        self.refresh_axes()
+    
+    def refresh_axes(self):
+        """Recalcular el eje de países después de cambiar el almacén"""
+        processor = self.weo_processor
+        self.isos = list(dict.fromkeys(info.get('iso') for info in processor.series_info))
+        self.countries = {info.get('iso'): info.get('country', '') for info in processor.series_info}
+        self.known_codes = {info['code'] for info in processor.series_info}
+        self._operand_rows = {}
+    
+    def parse(self, expression: str) -> ast.AST:
+        """Validar la expresión contra la lista blanca de nodos y funciones"""
+        try:
+            tree = ast.parse(expression.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Expresión inválida: {expression} ({e.msg})")
+        
+        calls = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in DERIVED_FUNCTIONS:
+                    raise ValueError(f"Función no permitida en {expression}")
+                if node.keywords:
+                    raise ValueError(f"Use argumentos posicionales en {expression}")
+            elif isinstance(node, ast.Name) and id(node) not in calls:
+                if node.id not in self.known_codes and node.id not in self._pending:
+                    raise ValueError(f"Indicador desconocido: {node.id}")
+            elif isinstance(node, ast.Constant):
+                if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+                    raise ValueError(f"Constante no numérica en {expression}")
+            elif isinstance(node, ast.BinOp):
+                if type(node.op) not in BINARY_OPERATORS:
+                    raise ValueError(f"Operador no permitido en {expression}")
+            elif isinstance(node, ast.UnaryOp):
+                if not isinstance(node.op, (ast.USub, ast.UAdd)):
+                    raise ValueError(f"Operador no permitido en {expression}")
+            elif not isinstance(node, (ast.Expression, ast.Name, ast.Load, ast.operator, ast.unaryop)):
+                raise ValueError(f"Sintaxis no permitida en {expression}: {type(node).__name__}")
+        return tree
+    
+    @staticmethod
+    def referenced_codes(tree: ast.AST) -> List[str]:
+        calls = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+        return sorted({node.id for node in ast.walk(tree)
+                       if isinstance(node, ast.Name) and id(node) not in calls})
+    
+    def operand_rows(self, code: str) -> np.ndarray:
+        """Fila de cada país (orden de self.isos) para un código, -1 si no la tiene"""
+        rows = self._operand_rows.get(code)
+        if rows is None:
+            series_index = self.weo_processor.series_index
+            rows = np.array([series_index.get((iso, code), -1) for iso in self.isos], dtype=np.int64)
+            self._operand_rows[code] = rows
+        return rows
+    
+    def operand(self, code: str) -> np.ndarray:
+        """Matriz (países x años) de un código, NaN donde el país no lo tiene"""
+        if code in self._pending:
+            return self._pending[code]
+        rows = self.operand_rows(code)
+        
+        values = self.weo_processor.values
+        result = np.full((len(rows), values.shape[1]), np.nan)
+        present = rows >= 0
+        result[present] = values[rows[present]]
+        return result
+    
+    def estimates_start(self, expression: str) -> np.ndarray:
+        """Último año observado de la expresión por país: el menor entre sus operandos"""
+        boundaries = np.full(len(self.isos), NO_ESTIMATES, dtype=np.int64)
+        for code in self.referenced_codes(self.parse(expression)):
+            if code in self._pending_boundaries:
+                operand = self._pending_boundaries[code]
+            else:
+                rows = self.operand_rows(code)
+                operand = np.where(rows >= 0, self.weo_processor.estimates_start[rows], NO_ESTIMATES)
+            boundaries = np.minimum(boundaries, operand)
+        return boundaries
+    
+    def _evaluate_node(self, node: ast.AST):
+        if isinstance(node, ast.Expression):
+            return self._evaluate_node(node.body)
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name):
+            return self.operand(node.id)
+        if isinstance(node, ast.UnaryOp):
+            value = self._evaluate_node(node.operand)
+            return -value if isinstance(node.op, ast.USub) else value
+        if isinstance(node, ast.BinOp):
+            return BINARY_OPERATORS[type(node.op)](self._evaluate_node(node.left),
+                                                   self._evaluate_node(node.right))
+        # ast.Call (validado en parse)
+        args = [self._evaluate_node(arg) for arg in node.args]
+        return DERIVED_FUNCTIONS[node.func.id](*args)
+    
+    def evaluate(self, expression: str) -> np.ndarray:
+        """Evaluar una expresión para todos los países (filas en el orden de self.isos)"""
+        tree = self.parse(expression)
+        versions = self.weo_processor.indicator_versions
+        key = (ast.dump(tree), tuple((code, versions.get(code, 0))
+                                     for code in self.referenced_codes(tree)))
+        
+        # Los operandos recién evaluados en el mismo lote aún no cambiaron de versión
+        pending = any(code in self._pending for code, _ in key[1])
+        cached = None if pending else self._results.get(key)
+        if cached is not None:
+            self._results.move_to_end(key)
+            self.hits += 1
+            metrics.increment('cache_requests', cache='derived', result='hit')
+            return cached
+        self.misses += 1
+        metrics.increment('cache_requests', cache='derived', result='miss')
+        
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result = np.asarray(self._evaluate_node(tree), dtype=np.float64)
+        result = np.broadcast_to(result, (len(self.isos), len(self.weo_processor.years))).copy()
+        result[~np.isfinite(result)] = np.nan
+        result.flags.writeable = False
+        
+        if not pending:
+            self._results[key] = result
+        while len(self._results) > self.max_cached:
+            self._results.popitem(last=False)
+        return result
+    
+    def evaluate_series(self, expression: str, iso: str = None) -> np.ndarray:
+        """Serie de un país (por defecto el del procesador)"""
+        iso = iso or self.weo_processor.country
+        if iso not in self.isos:
+            iso = self.isos[0] if self.isos else None
+        return self.evaluate(expression)[self.isos.index(iso)]
+    
+    def register(self, code: str, expression: str, name: str = None, units: str = '',
+                 description: str = ''):
+        """Registrar un indicador derivado (un solo código)"""
+        self.register_many({code: {'expression': expression, 'name': name,
+                                   'units': units, 'description': description}})
+    
+    def register_many(self, definitions: Dict[str, Dict[str, Any]], skip_invalid: bool = False) -> List[str]:
+        """Evaluar y agregar varios indicadores derivados al almacén en una sola reconstrucción"""
+        series, blocks, registered = [], [], []
+        self._pending = {}
+        self._pending_boundaries = {}
+        for code, definition in definitions.items():
+            if code in self.known_codes and code not in self.definitions:
+                raise ValueError(f"{code} ya existe como indicador WEO")
+            try:
+                matrix = self.evaluate(definition['expression'])
+            except ValueError as e:
+                if not skip_invalid:
+                    raise
+                get_notifier().warning(f"Indicador derivado {code} omitido: {e}")
+                continue
+            
+            description = definition.get('description') or ''
+            formula = f"Fórmula: {definition['expression']}"
+            keep = ~np.isnan(matrix).all(axis=1)
+            boundaries = self.estimates_start(definition['expression'])
+            for iso, present, boundary in zip(self.isos, keep, boundaries.tolist()):
+                if present:
+                    series.append({
+                        'code': code,
+                        'name': definition.get('name') or code,
+                        'description': f"{description}. {formula}" if description else formula,
+                        'units': definition.get('units') or '',
+                        'scale': 'Units',
+                        'notes': '',
+                        'iso': iso,
+                        'country': self.countries.get(iso, ''),
+                        'estimates_start': boundary if boundary != NO_ESTIMATES else None
+                    })
+            blocks.append(matrix[keep])
+            self._pending[code] = matrix
+            self._pending_boundaries[code] = boundaries
+            self.definitions[code] = dict(definition)
+            registered.append(code)
+        
+        self._pending = {}
+        self._pending_boundaries = {}
+        if registered:
+            self.weo_processor.add_series(series, np.vstack(blocks), replace=registered)
+            self.refresh_axes()
+        return registered
+    
+    def refresh(self, codes: List[str] = None) -> List[str]:
+        """Recalcular los derivados registrados (p. ej. tras update_indicator)
+
+        Con `codes` solo los que dependen de esos indicadores, directa o
+        indirectamente.
+        """
+        if codes is None:
+            return self.register_many(dict(self.definitions))
+        changed = set(codes)
+        references = {code: set(self.referenced_codes(self.parse(definition['expression'])))
+                      for code, definition in self.definitions.items()}
+        grew = True
+        while grew:
+            dependents = {code for code, used in references.items() if used & changed} - changed
+            changed |= dependents
+            grew = bool(dependents)
+        stale = {code: definition for code, definition in self.definitions.items() if code in changed}
+        return self.register_many(stale) if stale else []
+    
+    def stats(self) -> Dict[str, Any]:
+        return {'hits': self.hits, 'misses': self.misses, 'cached': len(self._results),
+                'registered': sorted(self.definitions)}
@@ -0,0 +1,234 @@
+"""Descarga en Excel y exportación masiva multi-formato"""
+
+import io
+import json
+import math
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+from .caching import RenderCache, render_key
+from .notify import get_notifier
+from .processing import EcuadorWEOProcessor
+
+
+def create_excel_download(indicator_code: str, weo_processor: EcuadorWEOProcessor, start_year: int, end_year: int,
+                          render_cache: RenderCache = None):
+    """Crear archivo Excel para descarga"""
+    if render_cache is not None:
+        key = render_key('excel', indicator_code, weo_processor, start_year, end_year)
+        return render_cache.get_or_create(
+            key, lambda: build_excel_download(indicator_code, weo_processor, start_year, end_year)
+        )
+    return build_excel_download(indicator_code, weo_processor, start_year, end_year)
+
+
+@metrics.timed('export', format='xlsx', scope='indicator')
+def build_excel_download(indicator_code: str, weo_processor: EcuadorWEOProcessor, start_year: int, end_year: int):
+    """Generar los bytes del Excel de un indicador (None si no hay datos)"""
+    try:
+        data = weo_processor.get_indicator_data(indicator_code, start_year, end_year)
+        if not data:
+            return None
+        
+        # Crear DataFrame para Excel
+        view = data['data']
+        valid = ~np.isnan(view.array)
+        df = pd.DataFrame({'Año': view.years[valid], 'Valor': view.array[valid]})
+        df['Tipo'] = np.where(data['estimate_mask'][valid], 'Previsión', 'Observado')
+        df['Indicador'] = data['info']['name']
+        df['Código'] = indicator_code
+        df['Unidades'] = data['info']['units']
+        
+        # Convertir a Excel en memoria
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            df.to_excel(writer, sheet_name='Datos', index=False)
+            
+            # Agregar información adicional
+            info_df = pd.DataFrame([
+                ['Indicador', data['info']['name']],
+                ['Código WEO', indicator_code],
+                ['Descripción', data['info']['description'][:200] + '...'],
+                ['Unidades', data['info']['units']],
+                ['Período', f"{start_year}-{end_year}"],
+                ['Fuente', 'FMI World Economic Outlook'],
+                ['Fecha de descarga', datetime.now().strftime('%Y-%m-%d %H:%M')]
+            ], columns=['Campo', 'Valor'])
+            
+            info_df.to_excel(writer, sheet_name='Metadatos', index=False)
+        
+        return output.getvalue()
+        
+    except Exception as e:
+        get_notifier().error(f"Error generando Excel: {e}")
+        return None
+
+# Formatos de exportación masiva: extensión y tipo MIME
+EXPORT_FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'xlsx': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'json': ('.json', 'application/json')
+}
+EXPORT_ID_COLUMNS = ['ISO', 'País', 'Código', 'Indicador', 'Unidades', 'Escala', 'Último año observado']
+
+
+def select_export_rows(weo_processor: EcuadorWEOProcessor, indicator_codes: List[str] = None,
+                       countries: List[str] = None) -> np.ndarray:
+    """Filas de la matriz a exportar (países: None = país de análisis, ['*'] = todos)"""
+    series = weo_processor.series_info
+    codes = np.array([info['code'] for info in series], dtype=str)
+    isos = np.array([info.get('iso') or '' for info in series], dtype=str)
+    
+    mask = np.ones(len(series), dtype=bool)
+    if indicator_codes:
+        mask &= np.isin(codes, list(indicator_codes))
+    if countries is None:
+        mask &= np.isin(isos, [weo_processor.country, ''])
+    elif '*' not in countries:
+        mask &= np.isin(isos, list(countries))
+    return np.flatnonzero(mask)
+
+
+def iter_export_chunks(weo_processor: EcuadorWEOProcessor, rows: np.ndarray, start_year: int = None,
+                       end_year: int = None, chunk_rows: int = 2000) -> Iterator[pd.DataFrame]:
+    """Bloques en formato ancho (una fila por serie, una columna por año)"""
+    columns = weo_processor.year_slice(start_year, end_year)
+    year_labels = [str(year) for year in weo_processor.years[columns]]
+    if not len(rows):
+        yield pd.DataFrame(columns=EXPORT_ID_COLUMNS + year_labels)
+    for offset in range(0, len(rows), chunk_rows):
+        chunk = rows[offset:offset + chunk_rows]
+        infos = [weo_processor.series_info[idx] for idx in chunk]
+        frame = pd.DataFrame({
+            'ISO': [info.get('iso') or '' for info in infos],
+            'País': [info.get('country') or '' for info in infos],
+            'Código': [info['code'] for info in infos],
+            'Indicador': [info['name'] for info in infos],
+            'Unidades': [info['units'] for info in infos],
+            'Escala': [info['scale'] for info in infos],
+            'Último año observado': pd.array([info.get('estimates_start') for info in infos], dtype='Int64')
+        })
+        values = pd.DataFrame(np.asarray(weo_processor.values[chunk, columns]), columns=year_labels)
+        yield pd.concat([frame, values], axis=1)
+
+
+def export_metadata(weo_processor: EcuadorWEOProcessor, rows: np.ndarray,
+                    start_year: int = None, end_year: int = None) -> Dict[str, Any]:
+    """Metadatos de la exportación: indicadores incluidos, período y fuente"""
+    codes = sorted({weo_processor.series_info[idx]['code'] for idx in rows})
+    columns = weo_processor.year_slice(start_year, end_year)
+    years = weo_processor.years[columns]
+    subjects = {}
+    for info in weo_processor.series_info:
+        if info['code'] in codes and info['code'] not in subjects:
+            subjects[info['code']] = {key: info.get(key, '') for key in ('name', 'description', 'units', 'scale')}
+    return {
+        'source': 'FMI World Economic Outlook',
+        'vintage': weo_processor.vintage,
+        'period': f"{years[0]}-{years[-1]}" if len(years) else '',
+        'series': int(len(rows)),
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M'),
+        'indicators': subjects
+    }
+
+
+def export_indicators(weo_processor: EcuadorWEOProcessor, destination, fmt: str = 'csv',
+                      indicator_codes: List[str] = None, countries: List[str] = None,
+                      start_year: int = None, end_year: int = None, chunk_rows: int = 2000,
+                      metadata_destination=None) -> Dict[str, Any]:
+    """Exportar varios indicadores (y países) a un solo archivo en formato ancho
+
+    Escribe por bloques de chunk_rows series para que la memoria no crezca
+    con el tamaño de la exportación. destination puede ser una ruta o un
+    archivo binario. Los metadatos van a una hoja 'Metadatos' en Excel y,
+    en los demás formatos, a metadata_destination (por defecto
+    '<ruta>.metadata.json' si destination es una ruta).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    
+    with metrics.span('export', format=fmt, scope='bulk'):
+        rows = select_export_rows(weo_processor, indicator_codes, countries)
+        metadata = export_metadata(weo_processor, rows, start_year, end_year)
+        chunks = iter_export_chunks(weo_processor, rows, start_year, end_year, chunk_rows)
+        
+        owns_handle = isinstance(destination, (str, os.PathLike))
+        handle = open(destination, 'wb') if owns_handle else destination
+        try:
+            if fmt == 'csv':
+                text = io.TextIOWrapper(handle, encoding='utf-8', newline='')
+                for index, chunk in enumerate(chunks):
+                    chunk.to_csv(text, index=False, header=index == 0)
+                text.flush()
+                text.detach()
+            
+            elif fmt == 'json':
+                text = io.TextIOWrapper(handle, encoding='utf-8')
+                text.write('[')
+                for index, chunk in enumerate(chunks):
+                    records = chunk.to_json(orient='records', force_ascii=False)[1:-1]
+                    if records:
+                        text.write((',' if index else '') + records)
+                text.write(']')
+                text.flush()
+                text.detach()
+            
+            elif fmt == 'parquet':
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                writer = None
+                for chunk in chunks:
+                    batch = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(handle, batch.schema)
+                    writer.write_table(batch)
+                if writer is not None:
+                    writer.close()
+            
+            elif fmt == 'xlsx':
+                import xlsxwriter
+                workbook = xlsxwriter.Workbook(handle, {'constant_memory': True, 'nan_inf_to_errors': False})
+                sheet = workbook.add_worksheet('Datos')
+                row_number = 0
+                for chunk in chunks:
+                    if row_number == 0:
+                        sheet.write_row(0, 0, list(chunk.columns))
+                        row_number = 1
+                    for record in chunk.itertuples(index=False):
+                        sheet.write_row(row_number, 0, [None if value is pd.NA or isinstance(value, float) and math.isnan(value)
+                                                        else value for value in record])
+                        row_number += 1
+                info_sheet = workbook.add_worksheet('Metadatos')
+                info_rows = [['Campo', 'Valor'], ['Fuente', metadata['source']], ['Edición', metadata['vintage']],
+                             ['Período', metadata['period']], ['Series', metadata['series']],
+                             ['Fecha de descarga', metadata['generated_at']],
+                             [], ['Código', 'Indicador', 'Unidades', 'Escala', 'Descripción']]
+                info_rows += [[code, info['name'], info['units'], info['scale'], info['description'][:500]]
+                              for code, info in metadata['indicators'].items()]
+                for number, values in enumerate(info_rows):
+                    info_sheet.write_row(number, 0, values)
+                workbook.close()
+        finally:
+            if owns_handle:
+                handle.close()
+        
+        # Metadatos en archivo aparte para los formatos sin hojas
+        if fmt != 'xlsx':
+            if metadata_destination is None and owns_handle:
+                metadata_destination = f"{destination}.metadata.json"
+            if metadata_destination is not None:
+                payload = json.dumps(metadata, ensure_ascii=False, indent=2)
+                if isinstance(metadata_destination, (str, os.PathLike)):
+                    with open(metadata_destination, 'w', encoding='utf-8') as meta_file:
+                        meta_file.write(payload)
+                else:
+                    metadata_destination.write(payload.encode('utf-8'))
+        
+        return {'format': fmt, 'series': int(len(rows)), 'period': metadata['period'],
+                'metadata': metadata_destination if isinstance(metadata_destination, (str, os.PathLike)) else None}
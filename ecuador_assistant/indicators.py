@@ -0,0 +1,127 @@
+"""Catálogo de indicadores macroeconómicos principales"""
+
+
+# Indicadores macroeconómicos principales
+MACRO_INDICATORS = {
+    'NGDP_RPCH': {
+        'name': 'Crecimiento del PIB Real',
+        'category': 'Actividad Económica',
+        'icon': '📈'
+    },
+    'NGDP': {
+        'name': 'PIB Nominal (Miles de millones USD)',
+        'category': 'Actividad Económica', 
+        'icon': '💰'
+    },
+    'NGDPDPC': {
+        'name': 'PIB per cápita (USD)',
+        'category': 'Actividad Económica',
+        'icon': '👤'
+    },
+    'PCPIPCH': {
+        'name': 'Inflación (Variación % anual)',
+        'category': 'Precios y Estabilidad',
+        'icon': '📊'
+    },
+    'LUR': {
+        'name': 'Tasa de Desempleo (%)',
+        'category': 'Mercado Laboral',
+        'icon': '👥'
+    },
+    'BCA_NGDPD': {
+        'name': 'Cuenta Corriente (% del PIB)',
+        'category': 'Sector Externo',
+        'icon': '🌍'
+    },
+    'GGXWDG_NGDP': {
+        'name': 'Deuda Pública (% del PIB)',
+        'category': 'Finanzas Públicas',
+        'icon': '🏛️'
+    },
+    'GGXCNL_NGDP': {
+        'name': 'Balance Fiscal (% del PIB)',
+        'category': 'Finanzas Públicas',
+        'icon': '⚖️'
+    },
+    'TX_RPCH': {
+        'name': 'Crecimiento Exportaciones (%)',
+        'category': 'Comercio Exterior',
+        'icon': '📤'
+    },
+    'TM_RPCH': {
+        'name': 'Crecimiento Importaciones (%)',
+        'category': 'Comercio Exterior',
+        'icon': '📥'
+    },
+    'LP': {
+        'name': 'Población (Millones)',
+        'category': 'Demografía',
+        'icon': '🏘️'
+    }
+}
+
+# Indicadores derivados (expresiones sobre los códigos WEO, ver derived.py);
+# aliases se indexan para la recuperación y topic reconoce (sobre el texto
+# normalizado) las preguntas que nombran al derivado
+DERIVED_INDICATORS = {
+    'NGDP_DEFL': {
+        'expression': 'NGDP / NGDP_R * 100',
+        'name': 'Deflactor implícito del PIB (índice)',
+        'units': 'Index',
+        'description': 'PIB nominal sobre PIB real, base = año base de las cuentas nacionales',
+        'aliases': 'deflactor implicito indice de precios del pib',
+        'topic': r'\bdeflactor',
+        'category': 'Precios y Estabilidad',
+        'icon': '🧮'
+    },
+    'NGDP_DEFL_PCH': {
+        'expression': 'yoy(NGDP / NGDP_R)',
+        'name': 'Inflación del deflactor del PIB (%)',
+        'units': 'Percent change',
+        'description': 'Variación anual de los precios implícitos del PIB',
+        'aliases': 'deflactor implicito variacion de precios del pib',
+        'topic': r'\bdeflactor',
+        'category': 'Precios y Estabilidad',
+        'icon': '🧮'
+    },
+    'PCPIPCH_MA5': {
+        'expression': 'rolling(PCPIPCH, 5)',
+        'name': 'Inflación promedio móvil 5 años (%)',
+        'units': 'Percent change',
+        'description': 'Promedio de la inflación de los últimos cinco años',
+        'aliases': 'inflacion promedio movil cinco anos suavizada',
+        'topic': r'\bpromedio movil\b|\bsuaviz',
+        'category': 'Precios y Estabilidad',
+        'icon': '📉'
+    },
+    'NGDP_R_CAGR5': {
+        'expression': 'cagr(NGDP_R, 5)',
+        'name': 'Crecimiento real compuesto a 5 años (%)',
+        'units': 'Percent change',
+        'description': 'Tasa anual compuesta de crecimiento del PIB real en los últimos cinco años',
+        'aliases': 'crecimiento compuesto cagr cinco anos pib real',
+        'topic': r'\bcompuest|\bcagr\b',
+        'category': 'Actividad Económica',
+        'icon': '📈'
+    },
+    'NGDPD_PC': {
+        'expression': 'NGDPD / LP * 1000',
+        'name': 'PIB per cápita calculado (USD)',
+        'units': 'U.S. dollars',
+        'description': 'PIB en dólares (miles de millones) sobre población (millones)',
+        'aliases': 'pib per capita calculado dolares por habitante',
+        'topic': r'\bper ?capita\b|\bpor habitante\b',
+        'category': 'Actividad Económica',
+        'icon': '👤'
+    },
+    'LP_PCH': {
+        'expression': 'yoy(LP)',
+        'name': 'Crecimiento de la población (%)',
+        'units': 'Percent change',
+        'description': 'Variación anual de la población',
+        'aliases': 'crecimiento poblacional variacion de la poblacion demografia',
+        'topic': r'\bcrecimiento (?:de la )?poblac|\bpoblacional\b',
+        'category': 'Demografía',
+        'icon': '👨‍👩‍👧'
+    }
+}
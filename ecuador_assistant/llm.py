@@ -0,0 +1,222 @@
+"""Gateway asíncrono compartido hacia la API de Claude
+
+El SDK de anthropic se importa al crear el primer gateway.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+from typing import Any, Dict, Iterator
+
+from . import metrics
+
+
+class _GatewayStream:
+    """Stream síncrono sobre el gateway (misma interfaz que messages.stream del SDK)"""
+    
+    def __init__(self, gateway, request: Dict[str, Any]):
+        self.gateway = gateway
+        self.request = request
+        self.final_message = None
+        self._events = queue.Queue()
+        self._future = None
+    
+    def __enter__(self):
+        self._future = asyncio.run_coroutine_threadsafe(self._pump(), self.gateway.loop)
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self._future is not None and not self._future.done():
+            self._future.cancel()
+        return False
+    
+    async def _pump(self):
+        try:
+            async for text in self.gateway.astream(self.request, self):
+                self._events.put(('text', text))
+            self._events.put(('done', None))
+        except Exception as e:
+            self._events.put(('error', e))
+    
+    @property
+    def text_stream(self) -> Iterator[str]:
+        while True:
+            kind, payload = self._events.get()
+            if kind == 'text':
+                yield payload
+            elif kind == 'error':
+                raise payload
+            else:
+                return
+    
+    def get_final_message(self):
+        return self.final_message
+
+
+class _GatewayMessages:
+    """Interfaz messages.create / messages.stream compatible con el cliente síncrono"""
+    
+    def __init__(self, gateway):
+        self.gateway = gateway
+    
+    def create(self, **request):
+        future = asyncio.run_coroutine_threadsafe(self.gateway.acreate(request), self.gateway.loop)
+        try:
+            return future.result(timeout=self.gateway.timeout * (self.gateway.max_retries + 1))
+        except concurrent.futures.TimeoutError:
+            # Una solicitud abandonada no debe seguir ocupando el semáforo
+            future.cancel()
+            raise
+    
+    def stream(self, **request) -> _GatewayStream:
+        return _GatewayStream(self.gateway, request)
+
+
+class LLMGateway:
+    """Cliente asíncrono de Claude compartido por todas las sesiones del proceso
+
+    Un solo pool HTTP y un event loop en un hilo propio; un semáforo
+    limita las solicitudes en vuelo, los 429/5xx se reintentan con
+    backoff exponencial con jitter (respetando retry-after) y las
+    solicitudes idénticas en vuelo comparten una sola llamada. base_url
+    (o ANTHROPIC_BASE_URL) permite apuntarlo a un servidor local de prueba.
+    """
+    
+    RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+    
+    def __init__(self, api_key: str, base_url: str = None, max_concurrency: int = None,
+                 max_retries: int = None, timeout: float = None,
+                 backoff_base: float = 0.5, backoff_cap: float = 20.0):
+        self.max_concurrency = max_concurrency or int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('LLM_MAX_RETRIES', '4'))
+        self.timeout = timeout or float(os.getenv('LLM_TIMEOUT', '60'))
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='llm-gateway', daemon=True)
+        self._thread.start()
+        
+        # Un solo cliente = un solo pool de conexiones keep-alive; el semáforo
+        # acota cuántas se usan a la vez. Los reintentos los maneja el gateway.
+        import anthropic
+        
+        async def setup():
+            self.client = anthropic.AsyncAnthropic(api_key=api_key, base_url=base_url,
+                                                   max_retries=0, timeout=self.timeout)
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        asyncio.run_coroutine_threadsafe(setup(), self.loop).result()
+        self._inflight = {}
+        self.messages = _GatewayMessages(self)
+        self.stats = {'requests': 0, 'deduplicated': 0, 'retries': 0, 'errors': 0}
+    
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                pass
+        # Full jitter: evita que todos los clientes reintenten a la vez
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+    
+    def _is_retryable(self, error: Exception) -> bool:
+        import anthropic
+        
+        if isinstance(error, (anthropic.APIConnectionError, anthropic.APITimeoutError)):
+            return True
+        return isinstance(error, anthropic.APIStatusError) and error.status_code in self.RETRYABLE_STATUS
+    
+    async def _create_with_retries(self, request: Dict[str, Any]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.semaphore:
+                    return await self.client.messages.create(**request)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    self.stats['errors'] += 1
+                    metrics.increment('llm_errors')
+                    raise
+                self.stats['retries'] += 1
+                metrics.increment('llm_retries')
+                await asyncio.sleep(self._retry_delay(attempt, e))
+    
+    async def acreate(self, request: Dict[str, Any]):
+        """messages.create con límite de concurrencia, reintentos y deduplicación"""
+        self.stats['requests'] += 1
+        key = hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        entry = self._inflight.get(key)
+        if entry is None:
+            entry = {'task': asyncio.ensure_future(self._create_with_retries(request)), 'waiters': 0}
+            self._inflight[key] = entry
+            entry['task'].add_done_callback(lambda _: self._release(key, entry))
+        else:
+            self.stats['deduplicated'] += 1
+            metrics.increment('llm_deduplicated')
+        entry['waiters'] += 1
+        try:
+            return await asyncio.shield(entry['task'])
+        except asyncio.CancelledError:
+            # Si nadie más la espera, la llamada compartida se cancela y libera su cupo
+            if entry['waiters'] == 1:
+                entry['task'].cancel()
+                self._release(key, entry)
+            raise
+        finally:
+            entry['waiters'] -= 1
+    
+    def _release(self, key: str, entry: Dict[str, Any]):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+    
+    async def astream(self, request: Dict[str, Any], holder: _GatewayStream = None):
+        """Texto en streaming; solo se reintenta si aún no llegó ningún token"""
+        self.stats['requests'] += 1
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                async with self.semaphore:
+                    async with self.client.messages.stream(**request) as stream:
+                        async for text in stream.text_stream:
+                            started = True
+                            yield text
+                        if holder is not None:
+                            holder.final_message = await stream.get_final_message()
+                return
+            except Exception as e:
+                if started or attempt >= self.max_retries or not self._is_retryable(e):
+                    self.stats['errors'] += 1
+                    metrics.increment('llm_errors')
+                    raise
+                self.stats['retries'] += 1
+                metrics.increment('llm_retries')
+                await asyncio.sleep(self._retry_delay(attempt, e))
+    
+    def close(self):
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.client.close(), self.loop).result(timeout=5)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_LLM_GATEWAYS = {}
+_LLM_GATEWAYS_LOCK = threading.Lock()
+
+
+def get_llm_gateway(api_key: str, base_url: str = None) -> LLMGateway:
+    """Gateway único por proceso (y por API key / base_url)"""
+    base_url = base_url or os.getenv('ANTHROPIC_BASE_URL')
+    with _LLM_GATEWAYS_LOCK:
+        gateway = _LLM_GATEWAYS.get((api_key, base_url))
+        if gateway is None:
+            gateway = LLMGateway(api_key, base_url=base_url)
+            _LLM_GATEWAYS[(api_key, base_url)] = gateway
+            atexit.register(gateway.close)
+        return gateway
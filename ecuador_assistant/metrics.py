@@ -0,0 +1,240 @@
+"""Instrumentación: spans de tiempo y contadores, exportables como Prometheus o JSON lines
+
+Desactivada por defecto; METRICS_ENABLED=1 (o enable()) la activa.
+Desactivada, span() devuelve un contexto compartido que no hace nada e
+increment() retorna de inmediato, así que la instrumentación puede
+quedar en las rutas críticas. Con METRICS_JSONL=/ruta cada evento se
+agrega además a un archivo JSON lines.
+
+    with span('process_data'):
+        ...
+    increment('cache_requests', cache='response', result='hit')
+"""
+
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+# Límites (segundos) de los buckets del histograma de latencias
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _NullSpan:
+    """Span de la instrumentación desactivada (una sola instancia compartida)"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    def set(self, **labels):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, registry, name: str, labels: Dict[str, Any]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.labels['status'] = 'error' if exc_type else 'ok'
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+    
+    def set(self, **labels):
+        """Agregar etiquetas conocidas recién dentro del span (p. ej. el resultado)"""
+        self.labels.update(labels)
+
+
+class MetricsRegistry:
+    """Contadores e histogramas de latencia por (nombre, etiquetas)"""
+    
+    def __init__(self, enabled: bool = False, jsonl_path: str = None,
+                 buckets: tuple = LATENCY_BUCKETS, prefix: str = 'ecuador_assistant'):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._jsonl = None
+    
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> tuple:
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+    
+    def span(self, name: str, **labels):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, labels)
+    
+    def increment(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        if self.jsonl_path:
+            self._emit({'type': 'counter', 'name': name, 'value': value, 'labels': labels})
+    
+    def observe(self, name: str, seconds: float, **labels):
+        """Registrar una duración en el histograma del span `name`"""
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        bucket = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][bucket] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+        if self.jsonl_path:
+            self._emit({'type': 'span', 'name': name, 'duration_ms': seconds * 1000, 'labels': labels})
+    
+    def _emit(self, event: Dict[str, Any]):
+        event['ts'] = time.time()
+        line = json.dumps(event, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            if self._jsonl is None:
+                self._jsonl = open(self.jsonl_path, 'a', encoding='utf-8', buffering=1)
+            self._jsonl.write(line)
+    
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Estado actual: contadores y resumen de cada span"""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            spans = [
+                {'name': name, 'labels': dict(labels), 'count': count, 'sum_seconds': total,
+                 'buckets': dict(zip([*map(str, self.buckets), '+Inf'], counts))}
+                for (name, labels), (counts, total, count) in sorted(self._histograms.items())
+            ]
+        return {'counters': counters, 'spans': spans}
+    
+    def json_lines(self) -> str:
+        """Snapshot como JSON lines (un contador o span por línea)"""
+        snapshot = self.snapshot()
+        lines = [json.dumps({'type': 'counter', **counter}, ensure_ascii=False) for counter in snapshot['counters']]
+        lines += [json.dumps({'type': 'span', **span}, ensure_ascii=False) for span in snapshot['spans']]
+        return ''.join(line + '\n' for line in lines)
+    
+    @staticmethod
+    def _labels_text(labels: Dict[str, Any]) -> str:
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + '}'
+    
+    def prometheus_text(self) -> str:
+        """Formato de exposición de texto de Prometheus"""
+        snapshot = self.snapshot()
+        lines = []
+        
+        families = {}
+        for counter in snapshot['counters']:
+            families.setdefault(counter['name'], []).append(counter)
+        for name, counters in families.items():
+            metric = f"{self.prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines += [f"{metric}{self._labels_text(c['labels'])} {c['value']}" for c in counters]
+        
+        if snapshot['spans']:
+            metric = f"{self.prefix}_span_seconds"
+            lines.append(f"# HELP {metric} Duración de las operaciones instrumentadas")
+            lines.append(f"# TYPE {metric} histogram")
+            for span in snapshot['spans']:
+                labels = {'span': span['name'], **span['labels']}
+                cumulative = 0
+                for le, count in span['buckets'].items():
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{self._labels_text({**labels, 'le': le})} {cumulative}")
+                lines.append(f"{metric}_sum{self._labels_text(labels)} {span['sum_seconds']}")
+                lines.append(f"{metric}_count{self._labels_text(labels)} {span['count']}")
+        
+        return '\n'.join(lines) + '\n'
+    
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+_registry = MetricsRegistry(
+    enabled=os.getenv('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes'),
+    jsonl_path=os.getenv('METRICS_JSONL') or None
+)
+
+
+def get_metrics() -> MetricsRegistry:
+    """Registro de métricas del proceso"""
+    return _registry
+
+
+def enable(jsonl_path: str = None):
+    """Activar la instrumentación (opcionalmente con archivo JSON lines)"""
+    _registry.enabled = True
+    if jsonl_path:
+        _registry.jsonl_path = jsonl_path
+
+
+def span(name: str, **labels):
+    """Medir un bloque: with span('figure_build'): ..."""
+    if not _registry.enabled:
+        return _NULL_SPAN
+    return _Span(_registry, name, labels)
+
+
+def timed(name: str, **labels):
+    """Decorador: medir cada llamada a la función como un span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _registry.enabled:
+                return func(*args, **kwargs)
+            with _Span(_registry, name, dict(labels)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def increment(name: str, value: float = 1, **labels):
+    if _registry.enabled:
+        _registry.increment(name, value, **labels)
+
+
+def observe(name: str, seconds: float, **labels):
+    if _registry.enabled:
+        _registry.observe(name, seconds, **labels)
+
+
+def record_usage(message):
+    """Contar los tokens del campo usage de una respuesta de Claude"""
+    usage = getattr(message, 'usage', None) if _registry.enabled else None
+    if usage is None:
+        return
+    for field in ('input_tokens', 'output_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens'):
+        value = getattr(usage, field, None)
+        if value:
+            _registry.increment('llm_tokens', value, type=field[:-len('_tokens')])
@@ -0,0 +1,44 @@
+"""Avisos del núcleo hacia la interfaz (o hacia logging fuera de ella)
+
+El procesamiento y el asistente no llaman a Streamlit: publican sus
+mensajes en el notificador activo. Por defecto van al logger
+'ecuador_assistant'; la app instala uno que usa st.success/st.warning.
+"""
+
+import logging
+
+logger = logging.getLogger('ecuador_assistant')
+
+
+class LoggingNotifier:
+    """Notificador por defecto: envía cada aviso al módulo logging"""
+    
+    def __init__(self, log: logging.Logger = logger):
+        self.log = log
+    
+    def success(self, message: str):
+        self.log.info(message)
+    
+    def info(self, message: str):
+        self.log.info(message)
+    
+    def warning(self, message: str):
+        self.log.warning(message)
+    
+    def error(self, message: str):
+        self.log.error(message)
+
+
+_notifier = LoggingNotifier()
+
+
+def get_notifier():
+    """Notificador activo del proceso"""
+    return _notifier
+
+
+def set_notifier(notifier):
+    """Instalar un notificador (success/info/warning/error) y devolver el anterior"""
+    global _notifier
+    previous, _notifier = _notifier, notifier or LoggingNotifier()
+    return previous
@@ -0,0 +1,842 @@
+"""Lectura de exportaciones WEO y almacén numérico de indicadores
+
+Solo depende de NumPy; pandas se carga al parsear un archivo WEO (las
+lecturas desde la caché .npy no lo necesitan).
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import warnings
+from collections.abc import Mapping
+from typing import Any, Dict, List
+
+import numpy as np
+
+from . import metrics
+from .notify import get_notifier
+from .revisions import RevisionStore
+
+
+# Marcadores de dato faltante en las exportaciones WEO
+WEO_MISSING_TOKENS = ['n/a', 'N/A', '--', 'nan', 'NaN', 'none', 'None', '']
+
+
+def parse_weo_table(raw_text: str, first_year: int = 1980, last_year: int = 2030) -> Dict[str, Any]:
+    """Leer una exportación WEO separada por tabulaciones en una pasada vectorizada
+
+    Devuelve un diccionario con el eje de años, la matriz numérica
+    (series x años, NaN para faltantes), la metadata de cada serie y el
+    DataFrame original.
+    """
+    import pandas as pd
+    
+    headers = [col.strip() for col in raw_text.split('\n', 1)[0].split('\t')]
+    year_columns = [col for col in headers
+                    if col.isdigit() and first_year <= int(col) <= last_year]
+    
+    # El parser en C convierte las columnas de años (separador de miles y
+    # marcadores n/a, --, vacío); las filas cortas se rellenan y las largas
+    # se truncan al número de columnas
+    frame = pd.read_csv(
+        io.StringIO(raw_text),
+        sep='\t',
+        header=0,
+        names=headers,
+        dtype={col: str for col in headers if col not in year_columns},
+        thousands=',',
+        na_values={col: WEO_MISSING_TOKENS for col in year_columns},
+        keep_default_na=False,
+        quoting=csv.QUOTE_NONE,
+        usecols=range(len(headers)),
+        skip_blank_lines=True
+    )
+    
+    # Descartar filas sin código (pie de página del FMI, líneas vacías)
+    codes = frame['WEO Subject Code'].fillna('').str.strip()
+    frame = frame[codes != ''].reset_index(drop=True)
+    
+    # Columnas con celdas no numéricas: conversión por columna con coerción
+    for col in year_columns:
+        if not pd.api.types.is_numeric_dtype(frame[col]):
+            cells = frame[col].astype(str).str.strip().str.replace(',', '', regex=False)
+            frame[col] = pd.to_numeric(cells, errors='coerce')
+    
+    values = frame[year_columns].to_numpy(dtype=np.float64)
+    
+    # Solo guardar series que tienen datos
+    keep = ~np.isnan(values).all(axis=1)
+    meta = frame.loc[keep, ['WEO Subject Code', 'Subject Descriptor', 'Subject Notes',
+                            'Units', 'Scale', 'Country/Series-specific Notes',
+                            'ISO', 'Country']].fillna('')
+    meta['WEO Subject Code'] = meta['WEO Subject Code'].str.strip()
+    meta['ISO'] = meta['ISO'].str.strip()
+    keys = ['code', 'name', 'description', 'units', 'scale', 'notes', 'iso', 'country']
+    series = [dict(zip(keys, row)) for row in zip(*(meta[col].tolist() for col in meta.columns))]
+    
+    # Último año con dato observado de cada serie (los siguientes son previsiones)
+    if 'Estimates Start After' in frame.columns:
+        cells = frame.loc[keep, 'Estimates Start After'].fillna('').astype(str).str.strip()
+        boundaries = pd.to_numeric(cells, errors='coerce').tolist()
+    else:
+        boundaries = [np.nan] * len(series)
+    for info, boundary in zip(series, boundaries):
+        info['estimates_start'] = None if boundary != boundary else int(boundary)
+    
+    return {
+        'years': np.array([int(col) for col in year_columns], dtype=np.int64),
+        'year_columns': year_columns,
+        'values': values[keep],
+        'series': series,
+        'frame': frame
+    }
+
+
+# Archivos WEO oficiales: WEOApr2025all.xls, WEOOct2024all.xls, ...
+WEO_FILE_SUFFIXES = ('.xls', '.tsv', '.txt')
+WEO_VINTAGE_PATTERN = re.compile(r'WEO[_ ]?(Apr|Oct)[_ ]?(\d{4})', re.IGNORECASE)
+WEO_CACHE_VERSION = 2
+DEFAULT_VINTAGE_LABEL = 'WEO Apr 2025'
+
+
+def decode_weo_bytes(raw: bytes) -> str:
+    """Decodificar un archivo WEO (UTF-16 con BOM, UTF-8 o Latin-1)"""
+    if raw.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return raw.decode('utf-16')
+    try:
+        return raw.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return raw.decode('latin-1')
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hash SHA-256 del contenido de un archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def discover_weo_vintages(data_dir: str) -> List[Dict[str, Any]]:
+    """Listar los archivos WEO de un directorio, del más antiguo al más reciente"""
+    vintages = []
+    for name in os.listdir(data_dir):
+        path = os.path.join(data_dir, name)
+        if not os.path.isfile(path) or not name.lower().endswith(WEO_FILE_SUFFIXES):
+            continue
+        match = WEO_VINTAGE_PATTERN.search(name)
+        if match:
+            month = 4 if match.group(1).lower() == 'apr' else 10
+            sort_key = (int(match.group(2)), month, name)
+            label = f"WEO {match.group(1).capitalize()} {match.group(2)}"
+        else:
+            sort_key = (0, int(os.path.getmtime(path)), name)
+            label = os.path.splitext(name)[0]
+        vintages.append({'path': path, 'label': label, 'sort_key': sort_key})
+    
+    return sorted(vintages, key=lambda vintage: vintage['sort_key'])
+
+
+def load_weo_table_cached(path: str, cache_dir: str, label: str = None) -> Dict[str, Any]:
+    """Cargar un archivo WEO usando la caché binaria indexada por hash
+
+    La primera vez se parsea el archivo y se guardan la matriz y los años
+    en .npy junto a un meta.json; en los arranques siguientes la matriz se
+    abre con memory-map sin volver a parsear.
+    """
+    digest = file_digest(path)
+    entry_dir = os.path.join(cache_dir, digest)
+    meta_path = os.path.join(entry_dir, 'meta.json')
+    
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding='utf-8') as handle:
+            meta = json.load(handle)
+        if meta.get('version') == WEO_CACHE_VERSION:
+            years = np.load(os.path.join(entry_dir, 'years.npy'))
+            return {
+                'years': years,
+                'year_columns': [str(year) for year in years],
+                'values': np.load(os.path.join(entry_dir, 'values.npy'), mmap_mode='r'),
+                'series': meta['series'],
+                'frame': None,
+                'label': label or meta['label'],
+                'digest': digest,
+                'source': path
+            }
+    
+    with open(path, 'rb') as handle:
+        table = parse_weo_table(decode_weo_bytes(handle.read()))
+    table.update({'label': label or os.path.basename(path), 'digest': digest, 'source': path})
+    
+    # Escribir en un directorio temporal y renombrar para que sea atómico
+    tmp_dir = tempfile.mkdtemp(prefix=f".{digest[:12]}-", dir=cache_dir)
+    try:
+        np.save(os.path.join(tmp_dir, 'years.npy'), table['years'])
+        np.save(os.path.join(tmp_dir, 'values.npy'), np.ascontiguousarray(table['values']))
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as handle:
+            json.dump({
+                'version': WEO_CACHE_VERSION,
+                'label': table['label'],
+                'source': os.path.basename(path),
+                'series': table['series']
+            }, handle, ensure_ascii=False)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    return table
+
+
+def load_weo_vintages(data_dir: str, cache_dir: str = None) -> List[Dict[str, Any]]:
+    """Cargar todas las ediciones WEO de un directorio (más reciente al final)"""
+    cache_dir = cache_dir or os.getenv('WEO_CACHE_DIR') or os.path.join(data_dir, '.weo_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    
+    return [
+        load_weo_table_cached(vintage['path'], cache_dir, vintage['label'])
+        for vintage in discover_weo_vintages(data_dir)
+    ]
+
+
+# Períodos históricos clave de la economía ecuatoriana
+HISTORICAL_PERIODS = [
+    ('Pre-dolarización (1995-1999)', 1995, 1999),
+    ('Post-dolarización (2000-2005)', 2000, 2005),
+    ('Boom commodities (2006-2014)', 2006, 2014),
+    ('Crisis/Ajuste (2015-2020)', 2015, 2020),
+    ('Recuperación (2021-2024)', 2021, 2024)
+]
+
+# Períodos precalculados al cargar: los históricos más el reciente de la respuesta básica
+RECENT_PERIOD = ('Período reciente (2020-2024)', 2020, 2024)
+ANALYTICS_PERIODS = HISTORICAL_PERIODS + [RECENT_PERIOD]
+RECENT_WINDOW = 10
+MIN_DECADE_POINTS = 3
+# Límite de las series sin "Estimates Start After": todos sus años son observados
+NO_ESTIMATES = 9999
+
+
+class SeriesView(Mapping):
+    """Vista {año: valor} de solo lectura sobre una fila del almacén columnar.
+
+    No copia datos: guarda cortes (views) del eje de años y de la fila de
+    valores, y omite los años sin dato (NaN) al iterar.
+    """
+
+    __slots__ = ('years', 'array')
+
+    def __init__(self, years: np.ndarray, array: np.ndarray):
+        self.years = years
+        self.array = array
+
+    def _valid(self) -> np.ndarray:
+        return ~np.isnan(self.array)
+
+    def __getitem__(self, year: int) -> float:
+        if len(self.years):
+            offset = int(year) - int(self.years[0])
+            if 0 <= offset < len(self.array):
+                value = self.array[offset]
+                if not np.isnan(value):
+                    return float(value)
+        raise KeyError(year)
+
+    def __contains__(self, year) -> bool:
+        try:
+            self[year]
+        except (KeyError, TypeError, ValueError):
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.years[self._valid()].tolist())
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._valid()))
+
+    def keys(self) -> List[int]:
+        return self.years[self._valid()].tolist()
+
+    def values(self) -> List[float]:
+        return self.array[self._valid()].tolist()
+
+    def items(self) -> List[tuple]:
+        valid = self._valid()
+        return list(zip(self.years[valid].tolist(), self.array[valid].tolist()))
+
+    def copy(self) -> Dict[int, float]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return repr(self.copy())
+
+
+class RangeStatsIndex:
+    """Estadísticas O(1) de cualquier ventana de años para todas las series
+
+    Guarda sumas prefijas (conteo, suma y suma de cuadrados, centradas en
+    la media de cada fila para estabilidad numérica), una sparse table
+    para mínimo/máximo y los índices del último/primer año con dato. Los
+    años faltantes (NaN) no cuentan en ninguna estadística.
+    """
+    
+    def __init__(self, matrix: np.ndarray, previous: 'RangeStatsIndex' = None, source_rows: np.ndarray = None):
+        self.n_rows, self.n_cols = matrix.shape
+        self.levels = max(1, int(self.n_cols).bit_length())
+        self.counts = np.zeros((self.n_rows, self.n_cols + 1), dtype=np.int32)
+        self.sums = np.zeros((self.n_rows, self.n_cols + 1))
+        self.squares = np.zeros((self.n_rows, self.n_cols + 1))
+        self.shift = np.zeros(self.n_rows)
+        self.min_table = np.full((self.levels, self.n_rows, self.n_cols), np.inf)
+        self.max_table = np.full((self.levels, self.n_rows, self.n_cols), -np.inf)
+        self.last_valid = np.full((self.n_rows, self.n_cols), -1, dtype=np.int32)
+        self.first_valid = np.full((self.n_rows, self.n_cols), self.n_cols, dtype=np.int32)
+        self.matrix = matrix
+        if not self.n_rows:
+            return
+        
+        # Con un índice anterior sobre el mismo eje de años, las filas sin
+        # cambios (source_rows >= 0) se copian y solo se recalculan las demás
+        if previous is None or source_rows is None or previous.n_cols != self.n_cols:
+            self.update_rows(slice(None), matrix)
+            return
+        reused = np.flatnonzero(source_rows >= 0)
+        changed = np.flatnonzero(source_rows < 0)
+        if len(reused):
+            self.copy_rows(previous, reused, source_rows[reused])
+        if len(changed):
+            self.update_rows(changed, matrix[changed])
+    
+    def copy_rows(self, previous: 'RangeStatsIndex', rows: np.ndarray, source_rows: np.ndarray):
+        """Copiar las estructuras ya calculadas de filas de otro índice"""
+        self.shift[rows] = previous.shift[source_rows]
+        self.counts[rows] = previous.counts[source_rows]
+        self.sums[rows] = previous.sums[source_rows]
+        self.squares[rows] = previous.squares[source_rows]
+        self.min_table[:, rows] = previous.min_table[:, source_rows]
+        self.max_table[:, rows] = previous.max_table[:, source_rows]
+        self.last_valid[rows] = previous.last_valid[source_rows]
+        self.first_valid[rows] = previous.first_valid[source_rows]
+    
+    def update_rows(self, rows, values: np.ndarray):
+        """(Re)calcular las estructuras de un conjunto de filas"""
+        values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        valid = ~np.isnan(values)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            shift = np.nan_to_num(np.nanmean(values, axis=1))
+        centered = np.where(valid, values - shift[:, None], 0.0)
+        
+        self.shift[rows] = shift
+        self.counts[rows, 1:] = np.cumsum(valid, axis=1)
+        self.sums[rows, 1:] = np.cumsum(centered, axis=1)
+        self.squares[rows, 1:] = np.cumsum(centered ** 2, axis=1)
+        
+        # Sparse table: nivel k = mínimo/máximo de las ventanas de 2^k años
+        level_min = np.where(valid, values, np.inf)
+        level_max = np.where(valid, values, -np.inf)
+        self.min_table[0, rows] = level_min
+        self.max_table[0, rows] = level_max
+        for k in range(1, self.levels):
+            half = 1 << (k - 1)
+            width = self.n_cols - (1 << k) + 1
+            if width <= 0:
+                break
+            level_min = np.minimum(level_min[:, :width], level_min[:, half:half + width])
+            level_max = np.maximum(level_max[:, :width], level_max[:, half:half + width])
+            self.min_table[k, rows, :width] = level_min
+            self.max_table[k, rows, :width] = level_max
+        
+        # Último año con dato <= j y primer año con dato >= j
+        columns = np.arange(self.n_cols, dtype=np.int32)
+        self.last_valid[rows] = np.maximum.accumulate(np.where(valid, columns, -1), axis=1)
+        self.first_valid[rows] = np.minimum.accumulate(
+            np.where(valid, columns, self.n_cols)[:, ::-1], axis=1)[:, ::-1]
+    
+    def query(self, rows, lo, hi) -> Dict[str, np.ndarray]:
+        """Estadísticas vectorizadas de las ventanas de columnas [lo, hi) de cada fila"""
+        rows, lo, hi = np.broadcast_arrays(np.asarray(rows), np.asarray(lo), np.asarray(hi))
+        length = np.maximum(hi - lo, 1)
+        count = self.counts[rows, hi] - self.counts[rows, lo]
+        total = self.sums[rows, hi] - self.sums[rows, lo]
+        squares = self.squares[rows, hi] - self.squares[rows, lo]
+        
+        k = np.floor(np.log2(length)).astype(np.int64)
+        tail = np.maximum(hi - (1 << k), 0)
+        head = np.minimum(lo, self.n_cols - 1)
+        minimum = np.minimum(self.min_table[k, rows, head], self.min_table[k, rows, tail])
+        maximum = np.maximum(self.max_table[k, rows, head], self.max_table[k, rows, tail])
+        
+        last = self.last_valid[rows, np.maximum(hi - 1, 0)]
+        first = self.first_valid[rows, head]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            centered_mean = total / count
+            variance = np.where(count > 1, np.maximum(squares / count - centered_mean ** 2, 0.0), 0.0)
+        
+        return {
+            'count': count,
+            'sum': total + count * self.shift[rows],
+            'mean': centered_mean + self.shift[rows],
+            'std': np.sqrt(variance),
+            'min': minimum,
+            'max': maximum,
+            'first_col': first,
+            'last_col': last,
+            'latest': self.matrix[rows, np.maximum(last, 0)]
+        }
+
+
+class EcuadorWEOProcessor:
+    """Procesador mejorado de datos WEO de Ecuador del FMI
+
+    Los valores se guardan en un almacén columnar: una matriz float64
+    (indicadores x años) con NaN para los datos faltantes, un índice
+    código -> fila y el año inicial para convertir años en columnas.
+    """
+    
+    def __init__(self, weo_data_text: str = None, country: str = 'ECU',
+                 table: Dict[str, Any] = None, vintages: List[Dict[str, Any]] = None,
+                 previous: 'EcuadorWEOProcessor' = None, revisions: RevisionStore = None):
+        self.raw_data = weo_data_text
+        self.country = country
+        self.table = table
+        self.vintages = vintages or []  # metadata de cada edición (label, digest, source)
+        self.revisions = revisions
+        self.vintage = DEFAULT_VINTAGE_LABEL
+        self.data_hash = None
+        self.cache_dir = os.getenv('WEO_CACHE_DIR')
+        self.df = None
+        self.processed_data = {}
+        self.indicators_info = {}
+        self.year_columns = []
+        # Almacén columnar
+        self.years = np.empty(0, dtype=np.int64)
+        self.values = np.empty((0, 0), dtype=np.float64)
+        self.code_index = {}
+        self.series_index = {}
+        self.series_info = []
+        self.range_stats = None
+        self.estimates_start = np.empty(0, dtype=np.int64)
+        self.estimate_mask = np.empty((0, 0), dtype=bool)
+        self.indicator_versions = {}
+        self.derived_codes = {}
+        self.derived = None  # DerivedIndicatorEngine, asignado por build_system
+        self.comparison = None  # PeerComparisonEngine, asignado por build_system
+        # Procesador de la versión anterior: solo se usa durante process_data
+        # para reutilizar los cálculos de las series sin cambios
+        self.previous = previous
+        self.changed_series = []
+        self.process_data()
+        self.previous = None
+    
+    @classmethod
+    def from_directory(cls, data_dir: str, country: str = 'ECU', cache_dir: str = None,
+                       previous: 'EcuadorWEOProcessor' = None):
+        """Crear el procesador con la edición WEO más reciente de un directorio"""
+        cache_dir = cache_dir or os.getenv('WEO_CACHE_DIR') or os.path.join(data_dir, '.weo_cache')
+        tables = load_weo_vintages(data_dir, cache_dir)
+        if not tables:
+            raise FileNotFoundError(f"No hay archivos WEO en {data_dir}")
+        
+        # Historial de revisiones: se reutiliza si las ediciones no cambiaron;
+        # las tablas anteriores no se conservan (solo sus deltas)
+        digests = [table['digest'] for table in tables]
+        if previous is not None and previous.revisions is not None and previous.revisions.digests == digests:
+            revisions = previous.revisions
+        else:
+            revisions = RevisionStore.from_tables(tables, default_label=DEFAULT_VINTAGE_LABEL)
+        vintages = [{key: table.get(key) for key in ('label', 'digest', 'source')} for table in tables]
+        processor = cls(country=country, table=tables[-1], vintages=vintages, previous=previous,
+                        revisions=revisions)
+        processor.cache_dir = cache_dir
+        return processor
+    
+    @metrics.timed('process_data')
+    def process_data(self):
+        """Procesar datos del WEO desde texto"""
+        try:
+            if self.table is None:
+                self.table = parse_weo_table(self.raw_data)
+                self.table['digest'] = hashlib.sha256(self.raw_data.encode('utf-8')).hexdigest()
+            table = self.table
+            
+            self.vintage = table.get('label') or DEFAULT_VINTAGE_LABEL
+            self.data_hash = table.get('digest')
+            if len(self.vintages) > 1:
+                # Las ediciones anteriores también determinan las revisiones
+                joined = '|'.join(vintage['digest'] for vintage in self.vintages)
+                self.data_hash = hashlib.sha256(joined.encode('utf-8')).hexdigest()
+            if self.revisions is None:
+                self.revisions = RevisionStore.from_tables([table], default_label=self.vintage)
+            self.df = table['frame']
+            self.year_columns = table['year_columns']
+            self.years = table['years']
+            changed = self.build_store(table['series'], table['values'], previous=self.previous)
+            self.changed_series = [(self.series_info[idx].get('iso'), self.series_info[idx]['code'])
+                                   for idx in changed]
+            
+            get_notifier().success(f"✅ Procesados {len(self.processed_data)} indicadores macroeconómicos con {len(self.year_columns)} años de datos ({self.period_label()})")
+            
+        except Exception as e:
+            get_notifier().error(f"Error procesando datos: {e}")
+    
+    def match_rows(self, previous: 'EcuadorWEOProcessor', series: List[Dict[str, Any]],
+                   values: np.ndarray) -> np.ndarray:
+        """Fila de `previous` con la misma serie, metadata y valores de cada fila nueva (-1 si cambió)"""
+        source = np.full(len(series), -1, dtype=np.int64)
+        if previous is None or not np.array_equal(previous.years, self.years):
+            return source
+        
+        for idx, info in enumerate(series):
+            row = previous.series_index.get((info.get('iso'), info['code']))
+            if row is not None and previous.series_info[row] == info:
+                source[idx] = row
+        
+        matched = np.flatnonzero(source >= 0)
+        old, new = previous.values[source[matched]], values[matched]
+        same = ((old == new) | (np.isnan(old) & np.isnan(new))).all(axis=1)
+        source[matched[~same]] = -1
+        return source
+    
+    def build_store(self, series: List[Dict[str, Any]], values: np.ndarray,
+                    previous: 'EcuadorWEOProcessor' = None) -> np.ndarray:
+        """Construir la matriz columnar y las estadísticas de todos los indicadores
+
+        Con `previous` (otra versión de los datos, o el mismo procesador)
+        las series idénticas reutilizan sus estadísticas y su parte del
+        índice de rangos. Devuelve las filas que se recalcularon.
+        """
+        source_rows = self.match_rows(previous, series, values)
+        if previous is not None:
+            previous_index, previous_data = previous.code_index, previous.processed_data
+            previous_stats = previous.range_stats
+        else:
+            previous_index, previous_data, previous_stats = {}, {}, None
+        
+        self.values = values
+        self.series_info = series
+        self.range_stats = RangeStatsIndex(self.values, previous_stats, source_rows)
+        
+        # Frontera observado/previsión por serie y máscara series x años
+        self.estimates_start = np.array([info.get('estimates_start') or NO_ESTIMATES for info in series],
+                                        dtype=np.int64)
+        self.estimate_mask = self.years[None, :] > self.estimates_start[:, None]
+        self.series_index = {(info.get('iso'), info['code']): idx for idx, info in enumerate(series)}
+        
+        # Índice por código para el país de análisis (si el archivo no trae
+        # ISO se asume que todas las filas son del país)
+        self.code_index = {}
+        for idx, info in enumerate(series):
+            if info.get('iso') in (self.country, None, ''):
+                self.code_index.setdefault(info['code'], idx)
+        
+        # Agregados del país de análisis: solo para las filas nuevas o cambiadas
+        reused = {code: previous_data[code] for code, idx in self.code_index.items()
+                  if source_rows[idx] >= 0 and previous_index.get(code) == source_rows[idx]}
+        pending = [code for code in self.code_index if code not in reused]
+        pending_rows = [self.code_index[code] for code in pending]
+        focus = self.values[pending_rows]
+        computed = dict(zip(pending, zip(self.compute_stats(focus, self.estimates_start[pending_rows]),
+                                         self.compute_analytics(focus))))
+        
+        self.processed_data = {}
+        self.indicators_info = {}
+        for code, idx in self.code_index.items():
+            info = series[idx]
+            if code in reused:
+                stats, analytics = reused[code]['stats'], reused[code]['analytics']
+            else:
+                stats, analytics = computed[code]
+            self.processed_data[code] = {
+                'info': info,
+                'data': SeriesView(self.years, self.values[idx]),
+                'stats': stats,
+                'analytics': analytics
+            }
+            self.indicators_info[code] = info
+        
+        return np.flatnonzero(source_rows < 0)
+    
+    def add_series(self, series: List[Dict[str, Any]], values: np.ndarray, replace: List[str] = ()):
+        """Agregar series calculadas (p. ej. indicadores derivados) al almacén
+
+        Las filas existentes de los códigos en `replace` se descartan antes
+        de agregar las nuevas; la versión de esos códigos se incrementa
+        para invalidar las cachés de render.
+        """
+        replace = set(replace)
+        keep = [idx for idx, info in enumerate(self.series_info) if info['code'] not in replace]
+        combined = np.vstack([self.values[keep], np.asarray(values, dtype=np.float64)])
+        self.build_store([self.series_info[idx] for idx in keep] + list(series), combined, previous=self)
+        
+        for info in series:
+            self.derived_codes[info['code']] = info.get('description', '')
+        for code in replace | {info['code'] for info in series}:
+            self.indicator_versions[code] = self.indicator_versions.get(code, 0) + 1
+    
+    def update_indicator(self, indicator_code: str, values: np.ndarray):
+        """Reemplazar la serie de un indicador y recalcular solo sus agregados
+
+        La matriz se copia antes de escribir si es de solo lectura (caché
+        binaria) o si es también la base del historial de revisiones. La
+        huella de los datos cambia (cachés de respuestas y de JSON), los
+        derivados que dependen del código se recalculan y el índice de
+        recuperación rehace sus fragmentos en la próxima búsqueda.
+        """
+        if indicator_code not in self.code_index:
+            raise KeyError(indicator_code)
+        
+        shared = self.revisions is not None and np.shares_memory(self.values, self.revisions.base)
+        if shared or not self.values.flags.writeable:
+            self.values = np.array(self.values)
+            for code, idx in self.code_index.items():
+                self.processed_data[code]['data'] = SeriesView(self.years, self.values[idx])
+        
+        row = self.code_index[indicator_code]
+        self.values[row] = np.asarray(values, dtype=np.float64)
+        self.range_stats.matrix = self.values
+        self.range_stats.update_rows([row], self.values[row:row + 1])
+        self.processed_data[indicator_code]['stats'] = self.compute_stats(
+            self.values[row:row + 1], self.estimates_start[row:row + 1])[0]
+        self.processed_data[indicator_code]['analytics'] = self.compute_analytics(self.values[row:row + 1])[0]
+        version = self.indicator_versions.get(indicator_code, 0) + 1
+        self.indicator_versions[indicator_code] = version
+        self.data_hash = hashlib.sha256(f"{self.data_hash}|{indicator_code}|{version}".encode('utf-8')).hexdigest()
+        
+        if self.derived is not None:
+            self.derived.refresh([indicator_code])
+    
+    def compute_stats(self, matrix: np.ndarray, boundaries: np.ndarray = None) -> List[Dict[str, Any]]:
+        """Calcular estadísticas de todas las filas en una sola pasada vectorizada
+
+        `boundaries` es el último año observado de cada fila; con él se
+        separa el último dato observado del último valor (previsión).
+        """
+        if matrix.shape[0] == 0:
+            return []
+        if boundaries is None:
+            boundaries = np.full(matrix.shape[0], NO_ESTIMATES, dtype=np.int64)
+        
+        valid = ~np.isnan(matrix)
+        counts = valid.sum(axis=1)
+        first_idx = valid.argmax(axis=1)
+        last_idx = valid.shape[1] - 1 - valid[:, ::-1].argmax(axis=1)
+        rows = np.arange(matrix.shape[0])
+        
+        observed = valid & (self.years[None, :] <= boundaries[:, None])
+        has_observed = observed.any(axis=1)
+        last_observed = observed.shape[1] - 1 - observed[:, ::-1].argmax(axis=1)
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            mins = np.nanmin(matrix, axis=1)
+            maxs = np.nanmax(matrix, axis=1)
+            means = np.nanmean(matrix, axis=1)
+            stds = np.nanstd(matrix, axis=1)
+        latest = matrix[rows, last_idx]
+        
+        return [
+            {
+                'data_points': int(counts[i]),
+                'first_year': int(self.years[first_idx[i]]),
+                'last_year': int(self.years[last_idx[i]]),
+                'latest_value': float(latest[i]),
+                'min_value': float(mins[i]),
+                'max_value': float(maxs[i]),
+                'mean_value': float(means[i]),
+                'std_value': float(stds[i]),
+                'estimates_start': int(boundaries[i]) if boundaries[i] != NO_ESTIMATES else None,
+                'latest_actual_year': int(self.years[last_observed[i]]) if has_observed[i] else None,
+                'latest_actual_value': float(matrix[i, last_observed[i]]) if has_observed[i] else None
+            }
+            for i in rows
+        ]
+    
+    def compute_analytics(self, matrix: np.ndarray) -> List[Dict[str, Any]]:
+        """Precalcular agregados derivados de todas las filas (décadas, períodos, ventana reciente)"""
+        if matrix.shape[0] == 0:
+            return []
+        
+        valid = ~np.isnan(matrix)
+        filled = np.where(valid, matrix, 0.0)
+        
+        # Promedios por década con reduceat sobre el eje de años (ordenado)
+        decades, decade_starts = np.unique(self.years // 10 * 10, return_index=True)
+        decade_counts = np.add.reduceat(valid, decade_starts, axis=1)
+        decade_sums = np.add.reduceat(filled, decade_starts, axis=1)
+        
+        # Promedios de los períodos con nombre
+        period_means = []
+        for _, start, end in ANALYTICS_PERIODS:
+            columns = self.year_slice(start, end)
+            counts = valid[:, columns].sum(axis=1)
+            sums = filled[:, columns].sum(axis=1)
+            period_means.append(np.divide(sums, counts, out=np.full(len(matrix), np.nan), where=counts > 0))
+        
+        # Ventana de los últimos años con dato y variación porcentual anual
+        rank_from_end = valid[:, ::-1].cumsum(axis=1)[:, ::-1]
+        recent_mask = valid & (rank_from_end <= RECENT_WINDOW)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            yoy = np.full(matrix.shape, np.nan)
+            yoy[:, 1:] = (matrix[:, 1:] / matrix[:, :-1] - 1) * 100
+        
+        year_list = self.years.tolist()
+        analytics = []
+        for i in range(matrix.shape[0]):
+            recent_cols = np.flatnonzero(recent_mask[i])
+            valid_cols = np.flatnonzero(valid[i])
+            cagr = None
+            # Una fila sin datos (update_indicator con NaN, derivado vacío) no tiene extremos
+            if valid_cols.size:
+                first, last = matrix[i, valid_cols[0]], matrix[i, valid_cols[-1]]
+                span = int(self.years[valid_cols[-1]] - self.years[valid_cols[0]])
+                if span > 0 and first > 0 and last > 0:
+                    cagr = float(((last / first) ** (1 / span) - 1) * 100)
+            
+            analytics.append({
+                'decades': {
+                    int(decade): float(decade_sums[i, d] / decade_counts[i, d])
+                    for d, decade in enumerate(decades)
+                    if decade_counts[i, d] >= MIN_DECADE_POINTS
+                },
+                'periods': {
+                    label: float(means[i])
+                    for (label, _, _), means in zip(ANALYTICS_PERIODS, period_means)
+                    if not np.isnan(means[i])
+                },
+                'recent': {year_list[c]: float(matrix[i, c]) for c in recent_cols},
+                'growth': {
+                    'yoy': {year_list[c]: float(yoy[i, c]) for c in recent_cols if np.isfinite(yoy[i, c])},
+                    'cagr': cagr
+                }
+            })
+        
+        return analytics
+    
+    def period_label(self) -> str:
+        """Eje de años cargado, p. ej. '1980-2030'"""
+        return f"{self.years[0]}-{self.years[-1]}" if len(self.years) else ''
+    
+    def year_slice(self, start_year: int = None, end_year: int = None) -> slice:
+        """Convertir un rango de años en un corte de columnas de la matriz"""
+        if not len(self.years):
+            return slice(0, 0)
+        base_year = int(self.years[0])
+        lo = min(max(start_year - base_year, 0), len(self.years)) if start_year else 0
+        hi = min(end_year - base_year + 1, len(self.years)) if end_year else len(self.years)
+        return slice(lo, max(lo, hi))
+    
+    def get_indicator_data(self, indicator_code: str, start_year: int = None, end_year: int = None):
+        """Obtener datos de un indicador específico"""
+        if indicator_code not in self.processed_data:
+            return None
+        
+        indicator = self.processed_data[indicator_code]
+        
+        # Filtrar por años si se especifica (corte sin copia)
+        columns = self.year_slice(start_year, end_year)
+        row = self.code_index[indicator_code]
+        data = SeriesView(self.years[columns], self.values[row, columns])
+        estimate_mask = self.estimate_mask[row, columns]
+        
+        # Estadísticas del período seleccionado (las de toda la serie si no hay rango)
+        if start_year or end_year:
+            stats = self.get_range_stats(indicator_code, start_year, end_year)
+        else:
+            stats = indicator['stats']
+        
+        return {
+            'info': indicator['info'],
+            'data': data,
+            'stats': stats,
+            # Alineada con data.years: True en los años que son previsión
+            'estimate_mask': estimate_mask
+        }
+    
+    def get_range_stats(self, indicator_code: str, start_year: int = None, end_year: int = None):
+        """Estadísticas O(1) de un indicador en [start_year, end_year] (None si no hay datos)"""
+        if indicator_code not in self.code_index:
+            return None
+        
+        columns = self.year_slice(start_year, end_year)
+        result = self.range_stats.query(self.code_index[indicator_code], columns.start, columns.stop)
+        if result['count'] == 0:
+            return None
+        
+        # Último dato observado de la ventana: último año con dato antes de la frontera
+        row = self.code_index[indicator_code]
+        boundary = int(self.estimates_start[row])
+        actual_stop = min(columns.stop, max(boundary - int(self.years[0]) + 1, 0))
+        actual_col = int(self.range_stats.last_valid[row, actual_stop - 1]) if actual_stop > columns.start else -1
+        has_actual = actual_col >= columns.start
+        
+        return {
+            'data_points': int(result['count']),
+            'first_year': int(self.years[result['first_col']]),
+            'last_year': int(self.years[result['last_col']]),
+            'latest_value': float(result['latest']),
+            'min_value': float(result['min']),
+            'max_value': float(result['max']),
+            'mean_value': float(result['mean']),
+            'std_value': float(result['std']),
+            'estimates_start': boundary if boundary != NO_ESTIMATES else None,
+            'latest_actual_year': int(self.years[actual_col]) if has_actual else None,
+            'latest_actual_value': float(self.values[row, actual_col]) if has_actual else None
+        }
+    
+    def get_revisions(self, indicator_codes: List[str], year: int, last: int = None) -> Dict[str, List[tuple]]:
+        """Valor de `year` de cada indicador en las últimas `last` ediciones
+
+        {código: [(edición, valor), ...]}, en una sola consulta al
+        historial; vacío para los indicadores sin historial (derivados).
+        """
+        if self.revisions is None:
+            return {}
+        by_iso = {}
+        for code in indicator_codes:
+            if code in self.code_index:
+                by_iso.setdefault(self.series_info[self.code_index[code]].get('iso'), []).append(code)
+        result = {}
+        for iso, codes in by_iso.items():
+            result.update(self.revisions.revisions(codes, year, iso, last))
+        return result
+    
+    def get_series_by_vintage(self, indicator_code: str, start_year: int = None, end_year: int = None,
+                              last: int = None):
+        """Serie de un indicador según cada edición: (ediciones, años, matriz) o None"""
+        if self.revisions is None or indicator_code not in self.code_index:
+            return None
+        iso = self.series_info[self.code_index[indicator_code]].get('iso')
+        return self.revisions.series_by_vintage(indicator_code, iso, last, start_year, end_year)
+    
+    def get_estimate_mask(self, indicator_codes: List[str] = None, start_year: int = None,
+                          end_year: int = None) -> np.ndarray:
+        """Máscara indicadores x años (True = previsión) del país de análisis"""
+        codes = list(self.code_index) if indicator_codes is None else indicator_codes
+        rows = [self.code_index[code] for code in codes]
+        return self.estimate_mask[rows, self.year_slice(start_year, end_year)]
+    
+    def estimates_note(self) -> str:
+        """Desde cuándo los datos son previsiones, según la frontera de cada indicador"""
+        boundaries = sorted({info['estimates_start'] for info in self.indicators_info.values()
+                             if info.get('estimates_start')})
+        if not boundaries:
+            return 'sin marca de previsiones en los datos'
+        if len(boundaries) == 1:
+            return f"los datos posteriores a {boundaries[0]} son previsiones"
+        return f"los datos posteriores a {boundaries[0]}-{boundaries[-1]} (según el indicador) son previsiones"
+    
+    def get_all_years_data(self, indicator_code: str):
+        """Obtener TODOS los datos históricos de un indicador"""
+        if indicator_code not in self.processed_data:
+            return None
+        
+        return self.processed_data[indicator_code]
@@ -0,0 +1,231 @@
+"""Construcción del prompt con presupuesto de tokens"""
+
+import math
+import os
+import warnings
+from typing import Any, Dict, List
+
+import numpy as np
+
+from .processing import HISTORICAL_PERIODS, EcuadorWEOProcessor
+from .revisions import REVISION_VINTAGES, vintage_year
+
+
+CLAUDE_MODEL = os.getenv('CLAUDE_MODEL', 'claude-3-5-sonnet-20241022')
+# Años del promedio que se compara con los pares en el contexto
+COMPARISON_WINDOW = 10
+
+# Instrucciones fijas por edición de datos: van al inicio del prompt para
+# aprovechar la caché del proveedor. El período y la frontera de previsiones
+# salen de los datos cargados.
+SYSTEM_INSTRUCTIONS = """Eres un economista senior especializado en Ecuador con acceso COMPLETO a {span} años de datos históricos ({period}, {estimates}). 
+
+INSTRUCCIONES ESPECIALIZADAS:
+1. Analiza TODA la serie histórica disponible ({period}); distingue siempre los datos observados de las previsiones del FMI (cada indicador indica su último año observado)
+2. Identifica períodos económicos clave (crisis 1999, dolarización 2000, boom commodities, etc.)
+3. Proporciona datos específicos con años y cifras exactas
+4. Compara diferentes períodos históricos cuando sea relevante
+5. Explica causas económicas y contexto institucional
+6. Usa terminología económica apropiada pero accesible
+7. Incluye implicaciones para política económica cuando corresponda
+8. Si hay REVISIONES DEL PRONÓSTICO, explica cómo cambiaron las previsiones entre ediciones del WEO
+9. Si hay COMPARACIÓN REGIONAL, sitúa a Ecuador frente a sus pares (puesto, percentil y mediana del grupo)
+
+FORMATO DE RESPUESTA:
+📊 **Análisis Histórico Completo**
+- Resumen ejecutivo con datos clave
+- Tendencias históricas por períodos
+- Comparaciones temporales específicas
+- Contexto económico e interpretación
+- Implicaciones y outlook"""
+
+
+class PromptContextBuilder:
+    """Arma el prompt para Claude con presupuesto de tokens
+
+    Cada bloque de indicador se renderiza una sola vez (memoizado por
+    edición de datos y versión del indicador). Las instrucciones y los
+    bloques van en el system prompt, ordenados por código, para que el
+    prefijo sea estable entre preguntas y el proveedor pueda cachearlo;
+    el mensaje del usuario solo lleva la pregunta.
+    """
+    
+    CHARS_PER_TOKEN = 3.5
+    
+    def __init__(self, weo_processor: EcuadorWEOProcessor, token_budget: int = None):
+        self.weo_processor = weo_processor
+        self.token_budget = token_budget or int(os.getenv('PROMPT_TOKEN_BUDGET', '6000'))
+        self.system_instructions = SYSTEM_INSTRUCTIONS.format(
+            span=len(weo_processor.years),
+            period=weo_processor.period_label(),
+            estimates=weo_processor.estimates_note()
+        )
+        self._blocks = {}
+    
+    def estimate_tokens(self, text: str) -> int:
+        """Estimación rápida de tokens a partir de la longitud del texto"""
+        return int(math.ceil(len(text) / self.CHARS_PER_TOKEN))
+    
+    def render_block(self, indicator_code: str, compact: bool = False) -> str:
+        """Bloque de contexto de un indicador (memoizado)"""
+        processor = self.weo_processor
+        key = (indicator_code, compact, processor.data_hash,
+               processor.indicator_versions.get(indicator_code, 0))
+        block = self._blocks.get(key)
+        if block is not None:
+            return block
+        
+        indicator_data = processor.get_all_years_data(indicator_code)
+        info = indicator_data['info']
+        stats = indicator_data['stats']
+        analytics = indicator_data['analytics']
+        
+        recent = ', '.join(f"{year}: {value:.2f}"
+                           for year, value in sorted(analytics['recent'].items(), reverse=True))
+        periods = ''.join(f"- {period}: Promedio {analytics['periods'][period]:.2f}\n"
+                          for period, _, _ in HISTORICAL_PERIODS if period in analytics['periods'])
+        
+        block = f"""=== INDICADOR: {info['name']} ({info['code']}) ===
+Unidades: {info['units']}
+PERÍODO COMPLETO: {stats['first_year']}-{stats['last_year']} ({stats['data_points']} observaciones)
+"""
+        if stats.get('estimates_start') and stats['estimates_start'] < stats['last_year']:
+            block += f"DATOS OBSERVADOS HASTA {stats['estimates_start']}; {stats['estimates_start'] + 1}-{stats['last_year']} SON PREVISIONES DEL FMI\n"
+        if not compact:
+            decades = ''.join(f"- {decade}s: {avg_value:.2f} promedio\n"
+                              for decade, avg_value in analytics['decades'].items())
+            block += f"""Descripción: {info['description'][:300]}...
+
+RESUMEN POR DÉCADAS:
+{decades}"""
+        
+        block += f"""
+PERÍODOS HISTÓRICOS CLAVE:
+{periods}"""
+        if analytics['growth']['cagr'] is not None and 'Percent' not in info['units']:
+            block += f"- Crecimiento anual compuesto {stats['first_year']}-{stats['last_year']}: {analytics['growth']['cagr']:.2f}%\n"
+        
+        block += f"""
+DATOS RECIENTES (últimos 10 años): {recent}
+
+ESTADÍSTICAS GENERALES:
+{self.latest_lines(stats)}- Promedio histórico: {stats['mean_value']:.2f}
+- Máximo histórico: {stats['max_value']:.2f}
+- Mínimo histórico: {stats['min_value']:.2f}
+"""
+        block += self.render_revisions(indicator_code)
+        block += self.render_comparison(indicator_code, stats)
+        self._blocks[key] = block
+        return block
+    
+    @staticmethod
+    def latest_lines(stats: Dict[str, Any]) -> str:
+        """Último dato observado y, si hay previsiones, el último valor proyectado"""
+        if stats.get('latest_actual_value') is None:
+            return f"- Última previsión: {stats['latest_value']:.2f} ({stats['last_year']})\n"
+        lines = f"- Último dato observado: {stats['latest_actual_value']:.2f} ({stats['latest_actual_year']})\n"
+        if stats['last_year'] > stats['latest_actual_year']:
+            lines += f"- Última previsión: {stats['latest_value']:.2f} ({stats['last_year']})\n"
+        return lines
+    
+    def render_revisions(self, indicator_code: str) -> str:
+        """Cambios del pronóstico entre las últimas ediciones WEO (vacío con una sola edición)
+
+        Se muestran los años revisados alrededor del año de la edición
+        vigente (estimación del año anterior, año en curso y siguiente).
+        """
+        history = self.weo_processor.get_series_by_vintage(indicator_code, last=REVISION_VINTAGES)
+        if history is None or len(history[0]) < 2:
+            return ''
+        labels, years, matrix = history
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            spread = np.nanmax(matrix, axis=0) - np.nanmin(matrix, axis=0)
+        revised = years[spread > 0].tolist()
+        if not revised:
+            return ''
+        
+        focus = vintage_year(self.weo_processor.vintage)
+        shown = [year for year in revised if focus and focus - 1 <= year <= focus + 1] or revised[-3:]
+        lines = []
+        for year in shown:
+            column = year - int(years[0])
+            path = ' → '.join(f"{label}: {value:.2f}" for label, value in zip(labels, matrix[:, column])
+                              if not np.isnan(value))
+            lines.append(f"- {year}: {path}\n")
+        return f"""
+REVISIONES DEL PRONÓSTICO (últimas {len(labels)} ediciones WEO):
+{''.join(lines)}"""
+    
+    def render_comparison(self, indicator_code: str, stats: Dict[str, Any]) -> str:
+        """Posición frente a los grupos de pares (vacío si no hay datos de otros países)
+
+        Compara el último año observado y el promedio de la década que
+        termina en él.
+        """
+        engine = self.weo_processor.comparison
+        if engine is None:
+            return ''
+        year = stats.get('latest_actual_year') or stats['last_year']
+        groups = engine.compare(indicator_code, year - COMPARISON_WINDOW + 1, year)
+        lines = []
+        for peers in groups.values():
+            if not peers['rank'][-1]:
+                continue
+            period = peers['period']
+            lines.append(
+                f"- {peers['name']} ({len(peers['members'])} pares: {', '.join(peers['members'])}): "
+                f"{year} Ecuador {peers['value'][-1]:.2f}, puesto {peers['rank'][-1]} de {peers['count'][-1] + 1}, "
+                f"percentil {peers['percentile'][-1]:.0f}, mediana de pares {peers['median'][-1]:.2f} "
+                f"(p25-p75: {peers['p25'][-1]:.2f} a {peers['p75'][-1]:.2f}); "
+                f"promedio {period['start']}-{period['end']}: Ecuador {period['value']:.2f} "
+                f"vs mediana {period['median']:.2f}\n"
+            )
+        if not lines:
+            return ''
+        return f"""
+COMPARACIÓN REGIONAL (puesto 1 = valor más alto del grupo):
+{''.join(lines)}"""
+    
+    def build(self, query: str, indicator_codes: List[str],
+              history: List[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Armar system prompt y mensajes respetando el presupuesto de tokens
+
+        Los indicadores se agregan en orden de relevancia mientras quepan;
+        si uno no cabe completo se intenta su versión compacta. `history`
+        (turnos previos de ConversationMemory, ya acotados) va antes de la
+        pregunta y cuenta en el presupuesto.
+        """
+        question = f"PREGUNTA DEL USUARIO: {query}\n\nRESPUESTA:"
+        history = list(history or [])
+        used = self.estimate_tokens(self.system_instructions) + self.estimate_tokens(question)
+        used += sum(self.estimate_tokens(message['content']) for message in history)
+        
+        selected = {}
+        dropped = []
+        for code in indicator_codes:
+            if code in selected or code not in self.weo_processor.processed_data:
+                continue
+            for compact in (False, True):
+                block = self.render_block(code, compact)
+                cost = self.estimate_tokens(block)
+                if used + cost <= self.token_budget:
+                    selected[code] = block
+                    used += cost
+                    break
+            else:
+                dropped.append(code)
+        
+        context = f"DATOS ECONÓMICOS COMPLETOS DE ECUADOR (FMI - {self.weo_processor.period_label()}):\n\n"
+        context += "\n========================\n\n".join(selected[code] for code in sorted(selected))
+        
+        return {
+            'system': [
+                {'type': 'text', 'text': self.system_instructions},
+                {'type': 'text', 'text': context, 'cache_control': {'type': 'ephemeral'}}
+            ],
+            'messages': history + [{'role': 'user', 'content': question}],
+            'included': sorted(selected),
+            'dropped': dropped,
+            'estimated_tokens': used
+        }
@@ -0,0 +1,181 @@
+"""Registro versionado de datos con recarga en caliente
+
+El registro publica una versión de los datos (procesador + asistente) y
+vigila el directorio WEO_DATA_DIR. Cuando aparece o cambia un archivo
+construye la versión nueva reutilizando todo lo que no cambió (series,
+estadísticas, índice de rangos y vectores de recuperación) y la publica
+con una sola asignación: cada solicitud toma la versión vigente al
+empezar y termina sobre ella aunque se publique otra entretanto.
+
+    registry = DataRegistry()
+    snapshot = registry.current()
+    snapshot.assistant.generate_response('...')
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from . import metrics
+from .notify import get_notifier
+from .processing import discover_weo_vintages
+from .system import build_system
+
+
+class DataSnapshot:
+    """Versión publicada de los datos; no se modifica después de publicarse"""
+    
+    def __init__(self, version: int, assistant, weo_processor, fingerprint: tuple,
+                 changes: Dict[str, Any] = None):
+        self.version = version
+        self.assistant = assistant
+        self.weo_processor = weo_processor
+        self.fingerprint = fingerprint
+        self.changes = changes or {}
+        self.loaded_at = time.time()
+    
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'vintage': self.weo_processor.vintage,
+            'data_hash': self.weo_processor.data_hash,
+            'loaded_at': self.loaded_at,
+            'changes': self.changes
+        }
+
+
+def diff_snapshots(previous, current) -> Dict[str, Any]:
+    """Series agregadas, eliminadas y modificadas entre dos procesadores"""
+    before, after = set(previous.series_index), set(current.series_index)
+    added = after - before
+    changed = set(current.changed_series) - added
+    return {
+        'added': len(added),
+        'removed': len(before - after),
+        'changed': len(changed),
+        'codes': sorted({code for _, code in added | changed | (before - after)}),
+        'reused': len(after) - len(added) - len(changed)
+    }
+
+
+class DataRegistry:
+    """Versión vigente de los datos y recarga incremental desde un directorio
+
+    poll_interval (segundos, WEO_RELOAD_INTERVAL) controla la revisión en
+    segundo plano; 0 la desactiva (reload() y check() siguen disponibles).
+    Un cambio en los archivos se aplica cuando se mantiene igual en dos
+    revisiones seguidas, para no leer un archivo a medio copiar.
+    """
+    
+    DEFAULT_POLL_INTERVAL = 60.0
+    
+    def __init__(self, api_key: str = None, data_dir: str = None, poll_interval: float = None):
+        self.api_key = api_key
+        self.data_dir = data_dir or os.getenv('WEO_DATA_DIR')
+        if poll_interval is None:
+            default = self.DEFAULT_POLL_INTERVAL if self.watching else 0
+            poll_interval = float(os.getenv('WEO_RELOAD_INTERVAL', default))
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._pending = None
+        self._stop = threading.Event()
+        self._thread = None
+        
+        fingerprint = self.fingerprint()
+        assistant, weo_processor = build_system(api_key, self.data_dir)
+        self._snapshot = DataSnapshot(1, assistant, weo_processor, fingerprint)
+        
+        if self.watching and self.poll_interval > 0:
+            self.start()
+    
+    @property
+    def watching(self) -> bool:
+        return bool(self.data_dir) and os.path.isdir(self.data_dir)
+    
+    def current(self) -> DataSnapshot:
+        """Versión vigente (tomarla una vez por solicitud)"""
+        return self._snapshot
+    
+    def fingerprint(self) -> tuple:
+        """Nombre, tamaño y fecha de modificación de los archivos WEO del directorio"""
+        if not self.watching:
+            return ()
+        entries = []
+        for vintage in discover_weo_vintages(self.data_dir):
+            try:
+                stat = os.stat(vintage['path'])
+            except OSError:
+                continue
+            entries.append((os.path.basename(vintage['path']), stat.st_size, stat.st_mtime_ns))
+        return tuple(entries)
+    
+    def check(self) -> bool:
+        """Recargar si los archivos cambiaron y siguen iguales desde la revisión anterior"""
+        fingerprint = self.fingerprint()
+        if fingerprint == self._snapshot.fingerprint:
+            self._pending = None
+            return False
+        if fingerprint != self._pending:
+            self._pending = fingerprint
+            return False
+        self.reload()
+        return True
+    
+    def reload(self) -> DataSnapshot:
+        """Construir la versión nueva a partir de la vigente y publicarla
+
+        Si la carga falla o no produce indicadores se conserva la versión
+        vigente.
+        """
+        with self._lock:
+            previous = self._snapshot
+            fingerprint = self.fingerprint()
+            start = time.perf_counter()
+            try:
+                with metrics.span('data_reload'):
+                    assistant, weo_processor = build_system(self.api_key, self.data_dir,
+                                                            previous=previous.assistant)
+                if not weo_processor.processed_data:
+                    raise ValueError('la versión nueva no tiene indicadores')
+            except Exception as e:
+                metrics.increment('data_reloads', result='error')
+                get_notifier().error(f"Error recargando datos WEO: {e}")
+                return previous
+            
+            changes = diff_snapshots(previous.weo_processor, weo_processor)
+            changes['encoded_chunks'] = assistant.retriever.encoded_chunks
+            changes['seconds'] = round(time.perf_counter() - start, 3)
+            snapshot = DataSnapshot(previous.version + 1, assistant, weo_processor, fingerprint, changes)
+            # Publicación atómica: las solicitudes en curso conservan `previous`
+            self._snapshot = snapshot
+            self._pending = None
+        
+        metrics.increment('data_reloads', result='ok')
+        get_notifier().info(
+            f"🔄 Datos actualizados a {weo_processor.vintage} (versión {snapshot.version}): "
+            f"{changes['changed']} series modificadas, {changes['added']} nuevas, "
+            f"{changes['removed']} eliminadas en {changes['seconds']:.2f} s"
+        )
+        return snapshot
+    
+    def start(self):
+        """Revisar el directorio en segundo plano cada poll_interval segundos"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='weo-data-registry', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                get_notifier().error(f"Error revisando {self.data_dir}: {e}")
@@ -0,0 +1,375 @@
+"""Recuperación de indicadores relevantes para una consulta (RAG)"""
+
+import copy
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+import warnings
+import zlib
+from typing import Dict, List
+
+import numpy as np
+
+from .indicators import MACRO_INDICATORS
+from .notify import get_notifier
+from .processing import HISTORICAL_PERIODS, EcuadorWEOProcessor
+
+
+# Términos en español asociados a cada código WEO (las notas del FMI están en inglés)
+INDICATOR_ALIASES = {
+    'NGDP_RPCH': 'pib real crecimiento economico variacion actividad dolarizacion',
+    'NGDP_R': 'pib real precios constantes moneda nacional',
+    'NGDP': 'pib nominal precios corrientes producto interno bruto',
+    'NGDPD': 'pib nominal dolares producto interno bruto',
+    'NGDPRPC': 'pib per capita real precios constantes ingreso por habitante',
+    'NGDPDPC': 'pib per capita dolares ingreso por habitante',
+    'PCPIPCH': 'inflacion precios al consumidor ipc estabilidad de precios dolarizacion',
+    'LUR': 'desempleo tasa de desempleo mercado laboral empleo trabajo',
+    'BCA_NGDPD': 'cuenta corriente balanza de pagos sector externo',
+    'GGXWDG_NGDP': 'deuda publica deuda bruta gobierno finanzas publicas',
+    'GGXCNL_NGDP': 'deficit fiscal balance fiscal prestamo neto gobierno finanzas publicas',
+    'TX_RPCH': 'exportaciones volumen comercio exterior',
+    'TM_RPCH': 'importaciones volumen comercio exterior',
+    'LP': 'poblacion habitantes demografia'
+}
+
+# Los derivados tienen nombres cortos en español que coinciden con
+# muchas preguntas generales: su puntaje se atenúa para que el código WEO
+# canónico gane salvo que la pregunta nombre al derivado ("promedio móvil")
+DERIVED_RETRIEVAL_WEIGHT = 0.75
+# Los resúmenes por período repiten en todas las series los nombres de los
+# períodos ("dolarización"): cuentan la mitad frente al nombre y las notas
+CHUNK_KIND_WEIGHTS = {'periodos': 0.5}
+
+# Palabras sin contenido: "de" o "el" comparten n-gramas con "deflactor" o
+# "empleo" y desplazaban al indicador que la pregunta nombra
+STOPWORDS = frozenset(
+    'a al como con cual cuales cuanto cuanta de del el en entre es esta fue fueron ha la las lo los '
+    'para por que se sobre su sus un una y o e'.split()
+)
+
+# Con embeddings por hashing los n-gramas sueltos dan puntajes de ~0.1 a
+# cualquier texto ("hola", "cuéntame un chiste"): una consulta cuenta como
+# relevante solo si comparte alguna raíz de palabra (STEM_LENGTH letras)
+# con el índice y su mejor puntaje alcanza MIN_RETRIEVAL_SCORE (el mínimo
+# observado en consultas sobre indicadores es ~0.1)
+STEM_LENGTH = 5
+MIN_RETRIEVAL_SCORE = 0.08
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas y sin tildes, para comparar texto en español e inglés"""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def content_tokens(text: str) -> List[str]:
+    """Palabras del texto sin palabras vacías ni números sueltos (los años los resuelve la intención)"""
+    return [token for token in re.findall(r'[a-z0-9]+', normalize_text(text))
+            if token not in STOPWORDS and not token.isdigit()]
+
+
+def stems(text: str) -> set:
+    return {token[:STEM_LENGTH] for token in content_tokens(text)}
+
+
+def text_keys(texts) -> np.ndarray:
+    """Huella de 64 bits de cada texto (para reconocer fragmentos sin cambios)"""
+    return np.array([
+        int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+        for text in texts
+    ], dtype=np.uint64)
+
+
+class HashingEmbedder:
+    """Embeddings offline: hashing de palabras y n-gramas de caracteres con pesos TF-IDF
+
+    No necesita red ni modelos descargados. Los n-gramas de caracteres
+    acercan términos emparentados ("inflacion" / "inflation").
+    """
+    
+    # Sus puntajes solo tienen sentido si la consulta comparte palabras con el índice
+    lexical = True
+    
+    def __init__(self, dim: int = 512, ngram_range: tuple = (3, 4)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.name = f"hashing-{dim}-{ngram_range[0]}{ngram_range[1]}"
+        self.idf = np.ones(dim, dtype=np.float32)
+        self._feature_cache = {}
+    
+    def _token_features(self, token: str) -> tuple:
+        """Buckets y signos de una palabra (memoizados: el vocabulario se repite mucho)"""
+        cached = self._feature_cache.get(token)
+        if cached is None:
+            features = [f"w:{token}"]
+            padded = f" {token} "
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+            hashes = np.array([zlib.crc32(feature.encode('utf-8')) for feature in features], dtype=np.uint32)
+            buckets = (hashes % self.dim).astype(np.int64)
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            cached = (buckets, signs)
+            self._feature_cache[token] = cached
+        return cached
+    
+    def _counts(self, texts: List[str]) -> np.ndarray:
+        counts = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = content_tokens(text)
+            if not tokens:
+                continue
+            features = [self._token_features(token) for token in tokens]
+            buckets = np.concatenate([buckets for buckets, _ in features])
+            signs = np.concatenate([signs for _, signs in features])
+            np.add.at(counts[row], buckets, signs)
+        # tf sublineal
+        return np.sign(counts) * np.log1p(np.abs(counts))
+    
+    def fit(self, texts: List[str]):
+        """Calcular los pesos IDF sobre el corpus indexado"""
+        document_frequency = np.count_nonzero(self._counts(texts), axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+    
+    def get_state(self) -> Dict[str, np.ndarray]:
+        return {'idf': self.idf}
+    
+    def set_state(self, state: Dict[str, np.ndarray]):
+        self.idf = np.asarray(state['idf'], dtype=np.float32)
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = self._counts(texts) * self.idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+class SentenceTransformerEmbedder:
+    """Embeddings semánticos con sentence-transformers (dependencia opcional)"""
+    
+    def __init__(self, model_name: str = 'paraphrase-multilingual-MiniLM-L12-v2'):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.name = f"st-{model_name}"
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(list(texts), batch_size=64, normalize_embeddings=True,
+                                 convert_to_numpy=True).astype(np.float32)
+
+
+def create_embedder(kind: str = None):
+    """Crear el embedder configurado en RETRIEVAL_EMBEDDER (hashing por defecto)"""
+    kind = kind or os.getenv('RETRIEVAL_EMBEDDER', 'hashing')
+    if kind == 'sentence-transformers':
+        try:
+            return SentenceTransformerEmbedder()
+        except Exception as e:
+            get_notifier().warning(f"⚠️ sentence-transformers no disponible ({e}). Usando embeddings por hashing.")
+    return HashingEmbedder()
+
+
+class IndicatorRetriever:
+    """Índice vectorial sobre los indicadores WEO
+
+    Cada serie aporta varios fragmentos (nombre y alias, Subject Notes,
+    notas de la serie y resumen por períodos). Los vectores se calculan
+    una vez por edición de datos y se guardan en disco; la búsqueda es un
+    producto matricial por lotes de consultas. Con el índice de la versión
+    anterior (`previous`) solo se codifican los fragmentos cuyo texto cambió.
+    """
+    
+    INDEX_VERSION = 4
+    
+    def __init__(self, weo_processor: EcuadorWEOProcessor, embedder=None, cache_dir: str = None,
+                 previous: 'IndicatorRetriever' = None):
+        self.weo_processor = weo_processor
+        if embedder is None and previous is not None:
+            # Mismo embedder (y mismos pesos IDF) para poder reutilizar vectores
+            embedder = previous.embedder
+        self.embedder = embedder or create_embedder()
+        self.cache_dir = cache_dir if cache_dir is not None else weo_processor.cache_dir
+        self.previous = previous
+        self.encoded_chunks = 0
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.chunk_keys = np.empty(0, dtype=np.uint64)
+        self.chunk_codes = np.empty(0, dtype=str)
+        self.chunk_isos = np.empty(0, dtype=str)
+        self.chunk_kinds = np.empty(0, dtype=str)
+        self.vocabulary = frozenset()
+        self._scopes = {}
+        self._lock = threading.Lock()
+        self.build()
+        self.previous = None
+    
+    def build_chunks(self) -> List[tuple]:
+        """Generar los fragmentos (código, ISO, tipo, texto) de todas las series"""
+        processor = self.weo_processor
+        chunks = []
+        
+        # Fragmentos por concepto (compartidos entre países)
+        subjects = {}
+        for info in processor.series_info:
+            subjects.setdefault(info['code'], info)
+        definitions = processor.derived.definitions if processor.derived is not None else {}
+        for code, info in subjects.items():
+            label = MACRO_INDICATORS.get(code, {}).get('name', '')
+            aliases = INDICATOR_ALIASES.get(code) or definitions.get(code, {}).get('aliases', '')
+            chunks.append((code, '', 'nombre', f"{info['name']}. {label}. {aliases}. {info['units']}"))
+            if info.get('description'):
+                chunks.append((code, '', 'notas', info['description']))
+        
+        # Promedios por período de todas las series en una sola operación
+        period_means = []
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for _, start, end in HISTORICAL_PERIODS:
+                period_means.append(np.nanmean(processor.values[:, processor.year_slice(start, end)], axis=1))
+        
+        # Fragmentos por serie (país + indicador)
+        for idx, info in enumerate(processor.series_info):
+            country = info.get('country') or ''
+            if info.get('notes'):
+                chunks.append((info['code'], info.get('iso') or '', 'serie', f"{country}. {info['notes']}"))
+            summary = '; '.join(
+                f"{label}: {means[idx]:.2f}"
+                for (label, _, _), means in zip(HISTORICAL_PERIODS, period_means)
+                if not np.isnan(means[idx])
+            )
+            chunks.append((info['code'], info.get('iso') or '', 'periodos',
+                           f"{country} {info['name']} por períodos. {summary}"))
+        
+        # Ordenar por código para agregar puntajes con reduceat
+        return sorted(chunks, key=lambda chunk: chunk[0])
+    
+    def _cache_path(self) -> str:
+        derived = sorted(self.weo_processor.derived_codes.items())
+        key = f"{self.INDEX_VERSION}|{self.weo_processor.data_hash}|{self.embedder.name}|{derived}"
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]
+        return os.path.join(self.cache_dir, 'retrieval', f"{digest}.npz")
+    
+    def build(self):
+        """Cargar el índice desde disco o calcularlo y guardarlo"""
+        path = self._cache_path() if self.cache_dir else None
+        
+        if path and os.path.exists(path):
+            with np.load(path, allow_pickle=False) as stored:
+                self.vectors = stored['vectors']
+                self.chunk_keys = stored['chunk_keys']
+                self.chunk_codes = stored['chunk_codes']
+                self.chunk_isos = stored['chunk_isos']
+                self.chunk_kinds = stored['chunk_kinds']
+                self.vocabulary = frozenset(stored['vocabulary'].tolist())
+                if 'idf' in stored and hasattr(self.embedder, 'set_state'):
+                    if self.previous is not None and self.embedder is self.previous.embedder:
+                        # No cambiar los pesos del índice anterior, que sigue en uso
+                        self.embedder = copy.copy(self.embedder)
+                    self.embedder.set_state({'idf': stored['idf']})
+        else:
+            chunks = self.build_chunks()
+            texts = [text for _, _, _, text in chunks]
+            
+            # Muchos textos se repiten entre países: se codifican una sola vez
+            unique_texts, inverse = np.unique(np.array(texts, dtype=str), return_inverse=True)
+            inverse = inverse.ravel()
+            keys = text_keys(unique_texts)
+            self.vectors = self.encode_unique(unique_texts, keys)[inverse]
+            self.chunk_keys = keys[inverse]
+            self.chunk_codes = np.array([code for code, _, _, _ in chunks], dtype=str)
+            self.chunk_isos = np.array([iso for _, iso, _, _ in chunks], dtype=str)
+            self.chunk_kinds = np.array([kind for _, _, kind, _ in chunks], dtype=str)
+            self.vocabulary = frozenset().union(*(stems(text) for text in unique_texts.tolist()))
+            
+            if path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                state = self.embedder.get_state() if hasattr(self.embedder, 'get_state') else {}
+                np.savez(path, vectors=self.vectors, chunk_keys=self.chunk_keys, chunk_codes=self.chunk_codes,
+                         chunk_isos=self.chunk_isos, chunk_kinds=self.chunk_kinds,
+                         vocabulary=np.array(sorted(self.vocabulary), dtype=str), **state)
+        
+        self.data_hash = self.weo_processor.data_hash
+        self._scopes = {}
+    
+    def refresh(self):
+        """Rehacer los fragmentos si los datos cambiaron (update_indicator), codificando solo los nuevos"""
+        with self._lock:
+            if self.data_hash == self.weo_processor.data_hash:
+                return
+            self.previous = self
+            self.build()
+            self.previous = None
+    
+    def encode_unique(self, texts: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        """Vectores de textos distintos, reutilizando los del índice anterior"""
+        previous = self.previous
+        if previous is None or previous.embedder is not self.embedder or not len(previous.chunk_keys):
+            if hasattr(self.embedder, 'fit'):
+                self.embedder.fit(list(texts))
+            self.encoded_chunks = len(texts)
+            return self.embedder.encode(list(texts)).astype(np.float32)
+        
+        known = dict(zip(previous.chunk_keys.tolist(), range(len(previous.chunk_keys))))
+        rows = np.array([known.get(key, -1) for key in keys.tolist()], dtype=np.int64)
+        vectors = np.empty((len(texts), previous.vectors.shape[1]), dtype=np.float32)
+        found = rows >= 0
+        vectors[found] = previous.vectors[rows[found]]
+        missing = np.flatnonzero(~found)
+        if len(missing):
+            vectors[missing] = self.embedder.encode([texts[idx] for idx in missing])
+        self.encoded_chunks = len(missing)
+        return vectors
+    
+    def _scope(self, iso: str = None) -> tuple:
+        """Vectores de los fragmentos generales y del país pedido (memoizado por país)"""
+        scope = self._scopes.get(iso)
+        if scope is None:
+            if iso:
+                columns = np.flatnonzero((self.chunk_isos == '') | (self.chunk_isos == iso))
+            else:
+                columns = np.arange(len(self.chunk_codes))
+            codes, starts = np.unique(self.chunk_codes[columns], return_index=True)
+            derived = self.weo_processor.derived_codes
+            weights = np.array([DERIVED_RETRIEVAL_WEIGHT if code in derived else 1.0 for code in codes.tolist()],
+                               dtype=np.float32)
+            # El país ya acota la búsqueda: su nombre en la pregunta no distingue indicadores
+            names = {normalize_text(info['country']) for info in self.weo_processor.series_info
+                     if iso and info.get('country') and info.get('iso') == iso}
+            country = re.compile(r'\b(?:' + '|'.join(map(re.escape, sorted(names))) + r')\b') if names else None
+            kinds = np.array([CHUNK_KIND_WEIGHTS.get(kind, 1.0) for kind in self.chunk_kinds[columns].tolist()],
+                             dtype=np.float32)
+            scope = (np.ascontiguousarray(self.vectors[columns] * kinds[:, None]), codes.tolist(), starts,
+                     weights, country)
+            self._scopes[iso] = scope
+        return scope
+    
+    def search(self, queries: List[str], k: int = 3, iso: str = None) -> List[List[tuple]]:
+        """Top-k de códigos para un lote de consultas: [[(código, puntaje), ...], ...]"""
+        if self.data_hash != self.weo_processor.data_hash:
+            self.refresh()
+        if not len(self.vectors) or not queries:
+            return [[] for _ in queries]
+        
+        vectors, codes, starts, weights, country = self._scope(iso)
+        if country is not None:
+            queries = [country.sub(' ', normalize_text(query)) for query in queries]
+        scores = self.embedder.encode(list(queries)) @ vectors.T
+        
+        # Mejor fragmento de cada código (los fragmentos están ordenados por código)
+        code_scores = np.maximum.reduceat(scores, starts, axis=1) * weights
+        k = min(k, code_scores.shape[1])
+        top = np.argpartition(-code_scores, k - 1, axis=1)[:, :k]
+        
+        lexical = getattr(self.embedder, 'lexical', False)
+        results = []
+        for row, candidates in enumerate(top):
+            # Consulta ajena a los indicadores: sin resultados
+            if lexical and not stems(queries[row]) & self.vocabulary:
+                results.append([])
+                continue
+            ordered = candidates[np.argsort(-code_scores[row, candidates])]
+            results.append([
+                (codes[col], float(code_scores[row, col]))
+                for col in ordered
+                if code_scores[row, col] >= MIN_RETRIEVAL_SCORE
+            ])
+        return results
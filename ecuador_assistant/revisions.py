@@ -0,0 +1,160 @@
+"""Historial de revisiones entre ediciones WEO
+
+Guardar cada edición completa multiplica la memoria por el número de
+ediciones; aquí la más reciente es la matriz base y cada edición anterior
+solo guarda las celdas que difieren de ella.
+"""
+
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+VINTAGE_YEAR_PATTERN = re.compile(r'(19|20)\d{2}')
+# Ediciones que se comparan en el gráfico y en el contexto del asistente
+REVISION_VINTAGES = 4
+
+
+class RevisionStore:
+    """Valores de todas las ediciones cargadas: matriz base + deltas dispersos
+
+    La base es la edición más reciente (la misma matriz del procesador,
+    sin copia, cuando cubre todas las series y años). Los deltas de las
+    ediciones anteriores se guardan como una sola lista ordenada de
+    claves lineales (edición, fila, columna) con su valor (NaN si la serie
+    o el año no existían en esa edición), así que cualquier conjunto de
+    celdas x ediciones se resuelve con un searchsorted.
+    """
+    
+    def __init__(self, labels: List[str], digests: List[str], years: np.ndarray,
+                 series_index: Dict[tuple, int], base: np.ndarray,
+                 delta_keys: np.ndarray, delta_values: np.ndarray):
+        self.labels = labels
+        self.digests = digests
+        self.years = years
+        self.series_index = series_index
+        self.base = base
+        self.delta_keys = delta_keys
+        self.delta_values = delta_values
+        self.n_cols = len(years)
+        self.n_cells = len(series_index) * self.n_cols
+    
+    @classmethod
+    def from_tables(cls, tables: List[Dict[str, Any]], default_label: str = '') -> 'RevisionStore':
+        """Armar el historial a partir de tablas WEO (de la más antigua a la más reciente)
+
+        default_label: edición de las tablas sin etiqueta (el extracto incluido).
+        """
+        latest = tables[-1]
+        first_year = min(int(table['years'][0]) for table in tables)
+        last_year = max(int(table['years'][-1]) for table in tables)
+        years = np.arange(first_year, last_year + 1, dtype=np.int64)
+        
+        # Filas: las series de la edición más reciente primero, luego las discontinuadas
+        series_index = {}
+        for table in reversed(tables):
+            for info in table['series']:
+                series_index.setdefault((info.get('iso'), info['code']), len(series_index))
+        
+        def aligned(table) -> np.ndarray:
+            matrix = np.full((len(series_index), len(years)), np.nan)
+            rows = [series_index[(info.get('iso'), info['code'])] for info in table['series']]
+            offset = int(table['years'][0]) - first_year
+            matrix[rows, offset:offset + len(table['years'])] = table['values']
+            return matrix
+        
+        if len(series_index) == len(latest['series']) and np.array_equal(latest['years'], years):
+            base = latest['values']
+        else:
+            base = aligned(latest)
+        
+        keys, values = [], []
+        for vintage, table in enumerate(tables[:-1]):
+            matrix = aligned(table)
+            differs = ~((matrix == base) | (np.isnan(matrix) & np.isnan(base)))
+            cells = np.flatnonzero(differs)
+            keys.append(vintage * base.size + cells)
+            values.append(matrix.ravel()[cells])
+        
+        return cls(
+            labels=[table.get('label') or default_label for table in tables],
+            digests=[table.get('digest') for table in tables],
+            years=years,
+            series_index=series_index,
+            base=base,
+            delta_keys=np.concatenate(keys) if keys else np.empty(0, dtype=np.int64),
+            delta_values=np.concatenate(values) if values else np.empty(0)
+        )
+    
+    def nbytes(self) -> Dict[str, int]:
+        """Memoria de la base y de los deltas frente a guardar cada edición completa"""
+        deltas = self.delta_keys.nbytes + self.delta_values.nbytes
+        return {
+            'base': int(self.base.nbytes),
+            'deltas': int(deltas),
+            'full_copies': int(self.base.nbytes * len(self.labels))
+        }
+    
+    def vintage_indices(self, last: int = None) -> np.ndarray:
+        """Índices de las últimas `last` ediciones (todas si es None), en orden cronológico"""
+        count = len(self.labels)
+        return np.arange(max(count - last, 0) if last else 0, count)
+    
+    def values_at(self, rows, columns, vintages=None) -> np.ndarray:
+        """Valores de las celdas (rows, columns) en cada edición: matriz ediciones x celdas"""
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = np.asarray(columns, dtype=np.int64)
+        vintages = self.vintage_indices() if vintages is None else np.asarray(vintages, dtype=np.int64)
+        
+        result = np.broadcast_to(self.base[rows, columns], (len(vintages), len(rows))).copy()
+        if len(self.delta_keys):
+            probes = vintages[:, None] * self.n_cells + (rows * self.n_cols + columns)[None, :]
+            positions = np.minimum(np.searchsorted(self.delta_keys, probes), len(self.delta_keys) - 1)
+            found = self.delta_keys[positions] == probes
+            result[found] = self.delta_values[positions[found]]
+        return result
+    
+    def revisions(self, codes: List[str], year: int, iso: str = None, last: int = None) -> Dict[str, List[tuple]]:
+        """Valor de `year` para cada código en las últimas ediciones: {código: [(edición, valor), ...]}
+
+        Una sola consulta vectorizada para todos los códigos y ediciones;
+        los códigos sin serie o el año fuera del eje se omiten.
+        """
+        column = int(year) - int(self.years[0]) if self.n_cols else -1
+        if not 0 <= column < self.n_cols:
+            return {}
+        found = [(code, self.series_index[(iso, code)]) for code in codes if (iso, code) in self.series_index]
+        if not found:
+            return {}
+        
+        vintages = self.vintage_indices(last)
+        values = self.values_at([row for _, row in found], [column] * len(found), vintages)
+        labels = [self.labels[vintage] for vintage in vintages]
+        return {
+            code: [(label, float(value)) for label, value in zip(labels, values[:, col])]
+            for col, (code, _) in enumerate(found)
+        }
+    
+    def series_by_vintage(self, code: str, iso: str = None, last: int = None,
+                          start_year: int = None, end_year: int = None):
+        """Serie de un código según cada edición: (ediciones, años, matriz ediciones x años) o None"""
+        row = self.series_index.get((iso, code))
+        if row is None or not self.n_cols:
+            return None
+        first = int(self.years[0])
+        lo = max((start_year or first) - first, 0)
+        hi = min((end_year or int(self.years[-1])) - first + 1, self.n_cols)
+        if hi <= lo:
+            return None
+        
+        vintages = self.vintage_indices(last)
+        columns = np.arange(lo, hi)
+        matrix = self.values_at(np.full(len(columns), row), columns, vintages)
+        return [self.labels[vintage] for vintage in vintages], self.years[lo:hi], matrix
+
+
+def vintage_year(label: str):
+    """Año de publicación de una edición ('WEO Apr 2025' -> 2025), None si no figura"""
+    match = VINTAGE_YEAR_PATTERN.search(label or '')
+    return int(match.group(0)) if match else None
@@ -0,0 +1,38 @@
+"""Carga de datos y creación del asistente, sin dependencias de interfaz"""
+
+import os
+
+from . import metrics
+from .assistant import EcuadorAdvancedAssistant
+from .comparison import PeerComparisonEngine
+from .derived import DerivedIndicatorEngine
+from .indicators import DERIVED_INDICATORS
+from .processing import EcuadorWEOProcessor, discover_weo_vintages
+from .weo_data import load_weo_data
+
+
+@metrics.timed('load_system')
+def build_system(api_key: str = None, data_dir: str = None, previous: EcuadorAdvancedAssistant = None):
+    """Cargar datos y crear el asistente (sin caché de Streamlit)
+
+    Con `previous` (el asistente de la versión de datos anterior) solo se
+    recalculan las series que cambiaron y sus fragmentos de recuperación.
+    """
+    # Cargar datos WEO: archivos oficiales (todas las ediciones) si hay
+    # un directorio configurado, o el extracto de Ecuador incluido
+    data_dir = data_dir or os.getenv('WEO_DATA_DIR')
+    previous_processor = previous.weo_processor if previous else None
+    if data_dir and os.path.isdir(data_dir) and discover_weo_vintages(data_dir):
+        weo_processor = EcuadorWEOProcessor.from_directory(data_dir, previous=previous_processor)
+    else:
+        weo_processor = EcuadorWEOProcessor(load_weo_data(), previous=previous_processor)
+    
+    # Indicadores derivados: se registran antes de indexar la recuperación
+    weo_processor.derived = DerivedIndicatorEngine(weo_processor)
+    weo_processor.derived.register_many(DERIVED_INDICATORS, skip_invalid=True)
+    weo_processor.comparison = PeerComparisonEngine(weo_processor)
+    
+    # Crear asistente
+    assistant = EcuadorAdvancedAssistant(weo_processor, api_key=api_key, previous=previous)
+    
+    return assistant, weo_processor
@@ -0,0 +1,24 @@
+"""Extracto WEO de Ecuador incluido con la aplicación (FMI, abril 2025)"""
+
+
+def load_weo_data():
+    """Cargar datos WEO desde el documento"""
+    
+    # Datos WEO completos de Ecuador
+    weo_raw_data = """WEO Country Code	ISO	WEO Subject Code	Country	Subject Descriptor	Subject Notes	Units	Scale	Country/Series-specific Notes	1980	1981	1982	1983	1984	1985	1986	1987	1988	1989	1990	1991	1992	1993	1994	1995	1996	1997	1998	1999	2000	2001	2002	2003	2004	2005	2006	2007	2008	2009	2010	2011	2012	2013	2014	2015	2016	2017	2018	2019	2020	2021	2022	2023	2024	2025	2026	2027	2028	2029	2030	Estimates Start After
+248	ECU	NGDP_R	Ecuador	Gross domestic product, constant prices	Expressed in billions of national currency units; the base year is country-specific. Expenditure-based GDP is total final expenditures at purchasers' prices (including the f.o.b. value of exports of goods and services), less the f.o.b. value of imports of goods and services. [SNA 1993]	National currency	Billions	Source: Central Bank Latest actual data: 2023 Notes: The national accounts have been updated from 2002 onwards. Prior to 2002 the data are adjusted to produce smooth series with the use of splicing technique. These estimates continue to serve as proxies for historical series when complete information is una National accounts manual used: System of National Accounts (SNA) 2008 GDP valuation: Market prices Reporting in calendar year: Yes Start/end months of reporting year: January/December Base year: 2018 Chain-weighted: Yes, from 2018 Primary domestic currency: US dollar Data last updated: 04/10/2025	33.922	35.245	35.668	34.669	36.125	37.715	38.882	36.56	40.393	40.508	41.727	43.86	45.445	46.354	48.328	49.417	50.273	52.448	54.162	51.595	52.158	54.352	57.03	58.676	62.684	66.069	68.937	70.248	74.86	75.677	78.726	85.403	90.342	96.857	100.95	101.071	100.375	106.368	107.479	107.657	97.704	106.909	113.183	115.434	113.172	115.126	117.563	120.261	123.265	126.376	129.513	2023
+248	ECU	NGDP_RPCH	Ecuador	Gross domestic product, constant prices	Annual percentages of constant price GDP are year-on-year changes; the base year is country-specific. Expenditure-based GDP is total final expenditures at purchasers' prices (including the f.o.b. value of exports of goods and services), less the f.o.b. value of imports of goods and services. [SNA 1993]	Percent change	Units	See notes for:  Gross domestic product, constant prices (National currency).	4.9	3.9	1.2	-2.8	4.2	4.4	3.094	-5.972	10.486	0.285	3.008	5.113	3.614	2	4.258	2.253	1.732	4.328	3.267	-4.739	1.092	4.206	4.928	2.885	6.832	5.399	4.341	1.902	6.565	1.091	4.029	8.481	5.783	7.211	4.226	0.12	-0.688	5.97	1.044	0.165	-9.245	9.422	5.868	1.988	-1.959	1.727	2.117	2.295	2.498	2.524	2.482	2023
+248	ECU	NGDP	Ecuador	Gross domestic product, current prices	Expressed in billions of national currency units. Expenditure-based GDP is total final expenditures at purchasers' prices (including the f.o.b. value of exports of goods and services), less the f.o.b. value of imports of goods and services. [SNA 1993]	National currency	Billions	Source: Central Bank Latest actual data: 2023 Notes: The national accounts have been updated from 2002 onwards. Prior to 2002 the data are adjusted to produce smooth series with the use of splicing technique. These estimates continue to serve as proxies for historical series when complete information is una National accounts manual used: System of National Accounts (SNA) 2008 GDP valuation: Market prices Reporting in calendar year: Yes Start/end months of reporting year: January/December Base year: 2018 Chain-weighted: Yes, from 2018 Primary domestic currency: US dollar Data last updated: 04/10/2025	16.116	16.501	16.474	14.478	15.408	18.02	13.222	12.355	11.749	11.531	11.71	13.139	14.367	16.783	20.238	21.98	23.001	25.847	26.292	18.891	17.531	23.127	27.054	30.965	35.195	40.279	45.691	49.849	61.139	60.095	68.151	78.987	87.735	96.57	102.718	97.21	97.671	104.467	107.479	107.596	95.865	107.179	116.133	121.147	121.728	125.677	130.31	135.35	140.863	146.638	152.588	2023
+248	ECU	NGDPD	Ecuador	Gross domestic product, current prices	Values are based upon GDP in national currency converted to U.S. dollars using market exchange rates (yearly average). Exchange rate projections are provided by country economists for the group of other emerging market and developing countries. Exchanges rates for advanced economies are established in the WEO assumptions for each WEO exercise. Expenditure-based GDP is total final expenditures at purchasers' prices (including the f.o.b. value of exports of goods and services), less the f.o.b. value of imports of goods and services. [SNA 1993]	U.S. dollars	Billions	See notes for:  Gross domestic product, current prices (National currency).	16.116	16.501	16.474	14.478	15.408	18.02	13.222	12.355	11.749	11.531	11.71	13.139	14.367	16.783	20.238	21.98	23.001	25.847	26.292	18.891	17.531	23.127	27.054	30.965	35.195	40.279	45.691	49.849	61.139	60.095	68.151	78.987	87.735	96.57	102.718	97.21	97.671	104.467	107.479	107.596	95.865	107.179	116.133	121.147	121.728	125.677	130.31	135.35	140.863	146.638	152.588	2023
+248	ECU	NGDPRPC	Ecuador	Gross domestic product per capita, constant prices	GDP is expressed in constant national currency per person. Data are derived by dividing constant price GDP by total population.	National currency	Units	See notes for:  Gross domestic product, constant prices (National currency) Population (Persons).	4,241.50	4,283.97	4,215.72	3,986.22	4,043.16	4,111.31	4,130.84	3,787.82	4,078.70	3,991.73	4,016.82	4,126.78	4,181.43	4,174.22	4,264.06	4,278.14	4,278.23	4,393.32	4,469.23	4,195.68	4,179.14	4,285.97	4,420.74	4,468.22	4,689.64	4,856.43	4,976.53	4,979.74	5,213.41	5,177.52	5,289.41	5,633.21	5,850.95	6,162.34	6,311.59	6,212.41	6,071.48	6,334.15	6,293.46	6,202.54	5,574.65	6,069.43	6,389.01	6,472.37	6,299.03	6,359.26	6,443.97	6,540.91	6,652.50	6,768.04	6,883.33	2022
+248	ECU	NGDPDPC	Ecuador	Gross domestic product per capita, current prices	GDP is expressed in current U.S. dollars per person. Data are derived by first converting GDP in national currency to U.S. dollars and then dividing it by total population.	U.S. dollars	Units	See notes for:  Gross domestic product, current prices (National currency) Population (Persons).	2,015.08	2,005.71	1,947.09	1,664.71	1,724.51	1,964.32	1,404.72	1,280.02	1,186.36	1,136.26	1,127.22	1,236.27	1,321.88	1,511.30	1,785.61	1,902.88	1,957.42	2,165.07	2,169.51	1,536.21	1,404.64	1,823.70	2,097.12	2,358.04	2,633.05	2,960.73	3,298.41	3,533.67	4,257.89	4,111.48	4,578.94	5,210.00	5,682.12	6,144.12	6,422.12	5,975.08	5,907.93	6,220.97	6,293.46	6,199.03	5,469.76	6,084.74	6,555.53	6,792.72	6,775.26	6,942.10	7,142.69	7,361.58	7,602.24	7,853.16	8,109.68	2022
+248	ECU	PCPIPCH	Ecuador	Inflation, average consumer prices	Annual percentages of average consumer prices are year-on-year changes.	Percent change	Units	See notes for:  Inflation, average consumer prices (Index).	13.049	16.387	16.258	48.434	31.23	27.983	23.03	29.504	58.216	75.648	48.519	48.804	54.341	45	27.443	22.886	24.4	30.6	36.1	52.2	96.1	37.674	12.485	7.929	2.741	2.17	3.299	2.276	8.4	5.16	3.554	4.475	5.102	2.722	3.589	3.966	1.728	0.417	-0.224	0.266	-0.339	0.133	3.466	2.216	1.547	1.337	1.461	1.536	1.536	1.536	1.536	2024
+248	ECU	LUR	Ecuador	Unemployment rate	Unemployment rate can be defined by either the national definition, the ILO harmonized definition, or the OECD harmonized definition. The OECD harmonized unemployment rate gives the number of unemployed persons as a percentage of the labor force (the total number of people employed plus unemployed). [OECD Main Economic Indicators, OECD, monthly] As defined by the International Labour Organization, unemployed workers are those who are currently not working but are willing and able to work for pay, currently available to work, and have actively searched for work. [ILO, http://www.ilo.org/public/english/bureau/stat/res/index.htm]	Percent of total labor force	Units	Source: National Statistics Office. Source: INEC and Central Bank Latest actual data: 2024 Employment type: National definition Primary domestic currency: US dollar Data last updated: 04/10/2025	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	7	7.9	6.1	8.5	8.9	8.3	5.696	5.493	9.046	7.828	10.163	13.107	7.625	9.554	7.828	10.163	7.219	7.095	6.687	6.923	5.95	6.47	5.02	4.21	4.12	4.15	3.8	4.77	5.21	4.62	3.69	3.84	5.346	4.68	3.8	3.57	3.38	4	3.8	3.6	3.5	3.5	3.5	2024
+248	ECU	BCA_NGDPD	Ecuador	Current account balance	Current account is all transactions other than those in financial and capital items. The major classifications are goods and services, income and current transfers. The focus of the BOP is on transactions (between an economy and the rest of the world) in goods, services, and income.	Percent of GDP	Units	See notes for:  Gross domestic product, current prices (National currency) Current account balance (U.S. dollars).	-3.981	-6.048	-7.175	-0.794	-1.772	0.422	-4.402	-9.608	-5.788	-6.201	-3.074	-5.388	-0.849	-5.058	-4.439	-4.55	-0.238	-1.767	-7.982	4.86	6.347	-2.383	-4.506	-1.249	-1.362	1.177	3.808	3.784	2.894	0.521	-2.322	-0.507	-0.167	-0.966	-0.651	-2.285	0.922	-0.388	-1.534	-0.507	2.091	2.741	1.84	1.83	5.818	3.423	2.641	2.52	2.514	2.512	2.482	2023
+248	ECU	GGXWDG_NGDP	Ecuador	General government gross debt	Gross debt consists of all liabilities that require payment or payments of interest and/or principal by the debtor to the creditor at a date or dates in the future. This includes debt liabilities in the form of SDRs, currency and deposits, debt securities, loans, insurance, pensions and standardized guarantee schemes, and other accounts payable. Thus, all liabilities in the GFSM 2001 system are debt, except for equity and investment fund shares and financial derivatives and employee stock options. Debt can be valued at current market, nominal, or face values (GFSM 2001, paragraph 7.110).	Percent of GDP	Units	See notes for:  General government gross debt (National currency).	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	63.803	55.043	47.198	40.2	35.758	33.094	29.648	24.873	19.667	18.436	18.607	19.341	23.426	28.163	36.438	46.066	47.391	49.505	52.064	63.551	61.756	57.203	54.332	55.039	n/a	n/a	n/a	n/a	n/a	n/a	2024
+248	ECU	GGXCNL_NGDP	Ecuador	General government net lending/borrowing	Net lending (+)/ borrowing (-) is calculated as revenue minus total expenditure. This is a core GFS balance that measures the extent to which general government is either putting financial resources at the disposal of other sectors in the economy and nonresidents (net lending), or utilizing the financial resources generated by other sectors and nonresidents (net borrowing). This balance may be viewed as an indicator of the financial impact of general government activity on the rest of the economy and nonresidents (GFSM 2001, paragraph 4.17). Note: Net lending (+)/borrowing (-) is also equal to net acquisition of financial assets minus net incurrence of liabilities.	Percent of GDP	Units	See notes for:  General government net lending/borrowing (National currency).	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	n/a	-2.024	-3.44	-2.825	-5.099	-4.825	-0.32	0.033	0.738	1.045	1.942	0.661	2.921	2.658	0.568	-3.714	-1.385	-0.127	-2.835	-8.165	-8.106	-6.866	-10.292	-5.772	-2.803	-3.468	-7.376	-1.588	0.045	-3.484	-1.332	n/a	n/a	n/a	n/a	n/a	n/a	2024
+248	ECU	TX_RPCH	Ecuador	Volume of exports of goods and services	Percent change of volume of exports refers to the aggregate change in the quantities of total exports whose characteristics are unchanged. The goods and services and their prices are held constant, therefore changes are due to changes in quantities only. [Export and Import Price Index Manual: Theory and Practice, Glossary]	Percent change	Units	Source: Central Bank Latest actual data: 2024 Base year: 2014 Methodology used to derive volumes: Deflation by unit value indexes (from customs data) Formula used to derive volumes: Laspeyres-type Chain-weighted: No. Last updated in 2014 Trade System: General trade Oil coverage: Primary or unrefined products; Secondary or refined products Valuation of exports: Free on board (FOB) Valuation of imports: Free on board (FOB) Primary domestic currency: US dollar Data last updated: 04/10/2025	-1.855	6.362	-3.783	10.062	3.346	13.813	3.963	-15.791	22.953	-3.83	3.104	10.5	9.6	4.2	11.684	11.26	-2.123	6.986	-4.737	7.631	2.536	-1.587	0.624	7.21	17.178	7.521	4.992	-1.958	2.99	-1.762	-0.413	3.891	4.815	5.109	6.525	2.867	-0.142	3.207	0.951	6.915	1.736	7.44	5.521	6.74	4.817	-1.457	4.695	4.17	4.978	5.251	4.999	2024
+248	ECU	TM_RPCH	Ecuador	Volume of imports of goods and services	Percent change of volume of imports refers to the aggregate change in the quantities of total imports whose characteristics are unchanged. The goods and services and their prices are held constant, therefore changes are due to changes in quantities only. [Export and Import Price Index Manual: Theory and Practice, Glossary]	Percent change	Units	Source: Central Bank Latest actual data: 2024 Base year: 2014 Methodology used to derive volumes: Deflation by unit value indexes (from customs data) Formula used to derive volumes: Laspeyres-type Chain-weighted: No. Last updated in 2014 Trade System: General trade Oil coverage: Primary or unrefined products; Secondary or refined products Valuation of exports: Free on board (FOB) Valuation of imports: Free on board (FOB) Primary domestic currency: US dollar Data last updated: 04/10/2025	-1.061	5.244	-4.988	-33.125	9.195	5.857	-7.484	9.719	-23.134	3.39	-0.839	16	1	0.8	14.636	7.949	-12.597	20.513	6.532	-31.595	12.822	25.722	19.015	-4.06	10.877	13.162	7.038	6.175	13.009	-6.852	12.483	2.598	0.214	8.16	4.687	-4.79	-11.405	16.627	3.978	0.359	-17.08	18.984	10.016	2.555	-3.279	5.166	3.974	3.885	4.538	5.816	5.466	2024
+248	ECU	LP	Ecuador	Population	For census purposes, the total population of the country consists of all persons falling within the scope of the census. In the broadest sense, the total may comprise either all usual residents of the country or all persons present in the country at the time of the census. [Principles and Recommendations for Population and Housing Censuses, Revision 1, paragraph 2.42]	Persons	Millions	Source: National Statistics Office Latest actual data: 2022 Primary domestic currency: US dollar Data last updated: 04/10/2025	7.998	8.227	8.461	8.697	8.935	9.173	9.413	9.652	9.903	10.148	10.388	10.628	10.868	11.105	11.334	11.551	11.751	11.938	12.119	12.297	12.481	12.681	12.901	13.132	13.367	13.604	13.852	14.107	14.359	14.616	14.884	15.161	15.441	15.718	15.994	16.269	16.532	16.793	17.078	17.357	17.526	17.614	17.715	17.835	17.967	18.104	18.244	18.386	18.529	18.672	18.815	2022"""
+    
+    return weo_raw_data
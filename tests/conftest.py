@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# Los tests importan el paquete desde la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def bundled_system(tmp_path_factory):
+    """(asistente, procesador) sobre el extracto de Ecuador incluido, sin Claude ni caché en disco"""
+    from ecuador_assistant.system import build_system
+    
+    saved = {name: os.environ.pop(name) for name in ('WEO_DATA_DIR', 'WEO_CACHE_DIR', 'ANTHROPIC_API_KEY')
+             if name in os.environ}
+    try:
+        yield build_system(data_dir=str(tmp_path_factory.mktemp('sin_datos')))
+    finally:
+        os.environ.update(saved)
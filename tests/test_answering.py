@@ -0,0 +1,189 @@
+"""Intención de las preguntas y respuestas calculadas localmente sobre el extracto de Ecuador"""
+
+import re
+
+import numpy as np
+import pytest
+
+from ecuador_assistant.answering import (CONFIDENCE_DEFAULTS, CONFIDENCE_EXPLICIT, CONFIDENCE_LOOKUP,
+                                         CONFIDENCE_SUMMARY, ROUTE_AGGREGATE, ROUTE_LLM, ROUTE_LOOKUP,
+                                         TOPIC_INDICATORS, OfflineAnswerEngine, QueryRouter, parse_intent)
+from ecuador_assistant.indicators import DERIVED_INDICATORS
+from ecuador_assistant.processing import HISTORICAL_PERIODS, EcuadorWEOProcessor
+from ecuador_assistant.weo_data import load_weo_data
+
+
+# (pregunta, intención, años, rangos, períodos, confianza)
+INTENT_CASES = [
+    ('¿Cuál fue la inflación en 2000?', 'value', [2000], [], [], CONFIDENCE_LOOKUP),
+    ('¿Cuánto cambió el PIB entre 1999 y 2005?', 'change', [1999, 2005], [(1999, 2005)], [], CONFIDENCE_EXPLICIT),
+    ('¿Cómo varió el desempleo en 2010?', 'change', [2010], [], [], CONFIDENCE_DEFAULTS),
+    ('¿En qué año fue máxima la inflación?', 'max', [], [], [], CONFIDENCE_LOOKUP),
+    ('inflación más baja entre 2010-2020', 'min', [2010, 2020], [(2010, 2020)], [], CONFIDENCE_EXPLICIT),
+    ('tendencia del desempleo 2019-2000', 'trend', [2000, 2019], [(2000, 2019)], [], CONFIDENCE_EXPLICIT),
+    ('evolución de la deuda pública', 'trend', [], [], [], CONFIDENCE_LOOKUP),
+    ('PIB 2000-2009', 'trend', [2000, 2009], [(2000, 2009)], [], CONFIDENCE_EXPLICIT),
+    ('compara la inflación 2000-2009 vs 2010-2019', 'compare', [2000, 2009, 2010, 2019],
+     [(2000, 2009), (2010, 2019)], [], CONFIDENCE_EXPLICIT),
+    ('compara la inflación antes y después de la dolarización', 'compare', [], [],
+     HISTORICAL_PERIODS[:2], CONFIDENCE_EXPLICIT),
+    ('compara el crecimiento con la dolarización', 'compare', [], [], HISTORICAL_PERIODS[:2], CONFIDENCE_EXPLICIT),
+    ('compara la inflación', 'compare', [], [], [], CONFIDENCE_DEFAULTS),
+    ('correlación entre inflación y desempleo', 'correlation', [], [], [], CONFIDENCE_LOOKUP),
+    ('inflación máxima en el boom', 'max', [], [], [HISTORICAL_PERIODS[2]], CONFIDENCE_EXPLICIT),
+    ('háblame de la economía', 'summary', [], [], [], CONFIDENCE_SUMMARY),
+    # Un año suelto sin tema no es un valor puntual confiable
+    ('¿Qué pasó con la economía en 1999?', 'value', [1999], [], [], CONFIDENCE_DEFAULTS),
+    ('¿y en 2005?', 'value', [2005], [], [], CONFIDENCE_DEFAULTS),
+    ('deflactor en 2005', 'value', [2005], [], [], CONFIDENCE_LOOKUP),
+]
+
+
+@pytest.mark.parametrize('query, intent, years, ranges, periods, confidence', INTENT_CASES)
+def test_parse_intent(query, intent, years, ranges, periods, confidence):
+    parsed = parse_intent(query)
+    assert parsed['intent'] == intent
+    assert parsed['years'] == years
+    assert parsed['ranges'] == ranges
+    assert parsed['periods'] == list(periods)
+    assert parsed['confidence'] == confidence
+
+
+def test_bare_year_with_known_indicator_is_a_lookup():
+    # Indicador fijado o heredado de un seguimiento
+    assert parse_intent('¿y en 2005?', topic=True)['confidence'] == CONFIDENCE_LOOKUP
+
+
+@pytest.mark.parametrize('query, route', [
+    ('¿Cuál fue la inflación en 2000?', ROUTE_LOOKUP),
+    ('desempleo máximo', ROUTE_AGGREGATE),
+    ('¿Por qué subió la inflación en 2000?', ROUTE_LLM),
+    ('efecto de la dolarización en 2000', ROUTE_LLM),
+    ('¿Cómo afectó la dolarización al PIB en 2000?', ROUTE_LLM),
+    ('¿Cómo influyó el petróleo en el PIB entre 2006 y 2014?', ROUTE_LLM),
+    ('incidencia de la deuda en 2010', ROUTE_LLM),
+    ('háblame de la economía', ROUTE_LLM),
+    ('¿Qué pasó con la economía en 1999?', ROUTE_LLM),
+])
+def test_router(query, route):
+    assert QueryRouter(threshold=0.75).classify(query)[0] == route
+
+
+@pytest.fixture(scope='module')
+def processor():
+    return EcuadorWEOProcessor(load_weo_data())
+
+
+@pytest.fixture(scope='module')
+def engine(processor):
+    return OfflineAnswerEngine(processor)
+
+
+def series(processor, code):
+    row = processor.code_index[code]
+    return processor.values[row], processor.estimate_mask[row]
+
+
+def items(answer: str) -> list:
+    return [line for line in answer.splitlines() if line.startswith('- ')]
+
+
+def numbers(text: str) -> list:
+    return [float(number) for number in re.findall(r'[-+]?\d+\.\d+', text)]
+
+
+@pytest.mark.parametrize('code, year', [('PCPIPCH', 2000), ('NGDP_RPCH', 1999), ('LUR', 2015)])
+def test_value(processor, engine, code, year):
+    values, _ = series(processor, code)
+    answer = engine.answer(f'valor en {year}', [code])
+    assert f"{year}: {values[year - processor.years[0]]:.2f}" in answer
+
+
+@pytest.mark.parametrize('code, first, last', [('NGDPD', 1999, 2005), ('PCPIPCH', 2000, 2010)])
+def test_change(processor, engine, code, first, last):
+    values, _ = series(processor, code)
+    start, end = values[first - processor.years[0]], values[last - processor.years[0]]
+    answer = engine.answer(f'¿cuánto cambió entre {first} y {last}?', [code])
+    assert f"{start:.2f} → {end:.2f} ({end - start:+.2f}" in answer
+
+
+@pytest.mark.parametrize('query, highest', [('¿cuándo fue máxima?', True), ('¿cuándo fue mínima?', False)])
+@pytest.mark.parametrize('code', ['PCPIPCH', 'NGDP_RPCH', 'LUR'])
+def test_extremes_over_observed_years(processor, engine, query, highest, code):
+    values, estimate = series(processor, code)
+    observed = np.where(~np.isnan(values) & ~estimate, values, -np.inf if highest else np.inf)
+    column = observed.argmax() if highest else observed.argmin()
+    answer = engine.answer(query, [code])
+    assert f"{values[column]:.2f} en {processor.years[column]}" in answer
+
+
+@pytest.mark.parametrize('code, start, end', [('NGDP_RPCH', None, None), ('PCPIPCH', 2001, 2019),
+                                              ('LUR', 2000, 2030)])
+def test_trend_slope_matches_least_squares(processor, engine, code, start, end):
+    values, estimate = series(processor, code)
+    years = processor.years
+    if start is None:
+        mask = ~np.isnan(values) & ~estimate
+        query = 'tendencia'
+    else:
+        mask = ~np.isnan(values) & (years >= start) & (years <= end)
+        query = f'tendencia {start}-{end}'
+    slope = np.polyfit(years[mask].astype(float), values[mask], 1)[0]
+    answer = engine.answer(query, [code])
+    reported = float(re.search(r'\(([-+]\d+\.\d+) por año\)', answer).group(1))
+    assert reported == pytest.approx(slope, abs=5e-4)
+    assert f"promedio {values[mask].mean():.2f}" in answer
+
+
+def test_period_means(processor, engine):
+    codes = ['PCPIPCH', 'NGDP_RPCH']
+    answer = engine.answer('compara 2000-2009 vs 2010-2019', codes)
+    for code, line in zip(codes, items(answer)):
+        values, _ = series(processor, code)
+        means = [np.nanmean(values[(processor.years >= a) & (processor.years <= b)])
+                 for a, b in [(2000, 2009), (2010, 2019)]]
+        assert numbers(line)[-3:] == pytest.approx(means + [means[1] - means[0]], abs=5e-3)
+
+
+def test_pairwise_pearson(processor, engine):
+    codes = ['PCPIPCH', 'NGDP_RPCH', 'LUR']
+    answer = engine.answer('correlación entre inflación, crecimiento y desempleo', codes)
+    lines = items(answer)
+    pairs = [(i, j) for i in range(len(codes)) for j in range(i + 1, len(codes))]
+    assert len(lines) == len(pairs)
+    for (i, j), line in zip(pairs, lines):
+        a, estimate_a = series(processor, codes[i])
+        b, estimate_b = series(processor, codes[j])
+        both = ~np.isnan(a) & ~np.isnan(b) & ~estimate_a & ~estimate_b
+        r = np.corrcoef(a[both], b[both])[0, 1]
+        reported = float(re.search(r'r = ([-+]\d+\.\d+)', line).group(1))
+        assert reported == pytest.approx(r, abs=5e-3)
+        assert f"({both.sum()} años en común)" in line
+
+
+@pytest.mark.parametrize('query, codes, llm_available, expected', [
+    # Solo los indicadores del tema que nombra la pregunta
+    ('¿Cuál fue la inflación en 2000?', ['PCPIPCH', 'NGDP_DEFL_PCH', 'LP_PCH'], True, ['PCPIPCH']),
+    ('inflación promedio móvil en 2010', ['PCPIPCH_MA5', 'PCPIPCH'], True, ['PCPIPCH_MA5', 'PCPIPCH']),
+    ('crecimiento de la población en 2010', ['LP_PCH', 'NGDP_RPCH', 'LP'], True, ['LP_PCH', 'LP']),
+    # Ninguno del tema: al LLM, o sin LLM a los indicadores del tema
+    ('¿Cuál fue la inflación en 2000?', ['LP_PCH', 'LUR'], True, None),
+    ('¿Cuál fue la inflación en 2000?', ['LP_PCH', 'LUR'], False, ['PCPIPCH']),
+    # Sin tema (seguimiento, indicador elegido): todos
+    ('¿y en 2005?', ['LUR', 'PCPIPCH'], True, ['LUR', 'PCPIPCH']),
+])
+def test_topical_codes(engine, query, codes, llm_available, expected):
+    assert engine.topical_codes(query, codes, llm_available) == expected
+
+
+def test_local_answer_uses_question_topic(bundled_system):
+    assistant, processor = bundled_system
+    values, _ = series(processor, 'PCPIPCH')
+    answer = assistant.generate_response('¿Cuál fue la inflación en 2000?')
+    label = assistant.answer_engine.label('PCPIPCH')
+    assert items(answer) == [f"- {label}: 2000: {values[2000 - processor.years[0]]:.2f}"]
+
+
+def test_topics_cover_every_derived_indicator():
+    covered = set().union(*(codes for _, codes in TOPIC_INDICATORS))
+    assert set(DERIVED_INDICATORS) <= covered
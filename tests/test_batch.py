@@ -0,0 +1,18 @@
+"""BatchRunner: rutas de las preguntas deduplicadas"""
+
+from ecuador_assistant.answering import ROUTE_LOOKUP, ROUTE_OFFLINE
+from ecuador_assistant.batch import BatchRunner
+
+
+def test_routes_count_every_question_of_a_group(bundled_system):
+    assistant, _ = bundled_system
+    before = dict(assistant.router.counts)
+    questions = [{'id': f"q{i}", 'query': query} for i, query in enumerate([
+        '¿Cuál fue la inflación en 2000?', '¿cuál fue la inflación en 2000', 'CUÁL FUE LA INFLACIÓN EN 2000?',
+        '¿Por qué subió el desempleo en 2015?'
+    ])]
+    records = BatchRunner(assistant, concurrency=2).run(questions, resume=False)
+    assert [record['status'] for record in records] == [ROUTE_LOOKUP] * 3 + [ROUTE_OFFLINE]
+    counts = assistant.router.counts
+    assert counts[ROUTE_LOOKUP] - before[ROUTE_LOOKUP] == 3
+    assert counts[ROUTE_OFFLINE] - before[ROUTE_OFFLINE] == 1
@@ -0,0 +1,40 @@
+"""ResponseCache con SQLite compartido entre hilos"""
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from ecuador_assistant.caching import ResponseCache
+
+
+def accessed_at(path, key):
+    with sqlite3.connect(path) as db:
+        return db.execute('SELECT accessed_at FROM responses WHERE key = ?', (key,)).fetchone()[0]
+
+
+def test_sqlite_cache_from_many_threads(tmp_path):
+    path = str(tmp_path / 'responses.db')
+    cache = ResponseCache(sqlite_path=path)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: cache.set(f"k{i}", f"v{i}"), range(40)))
+    
+    # Otra instancia (otro proceso) lee del disco desde varios hilos
+    other = ResponseCache(sqlite_path=path)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        values = list(pool.map(lambda i: other.get(f"k{i}"), range(40)))
+    assert values == [f"v{i}" for i in range(40)]
+    assert other.stats()['hits'] == 40
+    assert other.get('falta') is None
+
+
+def test_reads_update_accessed_at_in_batches(tmp_path):
+    path = str(tmp_path / 'responses.db')
+    cache = ResponseCache(sqlite_path=path)
+    cache.set('a', 'x')
+    written = accessed_at(path, 'a')
+    
+    reader = ResponseCache(sqlite_path=path)
+    assert reader.get('a') == 'x'
+    # La lectura no escribe en el disco hasta la siguiente escritura
+    assert accessed_at(path, 'a') == written
+    reader.set('b', 'y')
+    assert accessed_at(path, 'a') > written
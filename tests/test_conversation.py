@@ -0,0 +1,47 @@
+"""Preguntas de seguimiento con ConversationMemory sobre el extracto de Ecuador"""
+
+from ecuador_assistant.answering import ROUTE_LOOKUP
+from ecuador_assistant.conversation import ConversationMemory
+
+
+def test_follow_up_reuses_previous_indicators_and_period(bundled_system):
+    assistant, _ = bundled_system
+    memory = ConversationMemory()
+    first = assistant.generate_response('¿Cuál fue la máxima tasa de desempleo entre 2000 y 2009?', memory=memory)
+    follow_up = assistant.generate_response('¿y en la década siguiente?', memory=memory)
+    
+    assert 'Máximo en 2000-2009' in first
+    assert 'Máximo en 2010-2019' in follow_up
+    # Solo el indicador de la respuesta, no los demás que devolvió la búsqueda
+    assert [turn['indicators'] for turn in memory.turns] == [['LUR'], ['LUR']]
+    assert memory.period == (2010, 2019)
+
+
+def test_follow_up_naming_a_topic_searches_again(bundled_system):
+    assistant, _ = bundled_system
+    memory = ConversationMemory()
+    assistant.generate_response('¿Cuál fue la máxima tasa de desempleo entre 2000 y 2009?', memory=memory)
+    answer = assistant.generate_response('¿y la inflación?', memory=memory)
+    
+    assert memory.turns[-1]['indicators'] == ['PCPIPCH']
+    assert 'Máximo en 2000-2009' in answer
+
+
+def test_pinned_indicator_overrides_search(bundled_system):
+    assistant, _ = bundled_system
+    memory = ConversationMemory()
+    assistant.generate_response('¿Cuál fue el valor en 2010?', selected_indicator='GGXWDG_NGDP', memory=memory)
+    assert memory.turns[-1]['indicators'] == ['GGXWDG_NGDP']
+
+
+def test_follow_up_with_bare_year_is_a_lookup(bundled_system):
+    assistant, _ = bundled_system
+    memory = ConversationMemory()
+    assistant.generate_response('¿Cuál fue la inflación en 2000?', memory=memory)
+    
+    # Sin tema propio, pero con los indicadores del turno anterior
+    intent = memory.intent('¿y en 2005?')
+    assert assistant.router.classify('¿y en 2005?', intent)[0] == ROUTE_LOOKUP
+    assert 'Datos de 2005' in assistant.generate_response('¿y en 2005?', memory=memory)
+    # Sin turno previo el mismo año suelto va al LLM
+    assert ConversationMemory().intent('¿y en 2005?')['confidence'] < assistant.router.threshold
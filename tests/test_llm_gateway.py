@@ -0,0 +1,163 @@
+"""LLMGateway contra un servidor local de prueba (sin red ni API key real)"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ecuador_assistant.llm import LLMGateway
+
+anthropic = pytest.importorskip('anthropic')
+
+
+class StubAnthropic:
+    """Servidor /v1/messages: responde 429 las primeras `failures` veces y luego un mensaje"""
+    
+    def __init__(self, failures: int = 0, retry_after: str = '0', delay: float = 0.0):
+        self.failures = failures
+        self.retry_after = retry_after
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)))
+                with stub.lock:
+                    stub.calls += 1
+                    failing = stub.calls <= stub.failures
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                try:
+                    time.sleep(stub.delay)
+                    if failing:
+                        payload = {'type': 'error', 'error': {'type': 'rate_limit_error', 'message': 'slow down'}}
+                        self.reply(429, payload, {'retry-after': stub.retry_after})
+                    else:
+                        self.reply(200, {
+                            'id': 'msg_stub', 'type': 'message', 'role': 'assistant', 'model': body['model'],
+                            'content': [{'type': 'text', 'text': body['messages'][-1]['content']}],
+                            'stop_reason': 'end_turn', 'stop_sequence': None,
+                            'usage': {'input_tokens': 1, 'output_tokens': 1}
+                        })
+                finally:
+                    with stub.lock:
+                        stub.active -= 1
+            
+            def reply(self, status, payload, headers=None):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_factory():
+    created = []
+    
+    def factory(**kwargs):
+        stub = StubAnthropic(**kwargs)
+        created.append(stub)
+        return stub
+    
+    yield factory
+    for stub in created:
+        stub.close()
+
+
+def make_gateway(stub, **kwargs):
+    return LLMGateway('sk-test', base_url=stub.url, timeout=10, backoff_base=0.01, **kwargs)
+
+
+def request(text: str = 'hola'):
+    return {'model': 'claude-test', 'max_tokens': 10, 'messages': [{'role': 'user', 'content': text}]}
+
+
+def test_retries_429_respecting_retry_after(stub_factory):
+    stub = stub_factory(failures=2, retry_after='0.2')
+    gateway = make_gateway(stub, max_retries=3)
+    try:
+        started = time.perf_counter()
+        response = gateway.messages.create(**request())
+        elapsed = time.perf_counter() - started
+    finally:
+        gateway.close()
+    assert response.content[0].text == 'hola'
+    assert stub.calls == 3
+    assert gateway.stats['retries'] == 2
+    assert elapsed >= 0.4
+
+
+def test_gives_up_after_max_retries(stub_factory):
+    stub = stub_factory(failures=10)
+    gateway = make_gateway(stub, max_retries=1)
+    try:
+        with pytest.raises(anthropic.RateLimitError):
+            gateway.messages.create(**request())
+    finally:
+        gateway.close()
+    assert stub.calls == 2
+    assert gateway.stats['errors'] == 1
+
+
+def test_identical_concurrent_calls_share_one_request(stub_factory):
+    stub = stub_factory(delay=0.3)
+    gateway = make_gateway(stub)
+    try:
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            responses = list(pool.map(lambda _: gateway.messages.create(**request('igual')), range(6)))
+    finally:
+        gateway.close()
+    assert [response.content[0].text for response in responses] == ['igual'] * 6
+    assert stub.calls == 1
+    assert gateway.stats['deduplicated'] == 5
+
+
+def test_semaphore_bounds_requests_in_flight(stub_factory):
+    stub = stub_factory(delay=0.2)
+    gateway = make_gateway(stub, max_concurrency=2)
+    try:
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            responses = list(pool.map(lambda i: gateway.messages.create(**request(f"q{i}")), range(6)))
+    finally:
+        gateway.close()
+    assert len(responses) == 6
+    assert stub.calls == 6
+    assert stub.max_active == 2
+
+
+def test_timed_out_request_frees_its_slot(stub_factory):
+    stub = stub_factory(delay=1.0)
+    gateway = make_gateway(stub, max_retries=0, max_concurrency=1)
+    gateway.timeout = 0.2
+    try:
+        with pytest.raises(TimeoutError):
+            gateway.messages.create(**request('lenta'))
+        stub.delay = 0.0
+        # Sin la cancelación, esta esperaría a que termine la abandonada
+        response = gateway.messages.create(**request('rápida'))
+    finally:
+        gateway.close()
+    assert response.content[0].text == 'rápida'
+    assert gateway._inflight == {}
@@ -0,0 +1,58 @@
+"""Lectura vectorizada de las exportaciones WEO (parse_weo_table)"""
+
+import numpy as np
+
+from ecuador_assistant.processing import parse_weo_table
+from ecuador_assistant.weo_data import load_weo_data
+
+HEADERS = ['WEO Subject Code', 'ISO', 'Country', 'Subject Descriptor', 'Subject Notes', 'Units',
+           'Scale', 'Country/Series-specific Notes', '2020', '2021', '2022', '2023', 'Estimates Start After']
+
+
+def weo_text(rows):
+    return '\n'.join('\t'.join(row) for row in [HEADERS] + rows) + '\n'
+
+
+def row(code, cells, boundary='2022'):
+    return [code, 'ECU', 'Ecuador', f'{code} name', 'notes', 'Units', 'Units', 'series notes'] + cells + [boundary]
+
+
+def test_thousands_separators_in_per_capita_rows():
+    table = parse_weo_table(weo_text([
+        row('NGDPDPC', ['5,600.12', '6,012.50', '"6,400"', '6,500.00']),
+        row('NGDPRPC', ['4,241.50', '4,300', '4,351.25', '4,400.75']),
+    ]))
+    codes = [info['code'] for info in table['series']]
+    assert codes == ['NGDPDPC', 'NGDPRPC']
+    np.testing.assert_allclose(table['values'][1], [4241.5, 4300.0, 4351.25, 4400.75])
+    assert table['values'][0, 0] == 5600.12
+    assert table['years'].tolist() == [2020, 2021, 2022, 2023]
+
+
+def test_missing_markers_become_nan():
+    table = parse_weo_table(weo_text([
+        row('LUR', ['n/a', '--', '', '3.5']),
+        row('PCPIPCH', ['N/A', '1.2', 'NaN', '--']),
+        row('LP', ['n/a', '--', 'n/a', ''], boundary=''),
+    ]))
+    codes = [info['code'] for info in table['series']]
+    # Las series sin ningún dato se descartan
+    assert codes == ['LUR', 'PCPIPCH']
+    assert np.isnan(table['values'][0, :3]).all() and table['values'][0, 3] == 3.5
+    assert np.isnan(table['values'][1, [0, 2, 3]]).all() and table['values'][1, 1] == 1.2
+    assert table['series'][0]['estimates_start'] == 2022
+
+
+def test_short_rows_and_footer():
+    text = weo_text([row('LUR', ['3.0', '4.0', '5.0', '6.0'])])
+    text += 'LUR\tECU\tEcuador\tshort row\n\nInternational Monetary Fund, World Economic Outlook Database\n'
+    table = parse_weo_table(text)
+    assert [info['code'] for info in table['series']] == ['LUR']
+
+
+def test_bundled_extract_keeps_per_capita_series():
+    table = parse_weo_table(load_weo_data())
+    codes = {info['code'] for info in table['series']}
+    assert {'NGDPRPC', 'NGDPDPC', 'PCPIPCH', 'LUR', 'NGDP_RPCH'} <= codes
+    row_index = [info['code'] for info in table['series']].index('NGDPDPC')
+    assert np.isfinite(table['values'][row_index]).sum() > 30
@@ -0,0 +1,83 @@
+"""Estadísticas O(1) por ventana de años (RangeStatsIndex) contra una referencia NumPy"""
+
+import warnings
+
+import numpy as np
+import pytest
+
+from ecuador_assistant.processing import EcuadorWEOProcessor, RangeStatsIndex
+from ecuador_assistant.weo_data import load_weo_data
+
+
+def reference(row: np.ndarray) -> dict:
+    valid = row[~np.isnan(row)]
+    return {'count': len(valid), 'mean': valid.mean(), 'std': valid.std(),
+            'min': valid.min(), 'max': valid.max(), 'sum': valid.sum()}
+
+
+@pytest.fixture(scope='module')
+def matrix():
+    rng = np.random.default_rng(7)
+    values = rng.normal(50, 20, size=(40, 51)) * rng.choice([1e-3, 1.0, 1e4], size=(40, 1))
+    # Huecos de NaN dispersos, bloques sin dato y una fila vacía
+    values[rng.random(values.shape) < 0.2] = np.nan
+    values[3, 10:25] = np.nan
+    values[5] = np.nan
+    return values
+
+
+def test_random_windows_match_numpy(matrix):
+    index = RangeStatsIndex(matrix)
+    rng = np.random.default_rng(11)
+    rows = rng.integers(0, matrix.shape[0], 2000)
+    lo = rng.integers(0, matrix.shape[1], 2000)
+    hi = np.minimum(lo + rng.integers(1, matrix.shape[1] + 1, 2000), matrix.shape[1])
+    result = index.query(rows, lo, hi)
+    
+    for i, (row, start, stop) in enumerate(zip(rows, lo, hi)):
+        window = matrix[row, start:stop]
+        assert result['count'][i] == np.count_nonzero(~np.isnan(window))
+        if result['count'][i] == 0:
+            continue
+        expected = reference(window)
+        scale = max(np.nanmax(np.abs(window)), 1.0)
+        for key in ('mean', 'sum', 'std'):
+            assert result[key][i] == pytest.approx(expected[key], rel=1e-9, abs=1e-9 * scale * len(window))
+        assert result['min'][i] == expected['min']
+        assert result['max'][i] == expected['max']
+        valid = np.flatnonzero(~np.isnan(window))
+        assert result['first_col'][i] == start + valid[0]
+        assert result['last_col'][i] == start + valid[-1]
+        assert result['latest'][i] == window[valid[-1]]
+
+
+def test_updated_rows_match_a_fresh_index(matrix):
+    index = RangeStatsIndex(matrix.copy())
+    changed = matrix.copy()
+    changed[[1, 7]] = changed[[1, 7]][:, ::-1]
+    index.matrix = changed
+    index.update_rows([1, 7], changed[[1, 7]])
+    fresh = RangeStatsIndex(changed)
+    rows, lo, hi = np.meshgrid([1, 7], np.arange(0, 51, 5), np.arange(1, 52, 5), indexing='ij')
+    ok = lo < hi
+    for key, value in index.query(rows[ok], lo[ok], hi[ok]).items():
+        np.testing.assert_allclose(value, fresh.query(rows[ok], lo[ok], hi[ok])[key], rtol=1e-12)
+
+
+def test_processor_range_stats_on_bundled_extract():
+    processor = EcuadorWEOProcessor(load_weo_data())
+    for code in ('PCPIPCH', 'LUR', 'NGDPDPC', 'NGDP_RPCH'):
+        row = processor.values[processor.code_index[code]]
+        for start, end in ((1980, 2030), (1995, 1999), (2000, 2024), (2019, 2021)):
+            columns = processor.year_slice(start, end)
+            stats = processor.get_range_stats(code, start, end)
+            window = row[columns]
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', category=RuntimeWarning)
+                expected = reference(window)
+            assert stats['data_points'] == expected['count']
+            assert stats['mean_value'] == pytest.approx(expected['mean'], rel=1e-9)
+            assert stats['std_value'] == pytest.approx(expected['std'], rel=1e-9, abs=1e-9)
+            assert stats['min_value'] == expected['min'] and stats['max_value'] == expected['max']
+    # Ventana sin datos
+    assert processor.get_range_stats('PCPIPCH', 1970, 1975) is None
@@ -0,0 +1,58 @@
+"""Recuperación de indicadores: los códigos WEO canónicos antes que los derivados"""
+
+import pytest
+
+# Consultas por palabra clave del buscador anterior (user-004) y sus códigos canónicos
+KEYWORD_QUERIES = [
+    ('¿Cómo evolucionó el PIB de Ecuador?', {'NGDP_RPCH', 'NGDP', 'NGDPD'}),
+    ('crecimiento del PIB', {'NGDP_RPCH'}),
+    ('crecimiento económico después de 2010', {'NGDP_RPCH'}),
+    ('¿Cuál fue la inflación en 2000?', {'PCPIPCH'}),
+    ('inflación', {'PCPIPCH'}),
+    ('tasa de desempleo', {'LUR'}),
+    ('deuda pública', {'GGXWDG_NGDP'}),
+    ('déficit fiscal', {'GGXCNL_NGDP'}),
+    ('balanza de pagos', {'BCA_NGDPD'}),
+    ('comercio exterior', {'TX_RPCH', 'TM_RPCH'}),
+    ('exportaciones', {'TX_RPCH'}),
+    ('importaciones', {'TM_RPCH'}),
+    ('población', {'LP'}),
+    ('PIB per cápita', {'NGDPRPC', 'NGDPDPC'}),
+    ('efecto de la dolarización en el crecimiento', {'NGDP_RPCH', 'PCPIPCH'}),
+    ('dolarización', {'NGDP_RPCH', 'PCPIPCH'}),
+]
+
+# Los derivados siguen apareciendo primero cuando la pregunta los nombra
+DERIVED_QUERIES = [
+    ('inflación promedio móvil 5 años', 'PCPIPCH_MA5'),
+    ('crecimiento de la población', 'LP_PCH'),
+    ('crecimiento compuesto a 5 años', 'NGDP_R_CAGR5'),
+    ('deflactor implícito del PIB', {'NGDP_DEFL', 'NGDP_DEFL_PCH'}),
+]
+
+
+@pytest.mark.parametrize('query, canonical', KEYWORD_QUERIES)
+def test_keyword_queries_resolve_to_canonical_codes(bundled_system, query, canonical):
+    assistant, _ = bundled_system
+    assert assistant.find_relevant_indicators(query)[0] in canonical
+
+
+@pytest.mark.parametrize('query, expected', DERIVED_QUERIES)
+def test_derived_codes_found_when_named(bundled_system, query, expected):
+    assistant, _ = bundled_system
+    expected = expected if isinstance(expected, set) else {expected}
+    assert assistant.find_relevant_indicators(query)[0] in expected
+
+
+def test_batch_search_matches_single_queries(bundled_system):
+    assistant, _ = bundled_system
+    queries = [query for query, _ in KEYWORD_QUERIES]
+    batch = assistant.find_relevant_indicators_many(queries)
+    assert [codes[0] for codes in batch] == [assistant.find_relevant_indicators(query)[0] for query in queries]
+
+
+@pytest.mark.parametrize('query', ['hola', '¿qué hora es?', 'gracias', 'receta de ceviche', 'asdf qwerty'])
+def test_off_topic_queries_fall_back_to_main_indicators(bundled_system, query):
+    assistant, processor = bundled_system
+    assert assistant.retriever.search([query], k=3, iso=processor.country) == [[]]
+    assert assistant.find_relevant_indicators(query) == ['NGDP_RPCH', 'PCPIPCH', 'LUR']
@@ -0,0 +1,39 @@
+"""Historial de ediciones (RevisionStore): etiquetas y deltas entre ediciones"""
+
+import numpy as np
+
+from ecuador_assistant.processing import DEFAULT_VINTAGE_LABEL, EcuadorWEOProcessor
+from ecuador_assistant.revisions import RevisionStore
+from ecuador_assistant.weo_data import load_weo_data
+
+
+def table(label, values):
+    values = np.asarray(values, dtype=float)
+    table = {'years': np.arange(2000, 2000 + values.shape[1]), 'values': values, 'digest': label,
+             'series': [{'iso': 'ECU', 'code': f"C{row}"} for row in range(len(values))]}
+    if label:
+        table['label'] = label
+    return table
+
+
+def test_bundled_extract_reports_its_vintage():
+    processor = EcuadorWEOProcessor(load_weo_data())
+    assert processor.vintage == DEFAULT_VINTAGE_LABEL
+    assert processor.revisions.labels == [DEFAULT_VINTAGE_LABEL]
+    assert processor.get_revisions(['PCPIPCH'], 2000)['PCPIPCH'][0][0] == DEFAULT_VINTAGE_LABEL
+
+
+def test_unlabelled_tables_use_default_label():
+    store = RevisionStore.from_tables([table('', [[1.0, 2.0]])], default_label='WEO Oct 2024')
+    assert store.labels == ['WEO Oct 2024']
+
+
+def test_revisions_by_vintage():
+    store = RevisionStore.from_tables([table('WEO Apr 2024', [[1.0, 2.0], [5.0, np.nan]]),
+                                       table('WEO Oct 2024', [[1.0, 2.5], [5.0, 6.0]])])
+    revisions = store.revisions(['C0', 'C1'], 2001, 'ECU')
+    assert revisions['C0'] == [('WEO Apr 2024', 2.0), ('WEO Oct 2024', 2.5)]
+    # Sin dato en la edición anterior: NaN, no el valor de la más reciente
+    (label, value), latest = revisions['C1']
+    assert label == 'WEO Apr 2024' and np.isnan(value)
+    assert latest == ('WEO Oct 2024', 6.0)
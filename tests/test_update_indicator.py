@@ -0,0 +1,49 @@
+"""update_indicator y los agregados precalculados de cada serie"""
+
+import numpy as np
+import pytest
+
+from ecuador_assistant.derived import DerivedIndicatorEngine
+from ecuador_assistant.indicators import DERIVED_INDICATORS
+from ecuador_assistant.processing import EcuadorWEOProcessor
+from ecuador_assistant.weo_data import load_weo_data
+
+
+def build_processor():
+    processor = EcuadorWEOProcessor(load_weo_data())
+    processor.derived = DerivedIndicatorEngine(processor)
+    processor.derived.register_many(DERIVED_INDICATORS, skip_invalid=True)
+    return processor
+
+
+def test_compute_analytics_handles_rows_without_data():
+    processor = build_processor()
+    matrix = np.vstack([np.full(len(processor.years), np.nan), processor.values[processor.code_index['LP']]])
+    empty, population = processor.compute_analytics(matrix)
+    
+    assert empty == {'decades': {}, 'periods': {}, 'recent': {}, 'growth': {'yoy': {}, 'cagr': None}}
+    assert population['growth']['cagr'] > 0
+
+
+def test_update_indicator_with_all_nan_values():
+    processor = build_processor()
+    processor.update_indicator('LP', np.full(len(processor.years), np.nan))
+    
+    stats = processor.processed_data['LP']['stats']
+    assert stats['data_points'] == 0 and np.isnan(stats['max_value'])
+    assert processor.processed_data['LP']['analytics']['growth']['cagr'] is None
+    # El derivado de la población queda sin datos
+    assert 'LP_PCH' not in processor.processed_data
+
+
+def test_update_indicator_refreshes_dependents():
+    processor = build_processor()
+    before = processor.processed_data['LP_PCH']['stats']['mean_value']
+    values = processor.values[processor.code_index['LP']] * 2
+    processor.update_indicator('LP', values)
+    
+    # Duplicar la población no cambia su variación anual, pero sí el PIB per cápita
+    assert processor.processed_data['LP_PCH']['stats']['mean_value'] == pytest.approx(before)
+    row = processor.code_index['NGDPD_PC']
+    expected = processor.values[processor.code_index['NGDPD']] / values * 1000
+    np.testing.assert_allclose(processor.values[row], expected, equal_nan=True)